@@ -0,0 +1,8 @@
+"""
+IndoQuantFund: IDX scanner, backtesters and research tools.
+
+Modules are imported on demand (e.g. `from indo_quant_fund.backtest import run_backtest`);
+importing the package itself loads nothing heavy. Command line: `iqf --help` (see cli.py).
+"""
+
+__version__ = "0.1.0"
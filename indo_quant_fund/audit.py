@@ -0,0 +1,163 @@
+"""
+Trade Audit Log for IndoQuantFund.
+Append-only JSON Lines store: one decision per line, never rewritten.
+
+- Writes are buffered (AUDIT_FLUSH_EVERY entries) with optional fsync per flush.
+- The active file rotates by size (AUDIT_MAX_BYTES) and/or date (AUDIT_ROTATE_DAILY);
+  rotated files keep a sortable timestamp suffix next to the active file.
+- iter_audit() streams entries across rotated + active files with ticker/date filters.
+- The old JSON array log (trade_logs.json) is migrated once on first use.
+"""
+
+import glob
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from . import config
+from .instrumentation import metrics
+
+def _rotated_pattern(log_file: str) -> str:
+    stem, ext = os.path.splitext(log_file)
+    return f"{glob.escape(stem)}.*{ext}"
+
+def audit_files(log_file: str = config.AUDIT_LOG_FILE) -> List[str]:
+    """
+    Rotated files (oldest first) followed by the active file.
+    """
+    files = sorted(glob.glob(_rotated_pattern(log_file)))
+    if os.path.exists(log_file):
+        files.append(log_file)
+    return files
+
+def migrate_json_log(legacy_file: str = config.AUDIT_LEGACY_FILE, log_file: str = config.AUDIT_LOG_FILE) -> int:
+    """
+    One-time conversion of the legacy JSON array log to JSON Lines.
+    Skipped when the JSON Lines log already exists. Returns the number of entries migrated.
+    """
+    if not os.path.exists(legacy_file) or os.path.exists(log_file):
+        return 0
+
+    with open(legacy_file, 'r') as f:
+        try:
+            logs = json.load(f)
+        except json.JSONDecodeError:
+            logs = []
+
+    tmp_file = f"{log_file}.tmp"
+    with open(tmp_file, 'w') as f:
+        for entry in logs:
+            f.write(json.dumps(entry, default=str) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, log_file)
+
+    return len(logs)
+
+class TradeAudit:
+    def __init__(
+        self,
+        log_file: str = config.AUDIT_LOG_FILE,
+        flush_every: int = config.AUDIT_FLUSH_EVERY,
+        fsync: bool = config.AUDIT_FSYNC,
+        max_bytes: int = config.AUDIT_MAX_BYTES,
+        rotate_daily: bool = config.AUDIT_ROTATE_DAILY,
+        legacy_file: Optional[str] = config.AUDIT_LEGACY_FILE
+    ):
+        self.log_file = log_file
+        self.flush_every = max(1, flush_every)
+        self.fsync = fsync
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self._pending = 0
+        self._file = None
+
+        if legacy_file:
+            migrate_json_log(legacy_file, log_file)
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.log_file, 'a')
+            self._file_date = datetime.fromtimestamp(os.path.getmtime(self.log_file)).date()
+            self._size = self._file.tell()
+
+    def _needs_rotation(self, next_bytes: int) -> bool:
+        if self._size == 0:
+            return False
+        if self.max_bytes and self._size + next_bytes > self.max_bytes:
+            return True
+        return self.rotate_daily and self._file_date != datetime.now().date()
+
+    def _rotate(self):
+        self.close()
+        stem, ext = os.path.splitext(self.log_file)
+        os.replace(self.log_file, f"{stem}.{datetime.now():%Y%m%d-%H%M%S-%f}{ext}")
+        self._open()
+
+    @metrics.timed('audit.log')
+    def log(self, data: dict):
+        """Appends one trade decision to the JSON Lines audit log"""
+        line = json.dumps(data, default=str) + "\n"
+
+        self._open()
+        if self._needs_rotation(len(line)):
+            self._rotate()
+
+        self._file.write(line)
+        self._size += len(line)
+        self._file_date = datetime.now().date()
+        self._pending += 1
+
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    @metrics.timed('audit.flush')
+    def flush(self):
+        if self._file is None:
+            return
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'TradeAudit':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def iter_audit(
+    log_file: str = config.AUDIT_LOG_FILE,
+    ticker: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None
+) -> Iterator[Dict]:
+    """
+    Streams audit entries line by line (never loads a whole file).
+    since/until are inclusive ISO dates or timestamps compared against each entry's 'timestamp'.
+    A torn last line from a crash mid-write is skipped.
+    """
+    for path in audit_files(log_file):
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+                if ticker and entry.get('ticker') != ticker:
+                    continue
+                timestamp = str(entry.get('timestamp', ''))
+                if since and timestamp < since:
+                    continue
+                if until and timestamp[:len(until)] > until:
+                    continue
+
+                yield entry
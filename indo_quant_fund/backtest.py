@@ -1,123 +1,339 @@
-# backtest.py
 """
 Simple Backtesting Engine for IndoQuantFund.
 Simulates the strategy over historical data to estimate performance.
+
+Two simulation modes are available:
+- "vectorized" (default): indicators, ATR and technical signals are computed
+  once over the whole series; the loop only walks the position state machine.
+- "loop": the original reference implementation that re-slices the history and
+  recomputes every indicator on each simulated day (O(n^2)). Kept for parity checks.
 """
 
+import numpy as np
 import pandas as pd
 import time
-from brain import StrategyEngine
-from risk_guard import RiskGatekeeper
-from data_engine import GoAPILoader
-from utils import calculate_atr
-import config
-
-def run_backtest(ticker: str, initial_capital: float = 100_000_000):
-    print(f"\n🚀 STARTING BACKTEST: {ticker}...")
-    
-    # 1. Setup
-    loader = GoAPILoader(config.API_KEY)
-    brain = StrategyEngine()
-    risk = RiskGatekeeper(initial_capital)
-    
-    # 2. Get Data (Full History)
-    df = loader.get_ohlcv(ticker, days=500)
-    
-    if df.empty or len(df) < 150:
-        print(f"⚠️  Not enough data for {ticker}. Skipping.")
-        return
+from typing import Callable, Dict, List, Optional, Tuple
+from .brain import StrategyEngine
+from .risk_guard import RiskGatekeeper
+from .data_engine import GoAPILoader, RateLimitError
+from .checkpoint import BacktestCheckpoint
+from .positions import PositionBook
+from .run_store import RunStore, run_parameters
+from . import config
+from .instrumentation import metrics
 
-    # 3. Simulation Loop
-    cash = initial_capital
-    shares_held = 0
-    df['portfolio_value'] = initial_capital
+START_INDEX = 150
+
+def precompute_signals(df: pd.DataFrame, brain: StrategyEngine) -> pd.DataFrame:
+    """
+    Computes every indicator the simulation needs in a single pass over the full history.
+    All indicators are causal, so row i equals what the reference loop sees on day i.
+    """
+    df = brain.prepare_indicators(df)
+    brain.indicator_frame(df, fresh=True).require('ATR', 'Stage2_Tech', 'Stage1_Tech')
+    return df
+
+def composite_index_for(loader: GoAPILoader, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Fetches IHSG once per run, covering the whole backtest (the loader adds the EMA
+    warm-up), so every simulated day gets a point-in-time regime.
+    """
+    first_date = pd.Timestamp(df['date'].min())
+    days = (pd.Timestamp.now().normalize() - first_date.normalize()).days + 1
+    return loader.get_composite_index(days=days)
+
+def _fetch_broker_data(loader: GoAPILoader, ticker: str, date_str: str) -> Dict:
+    # --- HISTORICAL BROKER CHECK ---
+    # Mengambil data bandar pada tanggal tersebut
+    try:
+        return loader.get_broker_summary(ticker, date=date_str, raise_on_rate_limit=True)
+    except RateLimitError:
+        # Quota habis: hentikan run (progress tersimpan di checkpoint), jangan pakai data palsu
+        raise
+    except Exception:
+        # Jika gagal/limit, pakai dummy netral agar tidak crash
+        return {'acc_ratio': 1.0, 'top_buyer': 'Unknown'}
+
+def _simulate_loop(ticker: str, df: pd.DataFrame, loader: GoAPILoader, brain: StrategyEngine,
+                   risk: RiskGatekeeper, ihsg_data: pd.DataFrame, initial_capital: float,
+                   checkpoint: Optional[BacktestCheckpoint] = None) -> List[Dict]:
+    """
+    Reference simulation: re-slices the history and recomputes indicators every day.
+    checkpoint: resume from / periodically save to this BacktestCheckpoint.
+    """
+    book = PositionBook(initial_capital, atr_multiplier=risk.atr_multiplier)
     trade_log = []
-    
-    start_index = 150
-    
-    # Estimasi waktu agar user tidak panik
-    total_loops = len(df) - start_index
-    print(f"⏳ Processing ~{total_loops} trading days (Historical Broker Check)... This may take time.")
+    resume_from = START_INDEX
+
+    state = checkpoint.resume() if checkpoint is not None else None
+    if state:
+        book, trade_log, resume_from = state['book'], state['trade_log'], state['next_index']
+        df['portfolio_value'] = state['portfolio_value']
+        print(f"♻️  Resuming {ticker} from checkpoint at bar {resume_from}/{len(df)}")
 
-    for i in range(start_index, len(df)):
+    for i in range(resume_from, len(df)):
         # Progress Indicator (titik setiap 10 hari)
         if i % 10 == 0: print(".", end="", flush=True)
 
         current_slice = df.iloc[:i+1].copy()
-        
+
         # --- FIX VARIABLE NAME DI SINI ---
         current_date = current_slice.iloc[-1]['date']
         current_price = current_slice.iloc[-1]['close']
-        
+        current_high = current_slice.iloc[-1]['high']
+
         # Konversi tanggal ke string YYYY-MM-DD untuk API
         date_str = current_date.strftime("%Y-%m-%d")
-        
-        # --- HISTORICAL BROKER CHECK ---
-        # Mengambil data bandar pada tanggal tersebut
-        try:
-            broker_data = loader.get_broker_summary(ticker, date=date_str)
-        except Exception:
-            # Jika gagal/limit, pakai dummy netral agar tidak crash
-            broker_data = {'acc_ratio': 1.0, 'top_buyer': 'Unknown'}
-
-        # Calculate Indicators
-        current_slice = brain.prepare_indicators(current_slice) 
-        
+
+        broker_data = _fetch_broker_data(loader, ticker, date_str)
+
+        # Indicators are computed lazily: only what the checks below actually reach
+        current_slice = brain.indicator_frame(current_slice)
+
         # --- LOGIC CABANG ---
-        
+
         # CABANG 1: BUY SIGNAL
-        if shares_held == 0:
+        if ticker not in book:
             s1, _, _ = brain.analyze_stage2_breakout(current_slice, broker_data)
             s2, _, _ = brain.analyze_stage1_accumulation(current_slice, broker_data)
             signal = s1 or s2
-            
+
             if signal:
-                atr = calculate_atr(current_slice).iloc[-1]
-                
-                # Mock IHSG untuk backtest cepat (atau bisa fetch real historical jika mau)
-                # Disini kita pakai Mock agar tidak double API call per loop
-                ihsg_mock = loader.get_composite_index() 
-                
+                atr = current_slice.latest('ATR')
+
+                # IHSG diambil sekali per run; regime dibaca point-in-time per tanggal
                 approved, reason, lots, sl = risk.validate_entry(
-                    ticker, current_price, cash, cash, ihsg_mock, 
-                    broker_data['acc_ratio'], broker_data['top_buyer'], atr
+                    ticker, current_price, book.cash, book.cash, ihsg_data,
+                    broker_data['acc_ratio'], broker_data['top_buyer'], atr,
+                    as_of=current_date
                 )
-                
+
                 if approved and lots > 0:
                     shares_bought = lots * 100
-                    cost = shares_bought * current_price
-                    if cost <= cash:
-                        cash -= cost
-                        shares_held += shares_bought
+                    if shares_bought * current_price <= book.cash:
+                        book.open(ticker, current_date, current_price, shares_bought, sl, high=current_high)
                         trade_log.append({
-                            'date': current_date, 'action': 'BUY', 'price': current_price, 'shares': shares_bought
+                            'date': current_date, 'action': 'BUY', 'price': current_price, 'shares': shares_bought,
+                            'stop': sl, 'acc_ratio': broker_data['acc_ratio']
                         })
                         print(f"\n[{current_date.date()}] 🟢 BUY  @ {current_price:,.0f} | {reason}")
 
-        # CABANG 2: SELL SIGNAL (Chandelier Exit)
-        elif shares_held > 0:
-            atr = calculate_atr(current_slice).iloc[-1]
-            highest_high = current_slice['high'].tail(20).max()
-            stop_price = highest_high - (atr * 3.0) 
-            
+        # CABANG 2: SELL SIGNAL (Trailing Chandelier Exit) / PYRAMIDING
+        else:
+            atr = current_slice.latest('ATR')
+            bar = current_slice.df.iloc[-1]
+            stop_price = book.update(ticker, current_date, bar['high'], bar['low'], current_price, atr=atr)
+
             if current_price < stop_price:
-                revenue = shares_held * current_price
-                cash += revenue
-                
-                last_buy = [t for t in trade_log if t['action'] == 'BUY'][-1]
-                pnl = (current_price - last_buy['price']) / last_buy['price'] * 100
-                
-                color_code = "🟢" if pnl > 0 else "🔴"
-                print(f"\n[{current_date.date()}] {color_code} SELL @ {current_price:,.0f} | Stop: {stop_price:,.0f} | PnL: {pnl:.2f}%")
-                
+                trade = book.close(ticker, current_date, current_price)
+                color_code = "🟢" if trade['pnl'] > 0 else "🔴"
+                print(f"\n[{current_date.date()}] {color_code} SELL @ {current_price:,.0f} | Stop: {stop_price:,.0f} | PnL: {trade['pnl']:.2f}%")
                 trade_log.append({
-                    'date': current_date, 'action': 'SELL', 'price': current_price, 'shares': shares_held
+                    'date': current_date, 'action': 'SELL', 'price': current_price, 'shares': trade['shares'], 'pnl': trade['pnl']
                 })
-                shares_held = 0
-        
+
+            elif book.pyramid_ready(ticker, current_price):
+                approved, reason, lots = risk.validate_pyramid(
+                    book.get(ticker), current_price, book.cash, broker_data['acc_ratio'], broker_data['top_buyer']
+                )
+                if approved:
+                    book.add(ticker, current_date, current_price, lots * 100)
+                    trade_log.append({
+                        'date': current_date, 'action': 'ADD', 'price': current_price, 'shares': lots * 100
+                    })
+                    print(f"\n[{current_date.date()}] 🔵 ADD  @ {current_price:,.0f} | {reason}")
+
         # Track Value
-        market_value = shares_held * current_price
-        df.at[i, 'portfolio_value'] = cash + market_value
+        df.at[i, 'portfolio_value'] = book.cash + book.shares(ticker) * current_price
+        if checkpoint is not None:
+            checkpoint.tick(i + 1, book, trade_log, df['portfolio_value'].to_numpy())
+
+    return trade_log
+
+def walk_positions(ticker: str, signals, broker_lookup: Callable[[str], Dict], ihsg_data: pd.DataFrame,
+                   brain: StrategyEngine, risk: RiskGatekeeper, initial_capital: float,
+                   start: int = START_INDEX, end: Optional[int] = None, verbose: bool = True,
+                   checkpoint: Optional[BacktestCheckpoint] = None) -> Tuple[List[Dict], np.ndarray]:
+    """
+    Position state machine over precomputed arrays (a frame from `precompute_signals`
+    or any mapping with the same columns). Bars [start, end) are simulated.
+    broker_lookup(date_str) is only called on days a technical signal fires while flat,
+    or a held position is eligible for a pyramid add.
+    The market regime is read point-in-time from ihsg_data (computed once by RiskGatekeeper).
+    Open positions and their trailing stops live in a PositionBook.
+    checkpoint: resume from / periodically save to this BacktestCheckpoint.
+    Returns (trade_log, portfolio_value array covering every bar).
+    """
+    dates = list(signals['date'])
+    closes = np.asarray(signals['close'])
+    highs = np.asarray(signals['high'])
+    lows = np.asarray(signals['low'])
+    atrs = np.asarray(signals['ATR'])
+    stage2_tech = np.asarray(signals['Stage2_Tech'])
+    stage1_tech = np.asarray(signals['Stage1_Tech'])
+    end = len(closes) if end is None else end
+    portfolio_value = np.full(len(closes), float(initial_capital))
+
+    book = PositionBook(initial_capital, atr_multiplier=risk.atr_multiplier)
+    trade_log = []
+    resume_from = start
+
+    state = checkpoint.resume() if checkpoint is not None else None
+    if state:
+        book, trade_log, resume_from = state['book'], state['trade_log'], state['next_index']
+        portfolio_value = state['portfolio_value'].copy()
+        if verbose:
+            print(f"♻️  Resuming {ticker} from checkpoint at bar {resume_from}/{end}")
+
+    for i in range(resume_from, end):
+        if verbose and i % 10 == 0: print(".", end="", flush=True)
+
+        current_date = dates[i]
+        current_price = closes[i]
+
+        # CABANG 1: BUY SIGNAL
+        if ticker not in book:
+            if stage2_tech[i] or stage1_tech[i]:
+                broker_data = broker_lookup(current_date.strftime("%Y-%m-%d"))
+                signal = (
+                    (stage2_tech[i] and brain.stage2_bandar_check(broker_data))
+                    or (stage1_tech[i] and brain.stage1_bandar_check(broker_data))
+                )
+
+                if signal:
+                    approved, reason, lots, sl = risk.validate_entry(
+                        ticker, current_price, book.cash, book.cash, ihsg_data,
+                        broker_data['acc_ratio'], broker_data['top_buyer'], atrs[i],
+                        as_of=current_date
+                    )
+
+                    if approved and lots > 0:
+                        shares_bought = lots * 100
+                        if shares_bought * current_price <= book.cash:
+                            book.open(ticker, current_date, current_price, shares_bought, sl, high=highs[i])
+                            trade_log.append({
+                                'date': current_date, 'action': 'BUY', 'price': current_price, 'shares': shares_bought,
+                                'stop': sl, 'acc_ratio': broker_data['acc_ratio']
+                            })
+                            if verbose:
+                                print(f"\n[{current_date.date()}] 🟢 BUY  @ {current_price:,.0f} | {reason}")
+
+        # CABANG 2: SELL SIGNAL (Trailing Chandelier Exit) / PYRAMIDING
+        else:
+            stop_price = book.update(ticker, current_date, highs[i], lows[i], current_price, atr=atrs[i])
+
+            if current_price < stop_price:
+                trade = book.close(ticker, current_date, current_price)
+                if verbose:
+                    color_code = "🟢" if trade['pnl'] > 0 else "🔴"
+                    print(f"\n[{current_date.date()}] {color_code} SELL @ {current_price:,.0f} | Stop: {stop_price:,.0f} | PnL: {trade['pnl']:.2f}%")
+                trade_log.append({
+                    'date': current_date, 'action': 'SELL', 'price': current_price, 'shares': trade['shares'], 'pnl': trade['pnl']
+                })
+
+            elif book.pyramid_ready(ticker, current_price):
+                broker_data = broker_lookup(current_date.strftime("%Y-%m-%d"))
+                approved, reason, lots = risk.validate_pyramid(
+                    book.get(ticker), current_price, book.cash, broker_data['acc_ratio'], broker_data['top_buyer']
+                )
+                if approved:
+                    book.add(ticker, current_date, current_price, lots * 100)
+                    trade_log.append({
+                        'date': current_date, 'action': 'ADD', 'price': current_price, 'shares': lots * 100
+                    })
+                    if verbose:
+                        print(f"\n[{current_date.date()}] 🔵 ADD  @ {current_price:,.0f} | {reason}")
+
+        portfolio_value[i] = book.cash + book.shares(ticker) * current_price
+        if checkpoint is not None:
+            checkpoint.tick(i + 1, book, trade_log, portfolio_value)
+
+    if end < len(closes):
+        portfolio_value[end:] = portfolio_value[end - 1] if end > start else initial_capital
+
+    return trade_log, portfolio_value
+
+def _simulate_vectorized(ticker: str, df: pd.DataFrame, loader: GoAPILoader, brain: StrategyEngine,
+                         risk: RiskGatekeeper, ihsg_data: pd.DataFrame, initial_capital: float,
+                         checkpoint: Optional[BacktestCheckpoint] = None) -> List[Dict]:
+    """
+    Single-pass simulation over precomputed indicator arrays.
+    Broker data is only fetched on days where a technical signal fires while flat,
+    which are the only days the reference loop actually uses it.
+    """
+    df = precompute_signals(df, brain)
+    trade_log, portfolio_value = walk_positions(
+        ticker, df,
+        broker_lookup=lambda date_str: _fetch_broker_data(loader, ticker, date_str),
+        ihsg_data=ihsg_data,
+        brain=brain, risk=risk, initial_capital=initial_capital, checkpoint=checkpoint
+    )
+    df['portfolio_value'] = portfolio_value
+    return trade_log
+
+SIMULATORS = {
+    'vectorized': _simulate_vectorized,
+    'loop': _simulate_loop,
+}
+
+def run_backtest(ticker: str, initial_capital: float = 100_000_000, mode: str = "vectorized",
+                 loader: Optional[GoAPILoader] = None, days: int = 500, save_run: bool = config.RUN_STORE_ENABLED,
+                 resume: bool = config.CHECKPOINT_ENABLED):
+    """
+    Runs a single-ticker backtest.
+    mode: "vectorized" (default) or "loop" (reference implementation).
+    loader: any GoAPILoader (e.g. synthetic.SyntheticLoader for offline runs); defaults to GoAPI.
+    save_run: persist the run to the RunStore (config.RUN_STORE_PATH); its ID is returned as 'run_id'.
+    resume: checkpoint the simulation (checkpoint.py) and continue an interrupted run on the same
+    data; a RateLimitError stops the run instead of simulating on neutral broker data.
+    Returns a result dict with the trade log and equity curve, or None if data is insufficient.
+    """
+    if mode not in SIMULATORS:
+        raise ValueError(f"Unknown backtest mode '{mode}'. Use one of: {', '.join(SIMULATORS)}")
+
+    print(f"\n🚀 STARTING BACKTEST: {ticker} ({mode})...")
+
+    # 1. Setup
+    loader = loader or GoAPILoader(config.API_KEY)
+    brain = StrategyEngine()
+    risk = RiskGatekeeper(initial_capital)
+
+    # 2. Get Data (Full History)
+    checkpoint = None
+    window_end = pd.Timestamp.now().strftime("%Y-%m-%d")
+    if resume:
+        checkpoint = BacktestCheckpoint(f"{ticker}-{mode}", run_parameters(
+            brain.params, risk.atr_multiplier,
+            ticker=ticker, mode=mode, initial_capital=initial_capital, days=days,
+        ))
+        # An interrupted run reloads the window it started on, so it resumes on later days too
+        window_end = checkpoint.window_end(window_end)
+    df = loader.get_ohlcv(ticker, days=days, raise_on_rate_limit=True, end=window_end)
+
+    if df.empty or len(df) < START_INDEX:
+        print(f"⚠️  Not enough data for {ticker}. Skipping.")
+        return
+
+    # 3. Simulation Loop
+    df['portfolio_value'] = float(initial_capital)
+
+    # Estimasi waktu agar user tidak panik
+    total_loops = len(df) - START_INDEX
+    print(f"⏳ Processing ~{total_loops} trading days (Historical Broker Check)... This may take time.")
+
+    ihsg_data = composite_index_for(loader, df)
+    if checkpoint is not None:
+        checkpoint.bind(window_end, df[['open', 'high', 'low', 'close']].to_numpy(dtype=float))
+    try:
+        with metrics.stage(f'backtest.simulate_{mode}'):
+            trade_log = SIMULATORS[mode](ticker, df, loader, brain, risk, ihsg_data, initial_capital, checkpoint=checkpoint)
+    except BaseException:
+        # Rate limit, crash or Ctrl-C: save the last completed bar so a rerun resumes from it
+        if checkpoint is not None:
+            checkpoint.flush()
+        raise
+    if checkpoint is not None:
+        checkpoint.clear()
 
     # Summary Result
     final_value = df.iloc[-1]['portfolio_value']
@@ -127,17 +343,63 @@ def run_backtest(ticker: str, initial_capital: float = 100_000_000):
     print(f"Initial: {initial_capital:,.0f}")
     print(f"Final  : {final_value:,.0f}")
     print(f"Profit : {profit:,.0f} ({(profit/initial_capital)*100:.2f}%)")
-    print(f"Total Trades: {len([t for t in trade_log if t['action']=='BUY'])}")
+    print(f"Total Trades: {len([t for t in trade_log if t['action']=='BUY'])} (+{len([t for t in trade_log if t['action']=='ADD'])} pyramid adds)")
     print(f"{'='*30}\n")
+    metrics.report(loader=loader)
+
+    result = {
+        'ticker': ticker,
+        'mode': mode,
+        'initial_capital': initial_capital,
+        'final_value': final_value,
+        'trade_log': trade_log,
+        'equity': df[['date', 'portfolio_value']],
+        'ihsg_data': ihsg_data,
+    }
+    if save_run:
+        result['run_id'] = RunStore().save(result, run_parameters(brain.params, risk.atr_multiplier, days=days))
+        print(f"💾 Run saved: {result['run_id']}")
+    return result
+
+def check_parity(ticker: str, initial_capital: float = 100_000_000,
+                 loader: Optional[GoAPILoader] = None, days: int = 500) -> bool:
+    """
+    Runs the reference loop and the vectorized simulation on the same data
+    and reports whether trades and equity curves match exactly.
+    Both runs share the same IHSG frame.
+    loader: as in run_backtest (e.g. synthetic.SyntheticLoader to check parity offline).
+    """
+    loader = loader or GoAPILoader(config.API_KEY)
+    brain = StrategyEngine()
+    df = loader.get_ohlcv(ticker, days=days, raise_on_rate_limit=True)
+
+    if df.empty or len(df) < START_INDEX:
+        print(f"⚠️  Not enough data for {ticker}. Skipping.")
+        return False
+
+    ihsg_data = composite_index_for(loader, df)
+    results = {}
+    for mode, simulate in SIMULATORS.items():
+        run_df = df.copy()
+        run_df['portfolio_value'] = float(initial_capital)
+        trade_log = simulate(ticker, run_df, loader, brain, RiskGatekeeper(initial_capital), ihsg_data, initial_capital)
+        results[mode] = (trade_log, run_df['portfolio_value'].tolist())
+
+    match = results['vectorized'] == results['loop']
+    print(f"\nParity {ticker}: {'OK' if match else 'MISMATCH'}")
+    return match
 
 if __name__ == "__main__":
     print(f"🔥 STARTING PORTFOLIO BACKTEST ({len(config.WATCHLIST)} Tickers)")
     print("Note: This process uses Real Historical Broker Data and will take time.")
-    
+
     for ticker in config.WATCHLIST:
         try:
             run_backtest(ticker)
+        except RateLimitError as e:
+            print(f"\n⛔ {e}. Progress is checkpointed; rerun to resume.")
+            break
         except Exception as e:
             print(f"\nSkipping {ticker} error: {e}")
-            
-    print("\n>>> ALL BACKTESTS COMPLETE <<<")
\ No newline at end of file
+
+    print("\n>>> ALL BACKTESTS COMPLETE <<<")
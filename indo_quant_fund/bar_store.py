@@ -0,0 +1,148 @@
+"""
+Compact Bar Store for IndoQuantFund.
+Universe history as plain .npy arrays on one shared date index:
+
+    <path>/dates.npy              datetime64[D]  (n_dates,)
+    <path>/{open,high,low,close}.npy   int32     (n_tickers, n_dates)  prices in IDR, 0 = no bar
+    <path>/volume.npy             int64          (n_tickers, n_dates)
+    <path>/meta.json              ticker order + shape
+
+IDX prices are tick integers, so int32 holds them exactly at a quarter of a float64
+DataFrame's footprint. The store therefore only holds raw equity bars on the IDX tick
+grid: adjusted prices or index levels (e.g. the COMPOSITE) are rejected, not rounded.
+A missing value (NaN) is stored as 0 and read back as NaN. Arrays are opened with mmap_mode='r': every process reading the
+same store shares one copy of the pages through the OS cache (zero-copy), and a
+ticker's row is contiguous so per-ticker reads touch only its own pages.
+"""
+
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+from . import config
+from .utils import round_to_tick_array
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close')
+FIELDS = PRICE_FIELDS + ('volume',)
+MISSING = 0
+
+class BarStore:
+    def __init__(self, path: str, mmap_mode: Optional[str] = 'r'):
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+
+        self.path = path
+        self.tickers: List[str] = meta['tickers']
+        self._index = {t: i for i, t in enumerate(self.tickers)}
+        self.dates = np.load(os.path.join(path, 'dates.npy'), mmap_mode=mmap_mode)
+        self.arrays = {f: np.load(os.path.join(path, f'{f}.npy'), mmap_mode=mmap_mode) for f in FIELDS}
+
+    @staticmethod
+    def write(path: str, data: Dict[str, pd.DataFrame]) -> 'BarStore':
+        """
+        Builds a store from per-ticker OHLCV frames (GoAPILoader.get_ohlcv shape).
+        Raises ValueError if any price is off the IDX tick grid. The store is written
+        to a temporary directory and swapped in, so readers never see a partial store.
+        """
+        data = {t: df for t, df in data.items() if not df.empty}
+        for ticker, df in data.items():
+            prices = df[list(PRICE_FIELDS)].to_numpy(dtype=float)
+            prices = prices[~np.isnan(prices)]
+            off_grid = (prices <= 0) | (prices != round_to_tick_array(prices))
+            if off_grid.any():
+                raise ValueError(
+                    f"{ticker}: {int(off_grid.sum())} prices off the IDX tick grid (e.g. {prices[off_grid][0]:g}); "
+                    "BarStore holds raw tick-grid equity bars only"
+                )
+        tickers = list(data)
+        dates = np.unique(np.concatenate([
+            pd.to_datetime(df['date']).to_numpy(dtype='datetime64[D]') for df in data.values()
+        ])) if data else np.array([], dtype='datetime64[D]')
+
+        tmp_path = f"{path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        np.save(os.path.join(tmp_path, 'dates.npy'), dates)
+
+        positions = {
+            t: np.searchsorted(dates, pd.to_datetime(df['date']).to_numpy(dtype='datetime64[D]'))
+            for t, df in data.items()
+        }
+        for field in FIELDS:
+            dtype = np.int64 if field == 'volume' else np.int32
+            array = np.lib.format.open_memmap(
+                os.path.join(tmp_path, f'{field}.npy'), mode='w+', dtype=dtype, shape=(len(tickers), len(dates))
+            )
+            array[:] = MISSING
+            for i, ticker in enumerate(tickers):
+                values = data[ticker][field].to_numpy(dtype=float)
+                present = ~np.isnan(values)
+                array[i, positions[ticker][present]] = np.rint(values[present]).astype(dtype)
+            array.flush()
+            del array
+
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump({'tickers': tickers, 'n_dates': len(dates), 'fields': list(FIELDS)}, f)
+
+        # Readers that still map the old files keep them alive until they close
+        old_path = f"{path}.old"
+        if os.path.exists(path):
+            shutil.rmtree(old_path, ignore_errors=True)
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        _open_stores.pop(os.path.abspath(path), None)
+        return BarStore(path)
+
+    @staticmethod
+    def from_loader(path: str, loader, tickers: List[str], days: int = 365 * 10) -> 'BarStore':
+        return BarStore.write(path, loader.get_ohlcv_many(tickers, days=days))
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._index
+
+    @property
+    def nbytes(self) -> int:
+        return self.dates.nbytes + sum(a.nbytes for a in self.arrays.values())
+
+    def row(self, field: str, ticker: str) -> np.ndarray:
+        """
+        Zero-copy view of one ticker's full row on the shared date index (0 = no bar).
+        """
+        return self.arrays[field][self._index[ticker]]
+
+    def frame(self, ticker: str, start=None, end=None, dtype=np.float64) -> pd.DataFrame:
+        """
+        One ticker's bars as the usual OHLCV DataFrame (only dates with a bar),
+        optionally limited to [start, end]. Only this slice is materialized.
+        Missing open/high/low values come back as NaN for float dtypes.
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start), 'D')))
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end), 'D'), side='right'))
+
+        i = self._index[ticker]
+        has_bar = self.arrays['close'][i, lo:hi] != MISSING
+        frame = {'date': pd.DatetimeIndex(self.dates[lo:hi][has_bar]).as_unit('ns')}
+        for field in FIELDS:
+            values = self.arrays[field][i, lo:hi][has_bar].astype(dtype)
+            if field in PRICE_FIELDS and np.issubdtype(dtype, np.floating):
+                values[values == MISSING] = np.nan
+            frame[field] = values
+        return pd.DataFrame(frame)
+
+    def frames(self, tickers: Optional[List[str]] = None, **kwargs) -> Dict[str, pd.DataFrame]:
+        return {t: self.frame(t, **kwargs) for t in (tickers or self.tickers) if t in self}
+
+_open_stores: Dict[str, BarStore] = {}
+
+def open_store(path: str = config.BAR_STORE_PATH) -> BarStore:
+    """
+    Per-process memoized BarStore (workers open the mapping once, not once per task).
+    """
+    path = os.path.abspath(path)
+    if path not in _open_stores:
+        _open_stores[path] = BarStore(path)
+    return _open_stores[path]
@@ -0,0 +1,285 @@
+"""
+Benchmark Suite for IndoQuantFund.
+Times the scan and backtest hot paths on seeded synthetic data (synthetic.py), so runs are
+reproducible and comparable across versions. Results are written as JSON:
+wall time per case (min / median over `repeat` runs) plus peak Python heap (tracemalloc,
+measured in a separate run so tracing does not skew the timings).
+
+Usage:
+    iqf bench --output bench.json
+    iqf bench --quick --compare bench.json      # exit code 1 on regression
+    (or python -m indo_quant_fund.benchmarks ... without installing the package)
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .audit import TradeAudit
+from .backtest import run_backtest
+from .brain import StrategyEngine
+from .monte_carlo import run_monte_carlo
+from .risk_guard import RiskGatekeeper
+from .screener import PricePanel
+from .synthetic import SyntheticLoader, business_days, synthetic_broker_payload, synthetic_ihsg, synthetic_ohlcv
+from .utils import calculate_atr
+
+BAR_SIZES = [500, 2_500, 10_000]
+SCAN_SIZES = [10, 100, 900]
+VALIDATE_CALLS = 10_000
+MONTE_CARLO_PATHS = [10_000, 100_000]
+MONTE_CARLO_TRADES = 200
+
+class BenchmarkCase:
+    """
+    One measured callable. `setup` runs outside the timer and returns the argument for `run`
+    (a fresh input per call, e.g. a frame the case mutates).
+    """
+    def __init__(self, name: str, params: Dict, run: Callable, setup: Optional[Callable] = None):
+        self.name = name
+        self.params = params
+        self.run = run
+        self.setup = setup or (lambda: None)
+
+    @property
+    def key(self) -> str:
+        return self.name + ''.join(f"[{k}={v}]" for k, v in self.params.items())
+
+def _indicator_cases(sizes: List[int], seed: int) -> Iterator[BenchmarkCase]:
+    brain = StrategyEngine()
+    for bars in sizes:
+        df = synthetic_ohlcv('BENCH', business_days(bars), seed)
+
+        def run(frame):
+            brain.prepare_indicators(frame)
+            calculate_atr(frame)
+
+        yield BenchmarkCase('indicators.prepare_indicators', {'bars': bars}, run, setup=df.copy)
+
+def _validate_entry_cases(seed: int) -> Iterator[BenchmarkCase]:
+    ihsg = synthetic_ihsg(business_days(2_500), seed)
+    rng = np.random.default_rng(seed)
+    as_of = list(ihsg['date'].iloc[rng.integers(0, len(ihsg), VALIDATE_CALLS)])
+    prices = rng.uniform(100, 10_000, VALIDATE_CALLS)
+
+    def run(risk):
+        for date, price in zip(as_of, prices):
+            risk.validate_entry('BENCH', price, 1e9, 1e9, ihsg, 2.0, 'AK', price * 0.03, as_of=date)
+
+    yield BenchmarkCase('risk.validate_entry', {'calls': VALIDATE_CALLS}, run,
+                        setup=lambda: RiskGatekeeper(config.INITIAL_CAPITAL))
+
+    # The same candidates sized in one batch (one regime lookup, shared cash)
+    tickers = [f"T{i:05d}" for i in range(VALIDATE_CALLS)]
+    ratios = rng.uniform(0.5, 4.0, VALIDATE_CALLS)
+    buyers = rng.choice(config.SMART_MONEY + config.RETAIL_CROWD, VALIDATE_CALLS)
+
+    def run_batch(risk):
+        risk.validate_entries(tickers, prices, prices * 0.03, ratios, buyers, 1e9, 1e9, ihsg, as_of=as_of[-1])
+
+    yield BenchmarkCase('risk.validate_entries', {'candidates': VALIDATE_CALLS}, run_batch,
+                        setup=lambda: RiskGatekeeper(config.INITIAL_CAPITAL))
+
+def _backtest_cases(sizes: List[int], seed: int) -> Iterator[BenchmarkCase]:
+    for bars in sizes:
+        loader = SyntheticLoader(bars=bars, seed=seed)
+        yield BenchmarkCase('backtest.run_backtest', {'bars': bars, 'mode': 'vectorized'},
+                            lambda _, loader=loader: run_backtest('BENCH', loader=loader, save_run=False, resume=False))
+    # The reference loop is O(n^2); only the smallest size is practical
+    loader = SyntheticLoader(bars=sizes[0], seed=seed)
+    yield BenchmarkCase('backtest.run_backtest', {'bars': sizes[0], 'mode': 'loop'},
+                        lambda _: run_backtest('BENCH', mode='loop', loader=loader, save_run=False, resume=False))
+
+def _scan_cases(sizes: List[int], seed: int, workdir: str) -> Iterator[BenchmarkCase]:
+    from .main import run_system
+
+    for n in sizes:
+        watchlist = [f"T{i:04d}" for i in range(n)]
+        log_file = os.path.join(workdir, f"scan_{n}.jsonl")
+        position_file = os.path.join(workdir, f"positions_{n}.json")
+
+        def run(auditor, watchlist=watchlist, position_file=position_file):
+            run_system(loader=SyntheticLoader(seed=seed), watchlist=watchlist, auditor=auditor, position_file=position_file)
+
+        def setup(log_file=log_file, position_file=position_file):
+            # Every repeat starts flat instead of inheriting the previous run's positions
+            if os.path.exists(position_file):
+                os.remove(position_file)
+            return TradeAudit(log_file=log_file, legacy_file=None)
+
+        yield BenchmarkCase('scan.run_system', {'tickers': n}, run, setup=setup)
+
+def _screen_cases(sizes: List[int], seed: int) -> Iterator[BenchmarkCase]:
+    brain = StrategyEngine()
+    loader = SyntheticLoader(seed=seed)
+    dates = business_days(BAR_SIZES[0])
+    for n in sizes:
+        data = {f"T{i:04d}": synthetic_ohlcv(f"T{i:04d}", dates, seed) for i in range(n)}
+        broker_data = {t: loader._summarize_broker_payload(t, synthetic_broker_payload(t, seed=seed)) for t in data}
+
+        def run(_, data=data, broker_data=broker_data):
+            panel = PricePanel.from_frames(data)
+            brain.apply_bandar_checks(brain.screen_panel(panel.close, panel.high, panel.low), broker_data)
+
+        yield BenchmarkCase('screener.screen_panel', {'tickers': n, 'bars': BAR_SIZES[0]}, run)
+
+def _monte_carlo_cases(sizes: List[int], seed: int) -> Iterator[BenchmarkCase]:
+    rng = np.random.default_rng(seed)
+    trades = pd.DataFrame({
+        'r_multiple': rng.normal(0.1, 1.2, MONTE_CARLO_TRADES).clip(-1.5, None),
+        'risk_pct': rng.choice([config.BASE_RISK_PER_TRADE, config.AGGRESSIVE_RISK], MONTE_CARLO_TRADES),
+        'regime_multiplier': rng.choice(list(config.REGIME_MULTIPLIERS.values()), MONTE_CARLO_TRADES),
+    })
+    for n_paths in sizes:
+        yield BenchmarkCase('monte_carlo.run_monte_carlo', {'paths': n_paths, 'trades': MONTE_CARLO_TRADES},
+                            lambda _, n_paths=n_paths: run_monte_carlo(trades, n_paths=n_paths, seed=seed, max_workers=1))
+
+def build_cases(quick: bool = False, seed: int = 42, workdir: Optional[str] = None) -> List[BenchmarkCase]:
+    """
+    The default suite; `quick` keeps only the smallest size of each group.
+    """
+    bar_sizes = BAR_SIZES[:1] if quick else BAR_SIZES
+    scan_sizes = SCAN_SIZES[:1] if quick else SCAN_SIZES
+    workdir = workdir or tempfile.mkdtemp(prefix='iqf_bench_')
+    return [
+        *_indicator_cases(bar_sizes, seed),
+        *_validate_entry_cases(seed),
+        *_backtest_cases(bar_sizes, seed),
+        *_screen_cases(scan_sizes, seed),
+        *_scan_cases(scan_sizes, seed, workdir),
+        *_monte_carlo_cases(MONTE_CARLO_PATHS[:1] if quick else MONTE_CARLO_PATHS, seed),
+    ]
+
+def _call(case: BenchmarkCase) -> float:
+    arg = case.setup()
+    # The scan and backtest report to stdout; keep it out of the measurement output
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        case.run(arg)
+        elapsed = time.perf_counter() - started
+    if isinstance(arg, TradeAudit):
+        arg.close()
+    return elapsed
+
+def measure(case: BenchmarkCase, repeat: int = 3) -> Dict:
+    timings = [_call(case) for _ in range(repeat)]
+
+    tracemalloc.start()
+    try:
+        _call(case)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'name': case.name,
+        'params': case.params,
+        'key': case.key,
+        'repeat': repeat,
+        'min_s': min(timings),
+        'median_s': statistics.median(timings),
+        'mean_s': statistics.fmean(timings),
+        'peak_mem_bytes': peak,
+    }
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(cases: List[BenchmarkCase], repeat: int = 3, seed: int = 42) -> Dict:
+    results = []
+    for case in cases:
+        result = measure(case, repeat)
+        print(f"  {result['key']:<60} {result['median_s'] * 1000:>10.1f} ms  {result['peak_mem_bytes'] / 2**20:>8.1f} MiB")
+        results.append(result)
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'seed': seed,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+def compare(current: Dict, baseline: Dict, tolerance: float = 0.20) -> List[Dict]:
+    """
+    Cases whose median time or peak memory grew by more than `tolerance` versus the baseline.
+    """
+    previous = {r['key']: r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        before = previous.get(result['key'])
+        if before is None:
+            continue
+        for metric in ('median_s', 'peak_mem_bytes'):
+            if before[metric] > 0 and result[metric] > before[metric] * (1 + tolerance):
+                regressions.append({
+                    'key': result['key'], 'metric': metric,
+                    'baseline': before[metric], 'current': result[metric],
+                    'ratio': result[metric] / before[metric],
+                })
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="IndoQuantFund benchmark suite")
+    parser.add_argument('--quick', action='store_true', help="smallest size of each group only")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', help="run cases whose name contains this string")
+    parser.add_argument('--output', help="write JSON results to this file (default: stdout)")
+    parser.add_argument('--compare', help="baseline JSON to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.20)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='iqf_bench_') as workdir:
+        cases = build_cases(args.quick, args.seed, workdir)
+        if args.only:
+            cases = [c for c in cases if args.only in c.name]
+
+        print(f"⏱️  Running {len(cases)} benchmark cases (repeat={args.repeat})", file=sys.stderr)
+        with contextlib.redirect_stdout(sys.stderr):
+            report = run_suite(cases, args.repeat, args.seed)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for r in regressions:
+            print(f"⚠️  REGRESSION {r['key']} {r['metric']}: {r['baseline']:.4g} -> {r['current']:.4g} ({r['ratio']:.2f}x)", file=sys.stderr)
+        return 1 if regressions else 0
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,94 +2,388 @@
 """
 The Alpha Engine (Brain)
 Contains the core strategy logic combining Technicals + Bandarmology.
+Thresholds come from config.STRATEGY_PARAMS and can be overridden per engine
+(used by the parameter sweep in optimizer.py).
 """
 
+import numpy as np
 import pandas as pd
-from typing import Tuple, Dict, Any
-from utils import calculate_ema, calculate_bollinger_bands, calculate_atr
-import config
+from typing import Tuple, Dict, Any, Optional, Callable, NamedTuple
+from .utils import (
+    calculate_ema, calculate_bollinger_bands, calculate_atr, ema, bollinger_bands, wilder_atr,
+    StreamingEMA, StreamingATR, StreamingBollinger, RollingMin
+)
+from . import config
+from .brokers import broker_registry
+from .instrumentation import metrics
+
+class IndicatorState:
+    """
+    Incremental counterpart of StrategyEngine.prepare_indicators (plus ATR, used by
+    the Chandelier exit) for one ticker.
+    update(bar) is O(1); snapshot() returns the latest row under the batch column names.
+    Serializable with to_dict()/from_dict() so daily or intraday runs can resume.
+    """
+    def __init__(self, params: Optional[Dict[str, Any]] = None):
+        self.params = {**config.STRATEGY_PARAMS, **(params or {})}
+        self.ema_fast = StreamingEMA(self.params['ema_fast'])
+        self.ema_slow = StreamingEMA(self.params['ema_slow'])
+        self.bollinger = StreamingBollinger(period=20, std_dev=2.0)
+        self.low_52w = RollingMin(window=252, min_periods=50)
+        self.atr = StreamingATR(period=14)
+        self.bars = 0
+        self.last_bar: Dict[str, Any] = {}
+
+    @classmethod
+    def from_history(cls, df: pd.DataFrame, params: Optional[Dict[str, Any]] = None) -> 'IndicatorState':
+        state = cls(params)
+        for bar in df[['date', 'high', 'low', 'close']].itertuples(index=False):
+            state.update({'date': bar.date, 'high': bar.high, 'low': bar.low, 'close': bar.close})
+        return state
+
+    def update(self, bar: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Consumes one completed bar (date, high, low, close) and returns the new snapshot.
+        """
+        self.ema_fast.update(bar['close'])
+        self.ema_slow.update(bar['close'])
+        self.bollinger.update(bar['close'])
+        self.low_52w.update(bar['low'])
+        self.atr.update(bar['high'], bar['low'], bar['close'])
+        self.bars += 1
+        date = bar.get('date')
+        self.last_bar = {
+            'date': date.isoformat() if hasattr(date, 'isoformat') else date,
+            'high': float(bar['high']), 'low': float(bar['low']), 'close': float(bar['close'])
+        }
+        return self.snapshot()
+
+    def preview(self, bar: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        The snapshot update(bar) would return, without consuming the bar.
+        Used for a still-forming (intraday) bar that will change before it completes.
+        """
+        upper, lower, bandwidth = self.bollinger.peek(bar['close'])
+        return {
+            'date': bar.get('date'),
+            'high': float(bar['high']), 'low': float(bar['low']), 'close': float(bar['close']),
+            f"EMA_{self.params['ema_fast']}": self.ema_fast.peek(bar['close']),
+            f"EMA_{self.params['ema_slow']}": self.ema_slow.peek(bar['close']),
+            'BB_Upper': upper,
+            'BB_Lower': lower,
+            'BB_Width': bandwidth,
+            '52_Week_Low': self.low_52w.peek(bar['low']),
+            'ATR': self.atr.peek(bar['high'], bar['low'], bar['close']),
+            'bars': self.bars + 1,
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        upper, lower, bandwidth = self.bollinger.value
+        return {
+            **self.last_bar,
+            f"EMA_{self.params['ema_fast']}": self.ema_fast.value,
+            f"EMA_{self.params['ema_slow']}": self.ema_slow.value,
+            'BB_Upper': upper,
+            'BB_Lower': lower,
+            'BB_Width': bandwidth,
+            '52_Week_Low': self.low_52w.value,
+            'ATR': self.atr.value,
+            'bars': self.bars,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'params': self.params,
+            'ema_fast': self.ema_fast.to_dict(),
+            'ema_slow': self.ema_slow.to_dict(),
+            'bollinger': self.bollinger.to_dict(),
+            'low_52w': self.low_52w.to_dict(),
+            'atr': self.atr.to_dict(),
+            'bars': self.bars,
+            'last_bar': self.last_bar,
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'IndicatorState':
+        obj = cls(state['params'])
+        obj.ema_fast = StreamingEMA.from_dict(state['ema_fast'])
+        obj.ema_slow = StreamingEMA.from_dict(state['ema_slow'])
+        obj.bollinger = StreamingBollinger.from_dict(state['bollinger'])
+        obj.low_52w = RollingMin.from_dict(state['low_52w'])
+        obj.atr = StreamingATR.from_dict(state['atr'])
+        obj.bars = state['bars']
+        obj.last_bar = state['last_bar']
+        return obj
+
+class IndicatorSpec(NamedTuple):
+    requires: Tuple[str, ...]                                 # indicators computed first
+    compute: Callable[[pd.DataFrame], Dict[str, pd.Series]]   # frame -> new columns
+
+class IndicatorFrame:
+    """
+    Lazy view over one ticker's OHLCV frame. An indicator is computed on first access
+    (after the indicators it requires) and memoized as a column of the underlying frame,
+    so a check that fails early never pays for the rolling math behind later checks.
+    Columns the frame already holds (e.g. from prepare_indicators) are reused unless fresh=True.
+    """
+    def __init__(self, df: pd.DataFrame, specs: Dict[str, IndicatorSpec], fresh: bool = False):
+        self.df = df
+        self.specs = specs
+        self.computed = set() if fresh else {name for name in specs if name in df.columns}
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def __getitem__(self, name: str) -> pd.Series:
+        if name in self.specs and name not in self.computed:
+            self.require(name)
+        return self.df[name]
+
+    def require(self, *names: str) -> 'IndicatorFrame':
+        """
+        Computes (once) every listed indicator and its dependencies.
+        """
+        for name in names:
+            if name in self.computed:
+                continue
+            spec = self.specs[name]
+            self.require(*spec.requires)
+            for column, values in spec.compute(self.df).items():
+                self.df[column] = values
+                self.computed.add(column)
+        return self
+
+    def latest(self, name: str) -> Any:
+        return self[name].iloc[-1]
 
 class StrategyEngine:
-    def __init__(self):
-        pass
+    def __init__(self, params: Optional[Dict[str, Any]] = None):
+        self.params = {**config.STRATEGY_PARAMS, **(params or {})}
+        self.ema_fast_col = f"EMA_{self.params['ema_fast']}"
+        self.ema_slow_col = f"EMA_{self.params['ema_slow']}"
+        self.brokers = broker_registry()
+
+        # Indicators each strategy's technical leg reads (declared dependencies for IndicatorFrame)
+        self.stage2_indicators = (self.ema_fast_col, self.ema_slow_col)
+        self.stage1_indicators = ('BB_Width', '52_Week_Low')
+        self.indicator_specs = self._build_indicator_specs()
 
+    def _build_indicator_specs(self) -> Dict[str, IndicatorSpec]:
+        bollinger = IndicatorSpec((), lambda df: dict(zip(
+            ('BB_Upper', 'BB_Lower', 'BB_Width'), calculate_bollinger_bands(df, period=20, std_dev=2.0)
+        )))
+        return {
+            self.ema_fast_col: IndicatorSpec((), lambda df: {self.ema_fast_col: calculate_ema(df, self.params['ema_fast'])}),
+            self.ema_slow_col: IndicatorSpec((), lambda df: {self.ema_slow_col: calculate_ema(df, self.params['ema_slow'])}),
+            'BB_Upper': bollinger,
+            'BB_Lower': bollinger,
+            'BB_Width': bollinger,
+            # Calculate 52 Week Low (approx 252 trading days)
+            '52_Week_Low': IndicatorSpec((), lambda df: {'52_Week_Low': df['low'].rolling(window=252, min_periods=50).min()}),
+            'ATR': IndicatorSpec((), lambda df: {'ATR': calculate_atr(df)}),
+            'Stage2_Tech': IndicatorSpec(self.stage2_indicators, lambda df: {'Stage2_Tech': self.stage2_technical_signal(df)}),
+            'Stage1_Tech': IndicatorSpec(self.stage1_indicators, lambda df: {'Stage1_Tech': self.stage1_technical_signal(df)}),
+        }
+
+    def indicator_frame(self, df, fresh: bool = False) -> IndicatorFrame:
+        """
+        Lazy indicator view over `df` (returned as-is if it already is one).
+        """
+        if isinstance(df, IndicatorFrame):
+            return df
+        return IndicatorFrame(df, self.indicator_specs, fresh=fresh)
+
+    def new_indicator_state(self) -> IndicatorState:
+        """
+        Empty incremental indicator state using this engine's parameters.
+        """
+        return IndicatorState(self.params)
+
+    @metrics.timed('brain.prepare_indicators')
     def prepare_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         """
-        Calculates necessary indicators for the strategies.
+        Calculates necessary indicators for the strategies (eagerly, all of them).
+        The live scan uses indicator_frame instead and only pays for what its checks reach.
+        """
+        frame = self.indicator_frame(df, fresh=True)
+        frame.require(*self.stage2_indicators, 'BB_Upper', 'BB_Lower', *self.stage1_indicators)
+        return frame.df
+
+    def stage2_technical_signal(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Vectorized technical leg of Stage 2 Breakout over a prepared frame.
+        Row i is True when the uptrend structure holds on bar i and at least
+        ema_slow bars are available up to it.
+        """
+        is_uptrend = (df['close'] > df[self.ema_fast_col]) & (df[self.ema_fast_col] > df[self.ema_slow_col])
+        has_history = pd.Series(range(1, len(df) + 1), index=df.index) >= self.params['ema_slow']
+        return is_uptrend & has_history
+
+    def stage1_technical_signal(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Vectorized technical leg of Silent Accumulation over a prepared frame.
+        Row i is True when price is squeezed near its 52 week low on bar i and
+        at least 252 bars are available up to it.
+        """
+        is_squeeze = df['BB_Width'] < self.params['bb_squeeze']
+        near_low = df['close'] < (self.params['near_low_mult'] * df['52_Week_Low'])
+        has_history = pd.Series(range(1, len(df) + 1), index=df.index) >= 252
+        return is_squeeze & near_low & has_history
+
+    def panel_indicators(self, close: pd.DataFrame, high: pd.DataFrame, low: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """
+        prepare_indicators (plus ATR) for a whole universe in one column-wise pass.
+        Inputs are right-aligned (bar x ticker) frames: row -1 is each ticker's latest bar and
+        shorter histories are NaN-padded at the top, so every column equals the per-ticker result.
+        """
+        _, _, bandwidth = bollinger_bands(close, period=20, std_dev=2.0)
+
+        return {
+            self.ema_fast_col: ema(close, self.params['ema_fast']),
+            self.ema_slow_col: ema(close, self.params['ema_slow']),
+            'BB_Width': bandwidth,
+            '52_Week_Low': low.rolling(window=252, min_periods=50).min(),
+            'ATR': wilder_atr(high, low, close, period=14),
+        }
+
+    def screen_panel(self, close: pd.DataFrame, high: pd.DataFrame, low: pd.DataFrame) -> pd.DataFrame:
+        """
+        Technical legs of both strategies on every ticker's latest bar (see panel_indicators).
+        Returns one row per ticker; the Bandarmology legs are applied by apply_bandar_checks.
+        """
+        indicators = self.panel_indicators(close, high, low)
+        latest = {name: frame.iloc[-1] for name, frame in indicators.items()}
+        last_close = close.iloc[-1]
+        bars = close.notna().sum()
+
+        is_uptrend = (last_close > latest[self.ema_fast_col]) & (latest[self.ema_fast_col] > latest[self.ema_slow_col])
+        is_squeeze = latest['BB_Width'] < self.params['bb_squeeze']
+        near_low = last_close < (self.params['near_low_mult'] * latest['52_Week_Low'])
+
+        return pd.DataFrame({
+            'close': last_close,
+            'bars': bars,
+            **latest,
+            'Stage2_Tech': is_uptrend & (bars >= self.params['ema_slow']),
+            'Stage1_Tech': is_squeeze & near_low & (bars >= 252),
+        })
+
+    def apply_bandar_checks(self, screen: pd.DataFrame, broker_data: Dict[str, Dict]) -> pd.DataFrame:
+        """
+        Vectorized stage2/stage1_bandar_check over a screen_panel result.
+        broker_data maps ticker -> summary; tickers without one count as neutral.
+        Adds acc_ratio, top_buyer, Stage2, Stage1 and triggered_strategy (Stage 2 first, as in the scan).
+        """
+        screen = screen.copy()
+        screen['acc_ratio'] = [broker_data.get(t, {}).get('acc_ratio', 0) for t in screen.index]
+        screen['top_buyer'] = [broker_data.get(t, {}).get('top_buyer', 'Unknown') for t in screen.index]
+
+        screen['Stage2'] = screen['Stage2_Tech'] & (screen['acc_ratio'] > self.params['stage2_acc_ratio']) \
+            & ~screen['top_buyer'].isin(self.brokers.retail_crowd)
+        screen['Stage1'] = screen['Stage1_Tech'] & (screen['acc_ratio'] > self.params['stage1_acc_ratio']) \
+            & screen['top_buyer'].isin(self.brokers.smart_money)
+        screen['triggered_strategy'] = np.where(
+            screen['Stage2'], "Stage 2 Breakout", np.where(screen['Stage1'], "Silent Accumulation", None)
+        )
+        return screen
+
+    def evaluate_snapshot(self, snapshot: Dict[str, Any], broker_data: Dict) -> Optional[str]:
+        """
+        Both strategies on one IndicatorState snapshot (latest bar only, no DataFrame).
+        Returns the triggered strategy name (Stage 2 first, as in the scan) or None.
         """
-        df['EMA_50'] = calculate_ema(df, 50)
-        df['EMA_150'] = calculate_ema(df, 150)
-        
-        upper, lower, bandwidth = calculate_bollinger_bands(df, period=20, std_dev=2.0)
-        df['BB_Upper'] = upper
-        df['BB_Lower'] = lower
-        df['BB_Width'] = bandwidth
-        
-        # Calculate 52 Week Low (approx 252 trading days)
-        df['52_Week_Low'] = df['low'].rolling(window=252, min_periods=50).min()
-        
-        return df
+        close, bars = snapshot['close'], snapshot['bars']
+        fast, slow = snapshot[self.ema_fast_col], snapshot[self.ema_slow_col]
 
-    def analyze_stage2_breakout(self, df: pd.DataFrame, broker_data: Dict) -> Tuple[bool, float, str]:
+        if bars >= self.params['ema_slow'] and close > fast > slow and self.stage2_bandar_check(broker_data):
+            return "Stage 2 Breakout"
+        if (bars >= 252 and snapshot['BB_Width'] < self.params['bb_squeeze']
+                and close < self.params['near_low_mult'] * snapshot['52_Week_Low']
+                and self.stage1_bandar_check(broker_data)):
+            return "Silent Accumulation"
+        return None
+
+    def stage2_bandar_check(self, broker_data: Dict) -> bool:
+        """
+        Bandarmology leg of Stage 2 Breakout: Acc_Ratio > 1.5 AND Top Buyer NOT in RETAIL_CROWD.
+        """
+        acc_ratio = broker_data.get('acc_ratio', 0)
+        top_buyer = broker_data.get('top_buyer', 'Unknown')
+        return acc_ratio > self.params['stage2_acc_ratio'] and top_buyer not in self.brokers.retail_crowd
+
+    def stage1_bandar_check(self, broker_data: Dict) -> bool:
+        """
+        Bandarmology leg of Silent Accumulation: Acc_Ratio > 2.0 AND Top Buyer IS inside SMART_MONEY.
+        """
+        acc_ratio = broker_data.get('acc_ratio', 0)
+        top_buyer = broker_data.get('top_buyer', 'Unknown')
+        return acc_ratio > self.params['stage1_acc_ratio'] and top_buyer in self.brokers.smart_money
+
+    @metrics.timed('brain.analyze_stage2_breakout')
+    def analyze_stage2_breakout(self, df, broker_data: Dict) -> Tuple[bool, float, str]:
         """
         Strategy 1: Stage 2 Breakout (Momentum + Bandar)
-        
-        Logic:
+
+        Logic (default params):
         1. Technical: Close > EMA(50) AND EMA(50) > EMA(150) (Uptrend Structure)
         2. Bandarmology: Acc_Ratio > 1.5 AND Top Buyer NOT in RETAIL_CROWD
-        
+
+        Checks run cheapest first (history length, then Bandarmology); the EMAs are only
+        computed when both pass. `df` may be a DataFrame or an IndicatorFrame.
+
         Returns:
             (Signal_Bool, Ratio_Value, Top_Buyer)
         """
-        if len(df) < 150:
+        if len(df) < self.params['ema_slow']:
             return False, 0.0, "N/A"
-            
-        current = df.iloc[-1]
-        
-        # 1. Technical Checks
-        is_uptrend = (current['close'] > current['EMA_50']) and (current['EMA_50'] > current['EMA_150'])
-        
-        # 2. Bandarmology Checks
+
+        # 1. Bandarmology Checks
         acc_ratio = broker_data.get('acc_ratio', 0)
         top_buyer = broker_data.get('top_buyer', 'Unknown')
-        
-        is_accumulation = acc_ratio > 1.5
-        is_smart_money = top_buyer not in config.RETAIL_CROWD
-        
-        signal = is_uptrend and is_accumulation and is_smart_money
-        
-        return signal, acc_ratio, top_buyer
 
-    def analyze_stage1_accumulation(self, df: pd.DataFrame, broker_data: Dict) -> Tuple[bool, float, str]:
+        if not self.stage2_bandar_check(broker_data):
+            return False, acc_ratio, top_buyer
+
+        # 2. Technical Checks
+        frame = self.indicator_frame(df)
+        close, fast, slow = frame.latest('close'), frame.latest(self.ema_fast_col), frame.latest(self.ema_slow_col)
+        is_uptrend = (close > fast) and (fast > slow)
+
+        return bool(is_uptrend), acc_ratio, top_buyer
+
+    @metrics.timed('brain.analyze_stage1_accumulation')
+    def analyze_stage1_accumulation(self, df, broker_data: Dict) -> Tuple[bool, float, str]:
         """
         Strategy 2: Silent Accumulation (Bottom Fishing)
-        
-        Logic:
+
+        Logic (default params):
         1. Technical: BB Width < 0.15 (Squeeze) AND Price < 1.15 * 52_Week_Low
         2. Bandarmology: Acc_Ratio > 2.0 AND Top Buyer IS inside SMART_MONEY
-        
+
+        Checks run cheapest first; the 52 week low is only computed once the squeeze holds.
+
         Returns:
             (Signal_Bool, Ratio_Value, Top_Buyer)
         """
         if len(df) < 252:
             return False, 0.0, "N/A"
-            
-        current = df.iloc[-1]
-        
-        # 1. Technical Checks
-        # Volatility Squeeze
-        is_squeeze = current['BB_Width'] < 0.15
-        
-        # Near Bottom (within 15% of 52 week low)
-        near_low = current['close'] < (1.15 * current['52_Week_Low'])
-        
-        # 2. Bandarmology Checks
+
+        # 1. Bandarmology Checks
         acc_ratio = broker_data.get('acc_ratio', 0)
         top_buyer = broker_data.get('top_buyer', 'Unknown')
-        
-        strong_accumulation = acc_ratio > 2.0
-        smart_money_buyer = top_buyer in config.SMART_MONEY
-        
-        signal = is_squeeze and near_low and strong_accumulation and smart_money_buyer
-        
-        return signal, acc_ratio, top_buyer
+
+        if not self.stage1_bandar_check(broker_data):
+            return False, acc_ratio, top_buyer
+
+        # 2. Technical Checks
+        frame = self.indicator_frame(df)
+        close = frame.latest('close')
+
+        # Volatility Squeeze
+        if not frame.latest('BB_Width') < self.params['bb_squeeze']:
+            return False, acc_ratio, top_buyer
+
+        # Near Bottom (within 15% of 52 week low by default)
+        near_low = close < (self.params['near_low_mult'] * frame.latest('52_Week_Low'))
+
+        return bool(near_low), acc_ratio, top_buyer
@@ -0,0 +1,148 @@
+"""
+Broker Registry for IndoQuantFund.
+Broker codes interned to small integer ids (int16) with per-id lookup arrays, so per-broker
+analytics classify and group with array indexing / np.bincount instead of string compares.
+
+- Classification: SMART (config.SMART_MONEY), RETAIL (config.RETAIL_CROWD) or OTHER.
+- Origin: foreign (config.FOREIGN_BROKERS) or local.
+- An optional metadata CSV (config.BROKER_METADATA_FILE; columns broker_code, category,
+  origin and optionally name) adds brokers or overrides the config defaults.
+- Scalar checks (brain, risk_guard) use the frozensets `smart_money` / `retail_crowd`.
+- Codes first seen at runtime (e.g. in a broker summary) are interned as OTHER / local.
+"""
+
+import os
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional
+
+from . import config
+
+CATEGORIES = ('other', 'smart', 'retail')
+OTHER, SMART, RETAIL = 0, 1, 2
+ORIGINS = ('local', 'foreign')
+
+def default_broker_metadata() -> pd.DataFrame:
+    """
+    Metadata table built from the config lists (no names).
+    """
+    codes = list(dict.fromkeys(config.SMART_MONEY + config.RETAIL_CROWD + config.FOREIGN_BROKERS))
+    return pd.DataFrame({
+        'broker_code': codes,
+        'category': ['smart' if c in config.SMART_MONEY else 'retail' if c in config.RETAIL_CROWD else 'other' for c in codes],
+        'origin': ['foreign' if c in config.FOREIGN_BROKERS else 'local' for c in codes],
+        'name': '',
+    })
+
+def load_broker_metadata(path: Optional[str] = config.BROKER_METADATA_FILE) -> pd.DataFrame:
+    """
+    Config defaults, overridden/extended by the CSV at `path` when it exists.
+    """
+    metadata = default_broker_metadata()
+    if not path or not os.path.exists(path):
+        return metadata
+
+    extra = pd.read_csv(path, dtype=str, keep_default_na=False)
+    missing = {'broker_code', 'category'} - set(extra.columns)
+    if missing:
+        raise ValueError(f"{path}: missing column(s) {sorted(missing)}")
+    extra['broker_code'] = extra['broker_code'].str.strip().str.upper()
+    extra['category'] = extra['category'].str.strip().str.lower()
+    extra['origin'] = extra.get('origin', pd.Series('local', index=extra.index)).str.strip().str.lower().replace('', 'local')
+    extra['name'] = extra.get('name', pd.Series('', index=extra.index))
+
+    bad = sorted(set(extra['category']) - set(CATEGORIES)) + sorted(set(extra['origin']) - set(ORIGINS))
+    if bad:
+        raise ValueError(f"{path}: unknown category/origin value(s) {bad}")
+
+    metadata = pd.concat([metadata, extra[['broker_code', 'category', 'origin', 'name']]], ignore_index=True)
+    return metadata.drop_duplicates('broker_code', keep='last').reset_index(drop=True)
+
+class BrokerRegistry:
+    def __init__(self, metadata: pd.DataFrame):
+        self.codes: List[str] = []
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._category = np.zeros(0, dtype=np.int8)
+        self._foreign = np.zeros(0, dtype=bool)
+        self._lock = threading.Lock()
+
+        category_ids = {name: i for i, name in enumerate(CATEGORIES)}
+        for row in metadata.itertuples(index=False):
+            self._add(row.broker_code, category_ids[row.category], row.origin == 'foreign', getattr(row, 'name', '') or '')
+
+        # Scalar paths: O(1) set membership instead of scanning the config lists
+        self.smart_money = frozenset(c for c, k in zip(self.codes, self._category) if k == SMART)
+        self.retail_crowd = frozenset(c for c, k in zip(self.codes, self._category) if k == RETAIL)
+
+    def _add(self, code: str, category: int, foreign: bool, name: str = '') -> int:
+        broker_id = len(self.codes)
+        self.codes.append(code)
+        self.names.append(name)
+        self._ids[code] = broker_id
+        self._category = np.append(self._category, np.int8(category))
+        self._foreign = np.append(self._foreign, foreign)
+        return broker_id
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._ids
+
+    @property
+    def category(self) -> np.ndarray:
+        """
+        Lookup array: category id (OTHER / SMART / RETAIL) per broker id.
+        """
+        return self._category
+
+    @property
+    def foreign(self) -> np.ndarray:
+        return self._foreign
+
+    def intern(self, code: str) -> int:
+        """
+        The code's id, registering unknown codes as OTHER / local.
+        """
+        broker_id = self._ids.get(code)
+        if broker_id is None:
+            with self._lock:
+                broker_id = self._ids.get(code)
+                if broker_id is None:
+                    broker_id = self._add(code, OTHER, False)
+        return broker_id
+
+    def encode(self, codes: Iterable[str]) -> np.ndarray:
+        """
+        Broker codes -> int16 ids. Each distinct code is looked up once.
+        """
+        uniques, inverse = np.unique(np.asarray(list(codes), dtype=str), return_inverse=True)
+        ids = np.array([self.intern(str(c)) for c in uniques], dtype=np.int16)
+        return ids[inverse]
+
+    def decode(self, ids: np.ndarray) -> np.ndarray:
+        return np.asarray(self.codes, dtype=object)[ids]
+
+    def classify(self, ids: np.ndarray) -> np.ndarray:
+        return self._category[ids]
+
+    def metadata(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            'broker_code': self.codes,
+            'category': [CATEGORIES[k] for k in self._category],
+            'origin': [ORIGINS[int(f)] for f in self._foreign],
+            'name': self.names,
+        })
+
+_registry: Optional[BrokerRegistry] = None
+
+def broker_registry() -> BrokerRegistry:
+    """
+    Process-wide registry loaded from config + BROKER_METADATA_FILE on first use.
+    """
+    global _registry
+    if _registry is None:
+        _registry = BrokerRegistry(load_broker_metadata())
+    return _registry
@@ -0,0 +1,256 @@
+"""
+Local Market Data Cache for IndoQuantFund.
+SQLite store of OHLCV bars and broker summaries keyed by (ticker, date).
+
+Rules:
+- OHLCV: each ticker keeps a covered date range. Only the missing head/tail of a
+  requested window is fetched; the last covered day is re-fetched once its
+  refresh is older than the TTL (today's bar may still be forming).
+- Broker summary for a past date never changes and is cached permanently, including the
+  empty payload of a date without one (holiday), so it is not requested again.
+- "Latest" (or today's) broker summary expires after CACHE_LATEST_TTL seconds.
+
+pandas is imported on first use, so maintenance (summary / evict_expired, e.g. the
+`cache` CLI command) opens the store without loading it.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from . import config
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+LATEST_KEY = 'Latest'
+
+def _today() -> str:
+    return datetime.now().strftime("%Y-%m-%d")
+
+def _shift_date(date_str: str, days: int) -> str:
+    return (datetime.strptime(date_str, "%Y-%m-%d") + timedelta(days=days)).strftime("%Y-%m-%d")
+
+class MarketDataCache:
+    def __init__(self, path: str = config.CACHE_PATH, latest_ttl: float = config.CACHE_LATEST_TTL):
+        self.path = path
+        self.latest_ttl = latest_ttl
+        self.stats = {'ohlcv_hits': 0, 'ohlcv_misses': 0, 'broker_hits': 0, 'broker_misses': 0}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS ohlcv (
+                ticker TEXT NOT NULL,
+                date TEXT NOT NULL,
+                open REAL, high REAL, low REAL, close REAL, volume REAL,
+                PRIMARY KEY (ticker, date)
+            );
+            CREATE TABLE IF NOT EXISTS ohlcv_coverage (
+                ticker TEXT PRIMARY KEY,
+                from_date TEXT NOT NULL,
+                to_date TEXT NOT NULL,
+                refreshed_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS broker_summary (
+                ticker TEXT NOT NULL,
+                date TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                expires_at REAL,
+                PRIMARY KEY (ticker, date)
+            );
+        """)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------
+    # OHLCV
+    # ------------------------------------------
+    def missing_ohlcv_ranges(self, ticker: str, from_date: str, to_date: str) -> List[Tuple[str, str]]:
+        """
+        Returns the (from, to) date ranges that must be fetched to serve [from_date, to_date].
+        An empty list means the whole window is served from disk.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT from_date, to_date, refreshed_at FROM ohlcv_coverage WHERE ticker = ?", (ticker,)
+            ).fetchone()
+
+        if row is None:
+            ranges = [(from_date, to_date)]
+        else:
+            covered_from, covered_to, refreshed_at = row
+            ranges = []
+            if from_date < covered_from:
+                ranges.append((from_date, _shift_date(covered_from, -1)))
+            if to_date > covered_to:
+                # Re-fetch the last covered day too, its bar may have been partial
+                ranges.append((covered_to, to_date))
+            elif covered_to >= _today() and time.time() - refreshed_at > self.latest_ttl:
+                ranges.append((covered_to, to_date))
+
+        with self._lock:
+            self.stats['ohlcv_misses' if ranges else 'ohlcv_hits'] += 1
+        return ranges
+
+    def store_ohlcv(self, ticker: str, df: 'pd.DataFrame', from_date: str, to_date: str):
+        """
+        Upserts fetched bars and extends the ticker's covered range to include [from_date, to_date].
+        """
+        import pandas as pd
+
+        rows = []
+        if not df.empty:
+            dates = pd.to_datetime(df['date']).dt.strftime("%Y-%m-%d")
+            values = df[OHLCV_COLUMNS].astype(float).itertuples(index=False, name=None)
+            rows = [(ticker, d, *v) for d, v in zip(dates, values)]
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO ohlcv (ticker, date, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            row = self._conn.execute(
+                "SELECT from_date, to_date FROM ohlcv_coverage WHERE ticker = ?", (ticker,)
+            ).fetchone()
+            if row is not None:
+                from_date = min(from_date, row[0])
+                to_date = max(to_date, row[1])
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ohlcv_coverage (ticker, from_date, to_date, refreshed_at) VALUES (?, ?, ?, ?)",
+                (ticker, from_date, to_date, time.time())
+            )
+            self._conn.commit()
+
+    def load_ohlcv(self, ticker: str, from_date: str, to_date: str) -> 'pd.DataFrame':
+        """
+        Reads cached bars for [from_date, to_date] in the same shape GoAPILoader.get_ohlcv returns.
+        """
+        import pandas as pd
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT date, open, high, low, close, volume FROM ohlcv "
+                "WHERE ticker = ? AND date >= ? AND date <= ? ORDER BY date",
+                (ticker, from_date, to_date)
+            ).fetchall()
+
+        if not rows:
+            return pd.DataFrame()
+
+        df = pd.DataFrame(rows, columns=['date'] + OHLCV_COLUMNS)
+        df['date'] = pd.to_datetime(df['date'])
+        return df
+
+    # ------------------------------------------
+    # BROKER SUMMARY
+    # ------------------------------------------
+    def load_broker_summary(self, ticker: str, date: Optional[str]) -> Tuple[bool, Optional[Dict]]:
+        """
+        Returns (found, payload). Expired "Latest" entries count as not found.
+        """
+        key = date or LATEST_KEY
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, expires_at FROM broker_summary WHERE ticker = ? AND date = ?", (ticker, key)
+            ).fetchone()
+
+        found = row is not None and (row[1] is None or row[1] >= time.time())
+        with self._lock:
+            self.stats['broker_hits' if found else 'broker_misses'] += 1
+
+        return (True, json.loads(row[0])) if found else (False, None)
+
+    def store_broker_summary(self, ticker: str, date: Optional[str], payload: Dict):
+        """
+        Stores a raw broker summary payload. Past dates are permanent, everything else gets the TTL.
+        """
+        key = date or LATEST_KEY
+        now = time.time()
+        expires_at = None if (date and date < _today()) else now + self.latest_ttl
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO broker_summary (ticker, date, payload, fetched_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (ticker, key, json.dumps(payload), now, expires_at)
+            )
+            self._conn.commit()
+
+    def load_broker_payloads(self, tickers: List[str], from_date: str, to_date: str) -> Dict[Tuple[str, str], Dict]:
+        """
+        Every unexpired cached payload for `tickers` between two dates (inclusive) in one
+        query per chunk of tickers. Returns {(ticker, date): payload}.
+        """
+        now = time.time()
+        payloads = {}
+        for i in range(0, len(tickers), 500):  # SQLite bound-parameter limit
+            chunk = tickers[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT ticker, date, payload FROM broker_summary WHERE ticker IN ({marks}) "
+                    "AND date BETWEEN ? AND ? AND (expires_at IS NULL OR expires_at >= ?)",
+                    (*chunk, from_date, to_date, now)
+                ).fetchall()
+            payloads.update({(ticker, date): json.loads(payload) for ticker, date, payload in rows})
+
+        with self._lock:
+            self.stats['broker_hits'] += len(payloads)
+        return payloads
+
+    # ------------------------------------------
+    # MAINTENANCE
+    # ------------------------------------------
+    def evict_expired(self) -> int:
+        """
+        Deletes expired "Latest" snapshots. Returns the number of rows removed.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM broker_summary WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Row counts, covered tickers / dates and file size of the store.
+        """
+        with self._lock:
+            ohlcv_rows, tickers, first, last = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT ticker), MIN(date), MAX(date) FROM ohlcv"
+            ).fetchone()
+            broker_rows, broker_tickers, expired = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT ticker), "
+                "COALESCE(SUM(expires_at IS NOT NULL AND expires_at < ?), 0) FROM broker_summary", (time.time(),)
+            ).fetchone()
+        return {
+            'path': self.path,
+            'size_bytes': os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            'ohlcv_rows': ohlcv_rows,
+            'ohlcv_tickers': tickers,
+            'ohlcv_from': first,
+            'ohlcv_to': last,
+            'broker_rows': broker_rows,
+            'broker_tickers': broker_tickers,
+            'broker_expired': expired,
+        }
+
+    def reset_stats(self):
+        for key in self.stats:
+            self.stats[key] = 0
+
+    def hit_rate(self) -> float:
+        hits = self.stats['ohlcv_hits'] + self.stats['broker_hits']
+        total = hits + self.stats['ohlcv_misses'] + self.stats['broker_misses']
+        return hits / total if total else 0.0
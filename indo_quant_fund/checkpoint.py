@@ -0,0 +1,160 @@
+"""
+Backtest Checkpoints for IndoQuantFund.
+Long simulations (the loop mode's daily broker checks, universe portfolio runs) save
+their state between bars so a run that stops midway (rate limit, crash, Ctrl-C) resumes
+from the last saved bar instead of bar 0:
+
+    next bar index | PositionBook.to_dict() | trade log | portfolio values | simulator extras
+
+- A checkpoint belongs to one run configuration: the file name and the stored key come from
+  the ticker(s), mode, capital, every setting in run_store.run_parameters (strategy, risk
+  and pyramid) and the requested history length, never from the data itself.
+- The state also records the end of the data window and a digest of the bars already
+  simulated. A resumed run reloads the same window (window_end), so it still resumes the
+  next day; bars that changed since the save (revised data) discard the checkpoint.
+- Saved at bar boundaries once CHECKPOINT_INTERVAL seconds have passed since the last
+  save, so fast runs never touch the disk, and on any exception that stops the run
+  (flush). Written to a temporary file and renamed.
+- Deleted when the run completes, together with checkpoints of the same label untouched
+  for CHECKPOINT_MAX_AGE days (runs that were never resumed).
+Indicators are not part of the state: the simulators derive them from the price history
+(precomputed arrays or per-day slices), so a resumed run rebuilds them exactly.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import pickle
+import time
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import config
+from .positions import PositionBook
+
+def data_digest(*arrays) -> str:
+    """
+    Short fingerprint of price arrays, so a checkpoint is never resumed on different data.
+    """
+    digest = hashlib.sha1()
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()[:16]
+
+class BacktestCheckpoint:
+    def __init__(self, label: str, key: Dict[str, Any], root: Optional[str] = None,
+                 interval: float = config.CHECKPOINT_INTERVAL):
+        """
+        root: checkpoint directory (default: config.CHECKPOINT_PATH).
+        """
+        root = root or config.CHECKPOINT_PATH
+        self.key = json.dumps(key, sort_keys=True, default=str)
+        self.label = label
+        self.path = os.path.join(root, f"{label}-{hashlib.sha1(self.key.encode()).hexdigest()[:12]}.ckpt")
+        self.root = root
+        self.interval = interval
+        self.saves = 0
+        self._last_save = time.monotonic()
+        self._window_end = None
+        self._prices: Tuple[np.ndarray, ...] = ()
+        self._last = None
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """
+        The saved state for this key, or None (no checkpoint, other inputs, unreadable file).
+        """
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'rb') as f:
+                saved = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            print(f"⚠️  Ignoring unreadable checkpoint {self.path}: {e}")
+            return None
+        return saved['state'] if saved.get('key') == self.key else None
+
+    def window_end(self, default: str) -> str:
+        """
+        End date (YYYY-MM-DD) of the data window to load: the saved run's, so a resumed run
+        sees the same bars, else `default`.
+        """
+        state = self.load()
+        return (state.get('window_end') or default) if state else default
+
+    def bind(self, window_end: Optional[str], *prices):
+        """
+        Ties the checkpoint to the loaded data. Saves record window_end and a digest of the
+        rows of `prices` (bar-major arrays) before next_index; resume() only accepts a state
+        whose digest and bar count match.
+        """
+        self._window_end = window_end
+        self._prices = tuple(np.asarray(p) for p in prices)
+
+    def _digest(self, next_index: int) -> Optional[str]:
+        return data_digest(*(p[:next_index] for p in self._prices)) if self._prices else None
+
+    def due(self) -> bool:
+        return time.monotonic() - self._last_save >= self.interval
+
+    def save(self, state: Dict[str, Any]):
+        os.makedirs(self.root, exist_ok=True)
+        state = {
+            **state, 'window_end': self._window_end, 'prices': self._digest(state['next_index']),
+            'bars': len(self._prices[0]) if self._prices else None,
+        }
+        tmp_file = f"{self.path}.tmp"
+        with open(tmp_file, 'wb') as f:
+            pickle.dump({'key': self.key, 'state': state}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, self.path)
+        self.saves += 1
+        self._last_save = time.monotonic()
+
+    def resume(self) -> Optional[Dict[str, Any]]:
+        """
+        load() with the book rebuilt as a PositionBook. A state saved on other data
+        (see bind) is deleted and None returned, so the run starts from bar 0.
+        """
+        state = self.load()
+        if state is None:
+            return None
+        bars = len(self._prices[0]) if self._prices else None
+        if (state.get('bars'), state.get('prices')) != (bars, self._digest(state['next_index'])):
+            print(f"⚠️  Discarding checkpoint {self.path}: the price data changed since it was saved")
+            os.remove(self.path)
+            return None
+        state['book'] = PositionBook.from_dict(state['book'])
+        return state
+
+    def tick(self, next_index: int, book: PositionBook, trade_log: List[Dict], portfolio_value: np.ndarray, **extra):
+        """
+        Called after each completed bar: keeps it as the point flush() saves, and saves
+        when the interval has passed. The book and extras are copied, since the next bar
+        changes them before it completes; trade log and values before next_index never change.
+        """
+        self._last = (next_index, book.to_dict(), len(trade_log), trade_log, portfolio_value,
+                      {name: np.copy(value) for name, value in extra.items()})
+        if self.due():
+            self.flush()
+
+    def flush(self):
+        """
+        Saves the last completed bar now. Called when a run stops on an exception (rate
+        limit, crash, Ctrl-C), so a rerun resumes exactly where it stopped.
+        """
+        if self._last is None:
+            return
+        next_index, book, trades, trade_log, portfolio_value, extra = self._last
+        self.save({
+            'next_index': next_index, 'book': book, 'trade_log': trade_log[:trades],
+            'portfolio_value': np.array(portfolio_value), **extra,
+        })
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        # Checkpoints of runs that were never resumed (e.g. other parameters)
+        cutoff = time.time() - config.CHECKPOINT_MAX_AGE * 86400
+        for path in glob.glob(os.path.join(self.root, f"{glob.escape(self.label)}-*.ckpt")):
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
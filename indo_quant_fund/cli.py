@@ -0,0 +1,142 @@
+"""
+Command Line Interface for IndoQuantFund.
+
+    iqf scan [TICKER ...]          daily scan (main.run_system); tickers replace config.WATCHLIST
+    iqf backtest [TICKER ...]      one backtest per ticker, or --portfolio for shared capital
+    iqf bench [ARGS ...]           benchmark suite (arguments go to benchmarks.py)
+    iqf cache {stats,evict}        local market data cache maintenance
+    iqf config [NAME ...]          effective settings as JSON
+
+Each command imports what it needs inside its handler, so pandas / numpy / requests /
+colorama load only for scan, backtest and bench; `cache` and `config` start in tens of
+milliseconds (check with `python -X importtime -m indo_quant_fund config`).
+Also runnable as `python -m indo_quant_fund`.
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import List, Optional
+
+from . import __version__, config
+
+def _loader(args):
+    """
+    SyntheticLoader for --synthetic SEED (offline runs), else None (the command's GoAPILoader).
+    """
+    if args.synthetic is None:
+        return None
+    from .synthetic import SyntheticLoader
+    return SyntheticLoader(seed=args.synthetic)
+
+def cmd_scan(args) -> int:
+    from .main import run_system
+
+    run_system(max_workers=args.workers, loader=_loader(args), watchlist=args.tickers or None, position_file=args.positions)
+    return 0
+
+def cmd_backtest(args) -> int:
+    from .data_engine import RateLimitError
+
+    try:
+        return _backtest(args)
+    except RateLimitError as e:
+        print(f"⛔ {e}. Progress is checkpointed; rerun the same command to resume.", file=sys.stderr)
+        return 2
+
+def _backtest(args) -> int:
+    loader = _loader(args)
+    kwargs = {'days': args.days, 'loader': loader, 'save_run': not args.no_save, 'resume': not args.fresh}
+    if args.capital is not None:
+        kwargs['initial_capital'] = args.capital
+
+    if args.portfolio:
+        from .portfolio_backtest import run_portfolio_backtest
+        return 0 if run_portfolio_backtest(args.tickers or None, store_path=args.store, **kwargs) else 1
+
+    from .backtest import run_backtest
+    results = [run_backtest(ticker, mode=args.mode, **kwargs) for ticker in args.tickers or config.WATCHLIST]
+    return 0 if any(results) else 1
+
+def cmd_bench(args, extra: List[str]) -> int:
+    from .benchmarks import main as bench_main
+
+    return bench_main(extra)
+
+def cmd_cache(args) -> int:
+    if not os.path.exists(args.path):
+        print(f"No cache at {args.path}")
+        return 1
+
+    from .cache import MarketDataCache
+
+    cache = MarketDataCache(args.path)
+    try:
+        if args.action == 'evict':
+            print(f"🧹 Evicted {cache.evict_expired()} expired broker snapshots from {args.path}")
+        else:
+            print(json.dumps(cache.summary(), indent=2))
+    finally:
+        cache.close()
+    return 0
+
+def cmd_config(args) -> int:
+    settings = {name: value for name, value in vars(config).items() if name.isupper()}
+    if settings.get('API_KEY'):
+        settings['API_KEY'] = '***'
+    unknown = [name for name in args.names if name not in settings]
+    if unknown:
+        print(f"Unknown setting(s): {', '.join(unknown)}", file=sys.stderr)
+        return 1
+    print(json.dumps({n: settings[n] for n in args.names} if args.names else settings, indent=2, default=str))
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='iqf', description="IndoQuantFund command line")
+    parser.add_argument('--version', action='version', version=f"%(prog)s {__version__}")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    scan = commands.add_parser('scan', help="daily watchlist scan")
+    scan.add_argument('tickers', nargs='*', help="tickers to scan (default: config.WATCHLIST)")
+    scan.add_argument('--workers', type=int, default=config.FETCH_CONCURRENCY)
+    scan.add_argument('--positions', default=config.POSITION_BOOK_FILE, help="position book file")
+    scan.add_argument('--synthetic', type=int, metavar='SEED', help="offline run on synthetic data")
+    scan.set_defaults(handler=cmd_scan)
+
+    backtest = commands.add_parser('backtest', help="single-ticker or portfolio backtests")
+    backtest.add_argument('tickers', nargs='*', help="tickers (default: config.WATCHLIST)")
+    backtest.add_argument('--portfolio', action='store_true', help="one shared-capital backtest over all tickers")
+    backtest.add_argument('--mode', default='vectorized', choices=['vectorized', 'loop'])
+    backtest.add_argument('--days', type=int, default=500)
+    backtest.add_argument('--capital', type=float, help="initial capital (IDR)")
+    backtest.add_argument('--store', help="BarStore path for --portfolio (bar_store.py)")
+    backtest.add_argument('--no-save', action='store_true', help="do not persist the run to the RunStore")
+    backtest.add_argument('--fresh', action='store_true', help="ignore and do not write checkpoints")
+    backtest.add_argument('--synthetic', type=int, metavar='SEED', help="offline run on synthetic data")
+    backtest.set_defaults(handler=cmd_backtest)
+
+    bench = commands.add_parser('bench', add_help=False, help="benchmark suite (see `iqf bench --help`)")
+    bench.set_defaults(handler=cmd_bench)
+
+    cache = commands.add_parser('cache', help="market data cache maintenance")
+    cache.add_argument('action', nargs='?', default='stats', choices=['stats', 'evict'])
+    cache.add_argument('--path', default=config.CACHE_PATH)
+    cache.set_defaults(handler=cmd_cache)
+
+    settings = commands.add_parser('config', help="print settings")
+    settings.add_argument('names', nargs='*', help="setting names (default: all)")
+    settings.set_defaults(handler=cmd_config)
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command == 'bench':
+        return args.handler(args, extra)
+    if extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
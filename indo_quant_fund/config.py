@@ -4,17 +4,107 @@ Configuration Constants for IndoQuantFund
 Includes Risk Settings, Capital, and Broker Classifications.
 """
 
+import os
+
 # ==========================================
 # SYSTEM SETTINGS
 # ==========================================
 API_KEY = "YOUR_GOAPI_KEY_HERE"
 INITIAL_CAPITAL = 200_000_000  # 200 Million IDR
 
+# ==========================================
+# DATA & CACHE SETTINGS
+# ==========================================
+GOAPI_BASE_URL = "https://api.goapi.id/v1"
+CACHE_ENABLED = True
+DATA_DIR = os.environ.get('IQF_DATA_DIR', os.path.join(os.path.expanduser('~'), '.indo_quant_fund'))  # Local market data
+CACHE_PATH = os.path.join(DATA_DIR, "market_cache.sqlite")  # Same file whatever the working directory
+CACHE_LATEST_TTL = 15 * 60   # Seconds a "Latest" broker summary or today's bar stays fresh
+BAR_STORE_PATH = "bar_store" # Memory-mapped int32 bar store (see bar_store.py)
+IHSG_SYMBOL = "COMPOSITE"    # IHSG on GoAPI's historical endpoint (served through the cache)
+IHSG_FILE = None             # CSV stand-in for IHSG history (date, close, ...); replaces the API when set
+IHSG_REGIME_EMA = 200        # Regime: Close >= EMA(200) -> BULLISH, else DEFENSIVE
+IHSG_REGIME_WARMUP = 3 * IHSG_REGIME_EMA  # IHSG trading days loaded before any window so the EMA has converged
+
+# ==========================================
+# FETCH SETTINGS
+# ==========================================
+FETCH_CONCURRENCY = 8        # Tickers fetched in parallel during a scan
+GOAPI_RATE_LIMIT = 10.0      # Max requests per second per host (GoAPI quota)
+GOAPI_RATE_BURST = 10        # Requests allowed back-to-back before throttling
+FETCH_MAX_RETRIES = 3        # Retries on connection errors, HTTP 429 and 5xx
+FETCH_BACKOFF_BASE = 0.5     # Seconds; doubles on every retry (plus jitter)
+HTTP_POOL_SIZE = 16          # Keep-alive connections kept open per host
+HTTP_CONNECT_TIMEOUT = 5.0   # Seconds to establish a connection
+HTTP_READ_TIMEOUT = 30.0     # Seconds to wait for a response
+
+# ==========================================
+# AUDIT LOG SETTINGS
+# ==========================================
+AUDIT_LOG_FILE = "trade_logs.jsonl"      # Append-only JSON Lines audit log
+AUDIT_LEGACY_FILE = "trade_logs.json"    # Old JSON array log, migrated once
+AUDIT_FLUSH_EVERY = 1                    # Entries buffered before each flush
+AUDIT_FSYNC = False                      # fsync on every flush (crash-proof, slower)
+AUDIT_MAX_BYTES = 50 * 1024 * 1024       # Rotate once the active file exceeds this (0 = off)
+AUDIT_ROTATE_DAILY = False               # Also rotate when the date changes
+
+# ==========================================
+# INSTRUMENTATION SETTINGS
+# ==========================================
+METRICS_ENABLED = False                  # Per-stage timers, HTTP histograms, cache ratios
+METRICS_EXPORT_FILE = "metrics.prom"     # Prometheus text file written at the end of a run
+
 # ==========================================
 # RISK MANAGEMENT SETTINGS
 # ==========================================
 BASE_RISK_PER_TRADE = 0.015  # 1.5% of Equity per trade
 AGGRESSIVE_RISK = 0.03       # 3.0% for High Conviction setups
+CHANDELIER_ATR_MULT = 3.0    # Stop distance in ATRs (initial stop and trailing exit)
+HIGH_CONVICTION_ACC_RATIO = 2.5  # Acc_Ratio above this sizes with AGGRESSIVE_RISK
+REGIME_MULTIPLIERS = {'BULLISH': 1.0, 'DEFENSIVE': 0.5}  # Risk scaling per IHSG regime
+
+# ==========================================
+# POSITION BOOK & PYRAMIDING
+# ==========================================
+POSITION_BOOK_FILE = "positions.json"    # Open positions + cash, kept between live scans
+PYRAMID_ENABLED = True
+PYRAMID_TRIGGER_GAIN = 0.10  # Add once price is 10% above the last entry
+PYRAMID_MIN_ACC_RATIO = 1.5  # ...and accumulation continues (Acc_Ratio above this)
+PYRAMID_ADD_FRACTION = 0.5   # Each add is half the initial lots
+PYRAMID_MAX_ADDS = 2         # Adds allowed per position
+
+# ==========================================
+# MONTE CARLO ROBUSTNESS
+# ==========================================
+MONTE_CARLO_PATHS = 100_000   # Simulated equity paths per run
+MONTE_CARLO_RUIN_LEVEL = 0.5  # "Ruin" = equity touching 50% of the starting capital
+MONTE_CARLO_SEED = 42
+
+# ==========================================
+# BACKTEST RUN STORE
+# ==========================================
+RUN_STORE_ENABLED = True  # Persist every backtest run (equity, trades, parameters) under its run ID
+RUN_STORE_PATH = "runs"   # One directory per run (see run_store.py)
+
+# ==========================================
+# BACKTEST CHECKPOINTS
+# ==========================================
+CHECKPOINT_ENABLED = True       # Interrupted backtests resume from their last checkpoint
+CHECKPOINT_PATH = "checkpoints"
+CHECKPOINT_INTERVAL = 30        # Seconds between saves (checked at bar boundaries)
+CHECKPOINT_MAX_AGE = 14         # Days before an abandoned checkpoint is deleted
+
+# ==========================================
+# STRATEGY SETTINGS
+# ==========================================
+STRATEGY_PARAMS = {
+    'ema_fast': 50,            # Stage 2 trend EMA
+    'ema_slow': 150,           # Stage 2 structure EMA (also min bars required)
+    'stage2_acc_ratio': 1.5,   # Min Acc_Ratio for Stage 2 Breakout
+    'stage1_acc_ratio': 2.0,   # Min Acc_Ratio for Silent Accumulation
+    'bb_squeeze': 0.15,        # Max Bollinger Band Width counted as a squeeze
+    'near_low_mult': 1.15,     # Max close as a multiple of the 52 week low
+}
 
 # ==========================================
 # BROKER CLASSIFICATIONS (BANDARMOLOGY)
@@ -33,6 +123,19 @@ RETAIL_CROWD = [
     'YP', 'PD', 'XC', 'NI', 'KK', 'XL', 'SQ'
 ]
 
+# Foreign Institutional Brokers (origin column of the broker metadata)
+FOREIGN_BROKERS = ['AK', 'BK', 'ZP', 'RX', 'KZ']
+
+# Optional CSV extending/overriding the lists above (broker_code,category,origin[,name]);
+# category is smart / retail / other, origin is foreign / local. See brokers.py.
+BROKER_METADATA_FILE = "broker_metadata.csv"
+
+# ==========================================
+# BROKER FLOW ANALYTICS
+# ==========================================
+BROKER_FLOW_WINDOW = 5               # Days summed for multi-day Bandarmology signals
+BROKER_FLOW_FILE = "broker_flow.npz" # Compact per-broker buy/sell table (broker_flow.BrokerFlow)
+
 # ==========================================
 # WATCHLIST
 # ==========================================
@@ -8,29 +8,179 @@ import requests # Make sure to import this at the top
 import pandas as pd
 import numpy as np
 import random
-from typing import Dict, Optional, Tuple
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
-import config
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from . import config
+from .broker_flow import BrokerFlow
+from .cache import MarketDataCache
+from .fetcher import ConcurrentFetcher, HostRateLimiter
+from .instrumentation import metrics
+from .risk_guard import regime_series
+
+class RateLimitError(Exception):
+    """Raised when GoAPI keeps answering HTTP 429 after all retries."""
+
+def load_index_file(path: str) -> pd.DataFrame:
+    """
+    IHSG history from a CSV file (columns: date, close and optionally open/high/low/volume),
+    sorted by date. Offline stand-in for the API in tests and research.
+    """
+    df = pd.read_csv(path)
+    missing = {'date', 'close'} - set(df.columns)
+    if missing:
+        raise ValueError(f"{path}: missing column(s) {sorted(missing)}")
+    df['date'] = pd.to_datetime(df['date'])
+    df['close'] = pd.to_numeric(df['close'])
+    return df.drop_duplicates('date', keep='last').sort_values('date').reset_index(drop=True)
 
 class GoAPILoader:
-    def __init__(self, api_key: str = config.API_KEY):
+    def __init__(
+        self,
+        api_key: str = config.API_KEY,
+        base_url: str = config.GOAPI_BASE_URL,
+        use_cache: bool = config.CACHE_ENABLED,
+        cache: Optional[MarketDataCache] = None,
+        rate_limiter: Optional[HostRateLimiter] = None,
+        max_retries: int = config.FETCH_MAX_RETRIES,
+        pool_size: int = config.HTTP_POOL_SIZE,
+        timeout: Tuple[float, float] = (config.HTTP_CONNECT_TIMEOUT, config.HTTP_READ_TIMEOUT),
+        index_file: Optional[str] = config.IHSG_FILE
+    ):
         self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        # Local on-disk store; only missing dates hit the API
+        if cache is None and use_cache:
+            cache = MarketDataCache(config.CACHE_PATH)
+        self.cache = cache
+        # Shared across threads so the GoAPI quota holds for concurrent scans
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        self.max_retries = max_retries
+        self.pool_size = pool_size
+        self.timeout = timeout
+        # Pooled keep-alive session: one TCP+TLS handshake per connection, not per request
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        # IHSG history with its regime series, loaded once and shared by every caller
+        self.index_file = index_file
+        self._index: Optional[pd.DataFrame] = None
+        self._index_days = 0
+        self._index_loaded_at = 0.0
+        self._regimes: Dict[int, pd.DataFrame] = {}
+        self._index_lock = threading.Lock()
+
+    def close(self):
+        self.session.close()
+
+    def _get_json(self, url: str, params: Dict) -> Dict:
+        """
+        GET with per-host rate limiting and exponential backoff (plus jitter)
+        on connection errors, HTTP 429 and 5xx. Raises once retries are exhausted.
+        """
+        host = urlparse(url).netloc
+        endpoint = url.rsplit('/', 1)[-1]
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire(host)
+            delay = config.FETCH_BACKOFF_BASE * (2 ** attempt) * (1 + random.random())
+            if attempt:
+                metrics.inc('http_retries_total', endpoint=endpoint)
+
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                metrics.inc('http_errors_total', endpoint=endpoint)
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(delay)
+                continue
+            if metrics.enabled:
+                metrics.record_http(endpoint, response.status_code, len(response.content), time.perf_counter() - started)
+
+            if response.status_code == 429 or response.status_code >= 500:
+                if attempt == self.max_retries:
+                    if response.status_code == 429:
+                        raise RateLimitError(f"GoAPI rate limit hit for {url}")
+                    response.raise_for_status()
+                retry_after = response.headers.get('Retry-After')
+                if retry_after and retry_after.isdigit():
+                    delay = float(retry_after)
+                time.sleep(delay)
+                continue
 
-    
-data_engine.py
- and update the 
-get_ohlcv
- method:
+            return response.json()
 
-    def get_ohlcv(self, ticker: str, days: int = 365) -> pd.DataFrame:
+    @metrics.timed('loader.get_ohlcv')
+    def get_ohlcv(self, ticker: str, days: int = 365, raise_on_rate_limit: bool = False,
+                  end: Optional[str] = None) -> pd.DataFrame:
         """
         Fetches Real Data from GoAPI.
+        With a cache attached, only the missing head/tail of the window is requested.
+        raise_on_rate_limit: see _unless_rate_limited.
+        end: last date of the window (YYYY-MM-DD), default today; the window is the `days`
+        calendar days before it.
         """
         # Calculate Date Range
-        to_date = datetime.now().strftime("%Y-%m-%d")
-        from_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
-        
-        url = f"https://api.goapi.id/v1/stock/idx/{ticker}/historical"
+        end_date = datetime.strptime(end, "%Y-%m-%d") if end else datetime.now()
+        to_date = end_date.strftime("%Y-%m-%d")
+        from_date = (end_date - timedelta(days=days)).strftime("%Y-%m-%d")
+
+        if self.cache is None:
+            df = self._unless_rate_limited(self._fetch_ohlcv, ticker, from_date, to_date, raise_on_rate_limit=raise_on_rate_limit)
+            return df if df is not None else pd.DataFrame()
+
+        for start, end in self.cache.missing_ohlcv_ranges(ticker, from_date, to_date):
+            fetched = self._unless_rate_limited(self._fetch_ohlcv, ticker, start, end, raise_on_rate_limit=raise_on_rate_limit)
+            if fetched is not None:
+                self.cache.store_ohlcv(ticker, fetched, start, end)
+
+        return self.cache.load_ohlcv(ticker, from_date, to_date)
+
+    def get_ohlcv_many(
+        self,
+        tickers: List[str],
+        days: int = 365,
+        max_workers: Optional[int] = None,
+        raise_on_rate_limit: bool = False,
+        end: Optional[str] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Fetches OHLCV for many tickers over the pooled session.
+        GoAPI's historical endpoint is one ticker per call, so tickers are fanned out
+        concurrently (bounded by the pool size) and each call covers the whole date range.
+        end: as in get_ohlcv.
+        """
+        fetcher = ConcurrentFetcher(self, max_workers=max_workers or self.pool_size)
+        results = dict(fetcher.iter_completed(tickers, fetch=lambda ticker: self.get_ohlcv(ticker, days, raise_on_rate_limit, end)))
+        return {ticker: results[ticker] for ticker in tickers}
+
+    def _unless_rate_limited(self, fetch: Callable, *args, raise_on_rate_limit: bool = False):
+        """
+        Calls a _fetch_* method. Once retries are exhausted, a RateLimitError is re-raised for
+        callers that must not go on with missing data (backtests pass raise_on_rate_limit=True,
+        their progress is checkpointed); otherwise it is reported and the data treated as
+        missing (None), like any other API error, so a live scan still completes.
+        """
+        try:
+            return fetch(*args)
+        except RateLimitError as e:
+            if raise_on_rate_limit:
+                raise
+            print(f"Connection Error: {e}")
+            return None
+
+    def _fetch_ohlcv(self, ticker: str, from_date: str, to_date: str) -> Optional[pd.DataFrame]:
+        """
+        Calls the historical endpoint for [from_date, to_date].
+        Returns None on API/connection errors so callers never cache a failure;
+        RateLimitError propagates (see _unless_rate_limited).
+        """
+        url = f"{self.base_url}/stock/idx/{ticker}/historical"
         params = {
             "api_key": self.api_key,
             "from": from_date,
@@ -38,12 +188,14 @@ get_ohlcv
         }
         
         try:
-            response = requests.get(url, params=params)
-            data = response.json()
+            data = self._get_json(url, params)
             
             if data['status'] == 'success':
                 results = data['data']['results']
                 df = pd.DataFrame(results)
+                if df.empty:
+                    return df
+
                 # GoAPI returns: date, open, high, low, close, volume
                 df['date'] = pd.to_datetime(df['date'])
                 df = df.sort_values('date').reset_index(drop=True)
@@ -55,19 +207,97 @@ get_ohlcv
                 return df
             else:
                 print(f"API Error for {ticker}: {data['message']}")
-                return pd.DataFrame() # Return empty on failure
+                return None
                 
+        except RateLimitError:
+            raise
         except Exception as e:
             print(f"Connection Error: {e}")
-            return pd.DataFrame()
+            return None
 
-    def get_broker_summary(self, ticker: str, date: str = None) -> Dict:
+    @metrics.timed('loader.get_broker_summary')
+    def get_broker_summary(self, ticker: str, date: str = None, raise_on_rate_limit: bool = False) -> Dict:
         """
         Fetches Broker Summary.
         If date is provided (YYYY-MM-DD), fetches historical broker data.
         If date is None, fetches latest data.
+        Past dates are served from the cache permanently, "Latest" until its TTL expires.
+        """
+        payload = self.get_broker_payload(ticker, date, raise_on_rate_limit)
+        if payload is None:
+            return {'acc_ratio': 0, 'top_buyer': 'Unknown'}
+
+        return self._summarize_broker_payload(ticker, payload, date)
+
+    def get_broker_payload(self, ticker: str, date: str = None, raise_on_rate_limit: bool = False) -> Optional[Dict]:
+        """
+        Raw broker summary payload (cache first, same rules as get_broker_summary), or None.
+        """
+        found, payload = (False, None)
+        if self.cache is not None:
+            found, payload = self.cache.load_broker_summary(ticker, date)
+
+        if not found:
+            payload = self._unless_rate_limited(self._fetch_broker_payload, ticker, date, raise_on_rate_limit=raise_on_rate_limit)
+            if payload is not None and self.cache is not None:
+                self.cache.store_broker_summary(ticker, date, payload)
+
+        return payload
+
+    def get_broker_flows(
+        self,
+        tickers: List[str],
+        from_date: str,
+        to_date: str,
+        max_workers: Optional[int] = None
+    ) -> BrokerFlow:
+        """
+        Complete per-broker buy/sell table for `tickers` over business days in [from_date, to_date].
+        Cached payloads are read in bulk; only missing (ticker, date) pairs hit the API. Past
+        dates without a summary (holidays) are cached as empty payloads and never re-requested.
+        """
+        dates = [d.strftime("%Y-%m-%d") for d in pd.bdate_range(from_date, to_date)]
+        payloads = self.cache.load_broker_payloads(tickers, from_date, to_date) if self.cache is not None else {}
+
+        missing = [(t, d) for t in tickers for d in dates if (t, d) not in payloads]
+        if missing:
+            fetcher = ConcurrentFetcher(self, max_workers=max_workers or self.pool_size)
+            payloads.update(fetcher.iter_completed(missing, fetch=lambda key: self.get_broker_payload(*key)))
+
+        return BrokerFlow.from_payloads(
+            (t, d, payloads[(t, d)]) for t in tickers for d in dates if payloads.get((t, d))
+        )
+
+    def get_broker_summary_range(
+        self,
+        ticker: str,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        dates: Optional[List[str]] = None,
+        max_workers: Optional[int] = None
+    ) -> Dict[str, Dict]:
+        """
+        Fetches Broker Summaries for a date range (YYYY-MM-DD, inclusive) or an explicit list of dates.
+        GoAPI serves one date per call, so cached dates are answered from disk and only
+        the missing ones are requested, concurrently over the pooled session.
+        Returns {date: summary} in date order.
         """
-        url = f"https://api.goapi.id/v1/stock/idx/{ticker}/broker_summary"
+        if dates is None:
+            if from_date is None or to_date is None:
+                raise ValueError("get_broker_summary_range needs either dates or both from_date and to_date")
+            dates = [d.strftime("%Y-%m-%d") for d in pd.bdate_range(from_date, to_date)]
+
+        fetcher = ConcurrentFetcher(self, max_workers=max_workers or self.pool_size)
+        results = dict(fetcher.iter_completed(dates, fetch=lambda date: self.get_broker_summary(ticker, date=date)))
+        return {date: results[date] for date in dates}
+
+    def _fetch_broker_payload(self, ticker: str, date: str = None) -> Optional[Dict]:
+        """
+        Calls the broker summary endpoint and returns the raw 'data' payload: empty ({}) when
+        the API has no summary for the date (holiday, non-success answer), None on HTTP or
+        connection errors. RateLimitError propagates (see _unless_rate_limited).
+        """
+        url = f"{self.base_url}/stock/idx/{ticker}/broker_summary"
         
         # Default params
         params = {"api_key": self.api_key}
@@ -77,65 +307,85 @@ get_ohlcv
             params["date"] = date
             
         try:
-            response = requests.get(url, params=params)
-            data = response.json()
+            data = self._get_json(url, params)
             
             # Struktur data GoAPI untuk broker summary
             if data.get('status') == 'success':
-                res_data = data.get('data', {})
-                
-                # Hitung Ratio & Top Buyer dari data asli
-                top_buyers = res_data.get('top_buyers', [])
-                top_sellers = res_data.get('top_sellers', [])
-                
-                if not top_buyers or not top_sellers:
-                    return {'acc_ratio': 0, 'top_buyer': 'Unknown'}
-
-                # Hitung Volume Top 3
-                buy_vol = sum([b['volume'] for b in top_buyers[:3]])
-                sell_vol = sum([s['volume'] for s in top_sellers[:3]])
-                
-                acc_ratio = buy_vol / sell_vol if sell_vol > 0 else 1.0
-                top_buyer = top_buyers[0]['broker_code']
-                
-                return {
-                    'ticker': ticker,
-                    'top_buyer': top_buyer,
-                    'acc_ratio': round(acc_ratio, 2),
-                    'date': date if date else 'Latest'
-                }
+                return data.get('data', {}) or {}
             else:
-                # Jika data kosong/libur, return netral
-                return {'acc_ratio': 0, 'top_buyer': 'Unknown'}
+                # Jika data kosong/libur: payload kosong (netral), di-cache agar tidak diminta lagi
+                return {}
                 
+        except RateLimitError:
+            raise
         except Exception as e:
             print(f"Broxsum Error: {e}")
-            return {'acc_ratio': 0, 'top_buyer': 'Unknown'}
+            return None
 
-    def get_composite_index(self, days: int = 300) -> pd.DataFrame:
+    def _summarize_broker_payload(self, ticker: str, res_data: Dict, date: str = None) -> Dict:
         """
-        Fetches IHSG (Composite Index) data for Market Regime analysis.
+        Reduces a raw broker summary to the Top-3 accumulation ratio and top buyer.
         """
-        # Similar mock generation for IHSG
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
-        dates = pd.date_range(start=start_date, end=end_date, freq='B')
+        # Hitung Ratio & Top Buyer dari data asli
+        top_buyers = res_data.get('top_buyers', [])
+        top_sellers = res_data.get('top_sellers', [])
         
-        # IHSG usually around 6000-7500
-        base_price = 7200
-        prices = []
-        price = base_price
+        if not top_buyers or not top_sellers:
+            return {'acc_ratio': 0, 'top_buyer': 'Unknown'}
+
+        # Hitung Volume Top 3
+        buy_vol = sum([b['volume'] for b in top_buyers[:3]])
+        sell_vol = sum([s['volume'] for s in top_sellers[:3]])
         
-        for _ in range(len(dates)):
-            change = random.uniform(-0.01, 0.01) # Less volatile than individual stocks
-            price = price * (1 + change)
-            prices.append(price)
-            
-        df = pd.DataFrame({
-            'date': dates,
-            'close': prices
-        })
+        acc_ratio = buy_vol / sell_vol if sell_vol > 0 else 1.0
+        top_buyer = top_buyers[0]['broker_code']
         
+        return {
+            'ticker': ticker,
+            'top_buyer': top_buyer,
+            'acc_ratio': round(acc_ratio, 2),
+            'date': date if date else 'Latest'
+        }
+
+    @metrics.timed('loader.get_composite_index')
+    def get_composite_index(self, days: int = 300) -> pd.DataFrame:
+        """
+        Historical IHSG (Composite Index) bars for Market Regime analysis, oldest first, with
+        the regime precomputed (EMA_200 and 'regime' columns, see risk_guard.regime_series),
+        so MarketRegime answers point-in-time lookups directly.
+        The regime is always computed over the window plus IHSG_REGIME_WARMUP earlier trading
+        days, so the same `days` gives the same regime whatever was loaded before.
+        Source: index_file (CSV stand-in) when set, else config.IHSG_SYMBOL through get_ohlcv
+        (past bars come from the local cache). Raw bars are kept per loader: repeated calls
+        within CACHE_LATEST_TTL are served without refetching.
+        """
+        today = pd.Timestamp.now().normalize()
+        # IDX trades ~240 days a year
+        load_days = days + int(config.IHSG_REGIME_WARMUP * 365 / 240) + 1
+        with self._index_lock:
+            stale = self._index is None or time.time() - self._index_loaded_at > config.CACHE_LATEST_TTL
+            if stale or load_days > self._index_days:
+                self._index = self._load_composite_index(load_days)
+                self._index_days = load_days
+                self._index_loaded_at = time.time()
+                self._regimes = {}
+            if days not in self._regimes:
+                raw = self._index[self._index['date'] >= today - pd.Timedelta(days=load_days)]
+                self._regimes[days] = regime_series(raw)
+            index = self._regimes[days]
+
+        return index[index['date'] >= today - pd.Timedelta(days=days)].reset_index(drop=True)
+
+    def _load_composite_index(self, days: int) -> pd.DataFrame:
+        """
+        Raw IHSG bars (at least date and close) covering the last `days` calendar days.
+        """
+        if self.index_file:
+            return load_index_file(self.index_file)
+        df = self.get_ohlcv(config.IHSG_SYMBOL, days=days)
+        if df.empty:
+            print(f"⚠️  No IHSG history for {config.IHSG_SYMBOL}; regime defaults to DEFENSIVE.")
+            return pd.DataFrame({'date': pd.Series(dtype='datetime64[ns]'), 'close': pd.Series(dtype=float)})
         return df
 
     def check_corporate_action(self, ticker: str) -> bool:
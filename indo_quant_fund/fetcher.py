@@ -0,0 +1,81 @@
+"""
+Concurrent Fetch Stage for IndoQuantFund.
+Bounded thread-pool fetching of OHLCV + broker summaries with a per-host rate limiter,
+plus helpers to consume results as they complete while emitting them in a fixed order.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from . import config
+
+class HostRateLimiter:
+    """
+    Token bucket per host. `acquire(host)` blocks until a request slot is free.
+    Shared by every thread using the same loader so the GoAPI quota holds globally.
+    """
+    def __init__(self, rate: float = config.GOAPI_RATE_LIMIT, burst: int = config.GOAPI_RATE_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # host -> (tokens, last_refill)
+        self._lock = threading.Lock()
+
+    def acquire(self, host: str):
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, last = self._buckets.get(host, (float(self.burst), now))
+                tokens = min(self.burst, tokens + (now - last) * self.rate)
+
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now)
+                    return
+
+                self._buckets[host] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+
+            time.sleep(wait)
+
+class ConcurrentFetcher:
+    """
+    Fetches OHLCV and the latest broker summary for many tickers in parallel.
+    The loader's own rate limiter and retries apply to every request.
+    """
+    def __init__(self, loader, max_workers: int = config.FETCH_CONCURRENCY):
+        self.loader = loader
+        self.max_workers = max(1, max_workers)
+
+    def fetch_ticker(self, ticker: str) -> Tuple[Any, Dict]:
+        df = self.loader.get_ohlcv(ticker)
+        broker_data = self.loader.get_broker_summary(ticker)
+        return df, broker_data
+
+    def iter_completed(self, tickers: List[str], fetch: Optional[Callable] = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Yields (ticker, result) as soon as each ticker's fetch finishes.
+        """
+        fetch = fetch or self.fetch_ticker
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(fetch, ticker): ticker for ticker in tickers}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+def iter_in_order(completed: Iterable[Tuple[Hashable, Any]], order: List[Hashable]) -> Iterator[Tuple[Hashable, Any]]:
+    """
+    Re-emits (key, value) pairs arriving in any order following `order`,
+    releasing each item as soon as every key before it has arrived.
+    """
+    pending = {}
+    next_index = 0
+
+    for key, value in completed:
+        pending[key] = value
+        while next_index < len(order) and order[next_index] in pending:
+            current = order[next_index]
+            yield current, pending.pop(current)
+            next_index += 1
@@ -0,0 +1,233 @@
+"""
+Opt-in Instrumentation for IndoQuantFund.
+Per-stage timers and call counts, HTTP latency / response-size histograms and cache hit
+ratios, collected in one process-wide registry (`metrics`).
+
+- Disabled by default (config.METRICS_ENABLED). When off, every hook is a single
+  attribute check, so instrumented code runs at full speed.
+- Stages are timed with @metrics.timed("stage") or `with metrics.stage("stage"):`.
+- report() prints a summary table and writes a Prometheus text file (config.METRICS_EXPORT_FILE).
+
+Process-pool workers (portfolio precompute, optimizer) keep their own registry;
+only work done in the calling process is reported.
+"""
+
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import Dict, List, Optional, Tuple
+
+from . import config
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTE_BUCKETS = (256, 1_024, 4_096, 16_384, 65_536, 262_144, 1_048_576, 4_194_304)
+
+_NULL_STAGE = nullcontext()
+
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+def _key(name: str, labels: Dict) -> MetricKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+class Histogram:
+    """
+    Fixed-bucket histogram (Prometheus semantics: bucket i counts values <= buckets[i]).
+    """
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        rows, running = [], 0
+        for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            running += count
+            rows.append((str(bound), running))
+        return rows
+
+class _StageTimer:
+    def __init__(self, metrics: 'Metrics', stage: str):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe_stage(self.stage, time.perf_counter() - self.started)
+
+class Metrics:
+    def __init__(self, enabled: bool = config.METRICS_ENABLED):
+        self.enabled = enabled
+        self.counters: Dict[MetricKey, float] = {}
+        self.gauges: Dict[MetricKey, float] = {}
+        self.histograms: Dict[MetricKey, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def enable(self, enabled: bool = True):
+        self.enabled = enabled
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+    # --- Recording -------------------------------------------------------
+
+    def inc(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.gauges[_key(name, labels)] = value
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **labels):
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def observe_stage(self, stage: str, seconds: float):
+        self.observe('stage_seconds', seconds, stage=stage)
+
+    def stage(self, stage: str):
+        """
+        Context manager timing one block; a shared no-op when disabled.
+        """
+        return _StageTimer(self, stage) if self.enabled else _NULL_STAGE
+
+    def timed(self, stage: str):
+        """
+        Decorator timing every call of a function under `stage`.
+        """
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe_stage(stage, time.perf_counter() - started)
+            return wrapper
+        return decorator
+
+    def record_http(self, endpoint: str, status: int, n_bytes: int, seconds: float):
+        if not self.enabled:
+            return
+        self.inc('http_requests_total', endpoint=endpoint, status=status)
+        self.observe('http_request_seconds', seconds, endpoint=endpoint)
+        self.observe('http_response_bytes', n_bytes, buckets=BYTE_BUCKETS, endpoint=endpoint)
+
+    def record_cache(self, cache):
+        """
+        Copies MarketDataCache hit/miss counters into gauges.
+        """
+        if not self.enabled or cache is None:
+            return
+        for kind in ('ohlcv', 'broker'):
+            hits, misses = cache.stats[f'{kind}_hits'], cache.stats[f'{kind}_misses']
+            self.set_gauge('cache_hits', hits, kind=kind)
+            self.set_gauge('cache_misses', misses, kind=kind)
+            self.set_gauge('cache_hit_ratio', hits / (hits + misses) if hits + misses else 0.0, kind=kind)
+
+    # --- Export ----------------------------------------------------------
+
+    def summary_table(self) -> str:
+        with self._lock:
+            histograms = dict(self.histograms)
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+
+        lines = [f"{'STAGE':<40} {'CALLS':>8} {'TOTAL s':>10} {'MEAN ms':>10} {'MAX ms':>10}"]
+        stages = sorted(
+            ((dict(labels)['stage'], h) for (name, labels), h in histograms.items() if name == 'stage_seconds'),
+            key=lambda item: item[1].sum, reverse=True
+        )
+        for stage, h in stages:
+            lines.append(f"{stage:<40} {h.count:>8} {h.sum:>10.3f} {h.sum / h.count * 1000:>10.2f} {h.max * 1000:>10.2f}")
+
+        for (name, labels), h in sorted(histograms.items()):
+            if name == 'http_request_seconds':
+                endpoint = dict(labels)['endpoint']
+                n_bytes = histograms.get(_key('http_response_bytes', {'endpoint': endpoint}))
+                size = f" | {n_bytes.sum / n_bytes.count / 1024:.1f} KiB avg" if n_bytes else ""
+                lines.append(f"HTTP {endpoint:<35} {h.count:>8} {h.sum:>10.3f} {h.sum / h.count * 1000:>10.2f} {h.max * 1000:>10.2f}{size}")
+
+        for (name, labels), value in sorted(counters.items()) + sorted(gauges.items()):
+            label_text = ",".join(f"{k}={v}" for k, v in labels)
+            lines.append(f"{name + '{' + label_text + '}':<60} {value:>10.4g}")
+
+        return "\n".join(lines)
+
+    def to_prometheus(self, prefix: str = 'iqf_') -> str:
+        def fmt(labels, extra: Tuple = ()) -> str:
+            pairs = list(labels) + list(extra)
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}" if pairs else ""
+
+        with self._lock:
+            lines = []
+            for kind, store in (('counter', self.counters), ('gauge', self.gauges)):
+                for name in sorted({n for n, _ in store}):
+                    lines.append(f"# TYPE {prefix}{name} {kind}")
+                    for (n, labels), value in sorted(store.items()):
+                        if n == name:
+                            lines.append(f"{prefix}{name}{fmt(labels)} {value}")
+
+            for name in sorted({n for n, _ in self.histograms}):
+                lines.append(f"# TYPE {prefix}{name} histogram")
+                for (n, labels), h in sorted(self.histograms.items()):
+                    if n != name:
+                        continue
+                    for bound, count in h.cumulative():
+                        lines.append(f"{prefix}{name}_bucket{fmt(labels, (('le', bound),))} {count}")
+                    lines.append(f"{prefix}{name}_sum{fmt(labels)} {h.sum}")
+                    lines.append(f"{prefix}{name}_count{fmt(labels)} {h.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str = config.METRICS_EXPORT_FILE):
+        tmp_file = f"{path}.tmp"
+        with open(tmp_file, 'w') as f:
+            f.write(self.to_prometheus())
+        # node_exporter's textfile collector must never read a half-written file
+        os.replace(tmp_file, path)
+
+    def report(self, loader=None, path: Optional[str] = config.METRICS_EXPORT_FILE):
+        """
+        End-of-run summary: cache gauges from the loader, table to stdout, Prometheus file to `path`.
+        """
+        if not self.enabled:
+            return
+        self.record_cache(getattr(loader, 'cache', None))
+        print(f"\n{'='*30} METRICS {'='*30}")
+        print(self.summary_table())
+        if path:
+            self.write_prometheus(path)
+            print(f"Metrics exported to {path}")
+
+metrics = Metrics()
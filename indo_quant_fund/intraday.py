@@ -0,0 +1,316 @@
+"""
+Event-Driven Intraday Engine for IndoQuantFund.
+Consumes a stream of intraday bars or ticks (file replay or a local socket feed) and keeps
+one IndicatorState per ticker, seeded from daily history.
+
+Events for the current session are folded into a forming daily bar; the strategy is
+re-evaluated on IndicatorState.preview(forming bar) only for the ticker that changed, so
+each event costs O(1) regardless of how many symbols are live. The forming bar is committed
+to the state when the first event of the next session arrives (or on end_of_day()).
+
+A ticker that starts triggering is pushed through RiskGatekeeper once (edge-triggered);
+approved entries reserve cash and the ticker is not re-entered.
+
+Event format (dict / JSON line / CSV row):
+    bar:  {"ticker", "time", "open", "high", "low", "close", "volume"}
+    tick: {"ticker", "time", "price", "volume"}
+"""
+
+import csv
+import json
+import socket
+import socketserver
+import threading
+import time
+from datetime import date as Date, datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+from . import config
+from .audit import TradeAudit
+from .brain import IndicatorState, StrategyEngine
+from .data_engine import GoAPILoader
+from .fetcher import ConcurrentFetcher
+from .instrumentation import metrics
+from .risk_guard import RiskGatekeeper
+
+# ==========================================
+# EVENT SOURCES
+# ==========================================
+
+def _parse_time(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, Date):
+        return datetime(value.year, value.month, value.day)
+    return datetime.fromisoformat(str(value))
+
+def normalize_event(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Bar or tick -> bar dict with float prices and a datetime `time`.
+    """
+    if raw.get('price') not in (None, ''):
+        price = float(raw['price'])
+        open_price = high = low = close = price
+    else:
+        open_price, high, low, close = (float(raw[k]) for k in ('open', 'high', 'low', 'close'))
+    return {
+        'ticker': raw['ticker'],
+        'time': _parse_time(raw['time']),
+        'open': open_price, 'high': high, 'low': low, 'close': close,
+        'volume': float(raw.get('volume') or 0),
+    }
+
+def replay_file(path: str, speed: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Replays a CSV or JSON Lines file of bars/ticks in file order.
+    speed: None replays as fast as possible; 1.0 honours the recorded gaps, 10.0 is 10x faster.
+    """
+    previous = None
+    with open(path, newline='') as f:
+        rows = csv.DictReader(f) if path.endswith('.csv') else (json.loads(line) for line in f if line.strip())
+        for raw in rows:
+            event = normalize_event(raw)
+            if speed and previous is not None:
+                gap = (event['time'] - previous).total_seconds() / speed
+                if gap > 0:
+                    time.sleep(gap)
+            previous = event['time']
+            yield event
+
+def socket_source(host: str, port: int) -> Iterator[Dict[str, Any]]:
+    """
+    Reads newline-delimited JSON events from a TCP feed until the server closes it.
+    """
+    with socket.create_connection((host, port)) as conn, conn.makefile('r') as stream:
+        for line in stream:
+            if line.strip():
+                yield normalize_event(json.loads(line))
+
+class _FeedHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for event in self.server.events:
+            self.wfile.write((json.dumps(event, default=str) + "\n").encode())
+
+class LocalFeedServer:
+    """
+    Local stand-in for a market-data socket: streams the given events as JSON lines
+    to every client that connects, then closes the connection.
+    """
+    def __init__(self, events: Iterable[Dict[str, Any]], host: str = '127.0.0.1', port: int = 0):
+        self._server = socketserver.ThreadingTCPServer((host, port), _FeedHandler)
+        self._server.daemon_threads = True
+        self._server.events = list(events)
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address[:2]
+
+    def start(self) -> 'LocalFeedServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'LocalFeedServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+# ==========================================
+# ENGINE
+# ==========================================
+
+class IntradayEngine:
+    def __init__(
+        self,
+        states: Dict[str, IndicatorState],
+        broker_data: Dict[str, Dict],
+        ihsg_data: pd.DataFrame,
+        brain: Optional[StrategyEngine] = None,
+        risk: Optional[RiskGatekeeper] = None,
+        cash: float = config.INITIAL_CAPITAL,
+        auditor: Optional[TradeAudit] = None,
+        on_decision: Optional[Callable[[Dict], None]] = None
+    ):
+        self.states = states
+        self.broker_data = broker_data
+        self.ihsg_data = ihsg_data
+        self.brain = brain or StrategyEngine()
+        self.risk = risk or RiskGatekeeper(initial_capital=cash)
+        self.cash = cash
+        self.equity = cash
+        self.auditor = auditor
+        self.on_decision = on_decision
+
+        self.forming: Dict[str, Dict[str, Any]] = {}     # ticker -> forming daily bar
+        self.triggered: Dict[str, Optional[str]] = {}    # ticker -> last evaluated strategy
+        self.positions: Dict[str, Dict[str, Any]] = {}   # ticker -> approved entry
+        self.decisions: List[Dict] = []
+        self.events_processed = 0
+
+    @classmethod
+    def from_loader(
+        cls,
+        tickers: List[str],
+        loader: Optional[GoAPILoader] = None,
+        days: int = 500,
+        brain: Optional[StrategyEngine] = None,
+        **kwargs
+    ) -> 'IntradayEngine':
+        """
+        Seeds indicator states from daily history (bars before today) and loads the latest
+        broker summaries and IHSG once, so nothing on the event path touches the network.
+        """
+        loader = loader or GoAPILoader(config.API_KEY)
+        brain = brain or StrategyEngine()
+        today = pd.Timestamp.now().normalize()
+
+        states = {}
+        for ticker, df in loader.get_ohlcv_many(tickers, days=days).items():
+            if not df.empty:
+                states[ticker] = IndicatorState.from_history(df[df['date'] < today], brain.params)
+
+        broker_data = dict(ConcurrentFetcher(loader).iter_completed(list(states), fetch=loader.get_broker_summary))
+        return cls(states, broker_data, loader.get_composite_index(), brain=brain, **kwargs)
+
+    def update_broker(self, ticker: str, summary: Dict):
+        """
+        Refreshed broker summary; the ticker is re-evaluated on its next event.
+        """
+        self.broker_data[ticker] = summary
+        self.triggered.pop(ticker, None)
+
+    def _commit(self, ticker: str):
+        bar = self.forming.pop(ticker, None)
+        if bar is not None:
+            self.states[ticker].update(bar)
+            self.triggered.pop(ticker, None)
+
+    def end_of_day(self):
+        """
+        Commits every forming bar as the session's completed daily bar.
+        """
+        for ticker in list(self.forming):
+            self._commit(ticker)
+
+    def on_event(self, event: Dict[str, Any]) -> Optional[Dict]:
+        """
+        Folds one bar/tick into its ticker's forming bar and re-evaluates that ticker.
+        Returns the risk decision if this event made the ticker trigger, else None.
+        """
+        ticker = event['ticker']
+        state = self.states.get(ticker)
+        if state is None:
+            return None
+        self.events_processed += 1
+
+        session = event['time'].date()
+        bar = self.forming.get(ticker)
+        if bar is not None and session > bar['date']:
+            self._commit(ticker)
+            bar = None
+
+        if bar is None:
+            bar = self.forming[ticker] = {
+                'date': session, 'open': event['open'], 'high': event['high'],
+                'low': event['low'], 'close': event['close'], 'volume': event['volume'],
+            }
+        else:
+            bar['volume'] += event['volume']
+            if event['high'] <= bar['high'] and event['low'] >= bar['low'] and event['close'] == bar['close']:
+                return None  # Indicator inputs unchanged: nothing to re-evaluate
+            bar['high'] = max(bar['high'], event['high'])
+            bar['low'] = min(bar['low'], event['low'])
+            bar['close'] = event['close']
+
+        if ticker in self.positions:
+            return None
+
+        with metrics.stage('intraday.evaluate'):
+            snapshot = state.preview(bar)
+            strategy = self.brain.evaluate_snapshot(snapshot, self.broker_data.get(ticker, {}))
+            previous = self.triggered.get(ticker)
+            self.triggered[ticker] = strategy
+            if strategy is None or strategy == previous:
+                return None
+            return self._decide(ticker, strategy, snapshot, event)
+
+    def _decide(self, ticker: str, strategy: str, snapshot: Dict[str, Any], event: Dict[str, Any]) -> Dict:
+        broker_data = self.broker_data.get(ticker, {})
+        approved, reason, lots, stop_loss = self.risk.validate_entry(
+            ticker=ticker,
+            entry_price=snapshot['close'],
+            cash_balance=self.cash,
+            current_equity=self.equity,
+            ihsg_data=self.ihsg_data,
+            bandar_ratio=broker_data.get('acc_ratio', 0),
+            top_buyer=broker_data.get('top_buyer', 'Unknown'),
+            atr_value=snapshot['ATR'],
+            as_of=snapshot['date']
+        )
+
+        decision = {
+            "timestamp": event['time'].isoformat(),
+            "ticker": ticker,
+            "strategy": strategy,
+            "price": snapshot['close'],
+            "acc_ratio": broker_data.get('acc_ratio', 0),
+            "top_buyer": broker_data.get('top_buyer', 'Unknown'),
+            "status": "APPROVED" if approved else "REJECTED",
+            "reason": reason,
+            "lots": lots,
+            "stop_loss": stop_loss,
+            "mode": "intraday",
+        }
+
+        if approved and lots > 0:
+            self.cash -= lots * 100 * snapshot['close']
+            self.positions[ticker] = decision
+
+        self.decisions.append(decision)
+        if self.auditor is not None:
+            self.auditor.log(decision)
+        if self.on_decision is not None:
+            self.on_decision(decision)
+        return decision
+
+    def run(self, events: Iterable[Dict[str, Any]]) -> List[Dict]:
+        """
+        Processes a whole stream (e.g. replay_file / socket_source) and returns its decisions.
+        """
+        start = len(self.decisions)
+        for event in events:
+            self.on_event(event)
+        return self.decisions[start:]
+
+if __name__ == "__main__":
+    import random
+    from .synthetic import SyntheticLoader
+
+    # Replay one synthetic session of 5-minute bars for the watchlist over the local socket feed
+    loader = SyntheticLoader(seed=7)
+    engine = IntradayEngine.from_loader(config.WATCHLIST, loader=loader)
+    rng = random.Random(7)
+    session = pd.Timestamp.now().normalize() + pd.Timedelta(hours=9)
+    events = []
+    for step in range(72):
+        for ticker, state in engine.states.items():
+            last = state.last_bar['close']
+            price = round(last * (1 + rng.uniform(-0.02, 0.025)))
+            events.append({'ticker': ticker, 'time': (session + pd.Timedelta(minutes=5 * step)).isoformat(), 'price': price, 'volume': 1000})
+
+    with LocalFeedServer(events) as feed:
+        started = time.perf_counter()
+        decisions = engine.run(socket_source(*feed.address))
+        elapsed = time.perf_counter() - started
+
+    print(f"⚡ {engine.events_processed} events in {elapsed * 1000:.1f} ms ({elapsed / max(1, engine.events_processed) * 1e6:.1f} µs/event)")
+    for d in decisions:
+        print(f"  {d['timestamp']} {d['ticker']} {d['strategy']} -> {d['status']}: {d['reason']}")
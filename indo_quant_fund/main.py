@@ -4,145 +4,271 @@ IndoQuantFund Orchestrator
 The Main Execution Loop calling all subsystems.
 """
 
+import time
 import pandas as pd
-import json
-import os
 from datetime import datetime
+from typing import List, Optional
 from colorama import Fore, Style, init
 
-import config
-from data_engine import GoAPILoader
-from brain import StrategyEngine
-from risk_guard import RiskGatekeeper
-from utils import calculate_atr
+from . import config
+from .data_engine import GoAPILoader
+from .brain import StrategyEngine
+from .risk_guard import RiskGatekeeper
+from .utils import StreamingATR
+from .fetcher import ConcurrentFetcher, iter_in_order
+from .audit import TradeAudit
+from .instrumentation import metrics
+from .positions import PositionBook
 
 # Initialize Colorama
 init(autoreset=True)
 
-class TradeAudit:
-    def __init__(self, log_file='trade_logs.json'):
-        self.log_file = log_file
-        
-    def log(self, data: dict):
-        """Saves trade decisions to JSON audit log"""
-        logs = []
-        if os.path.exists(self.log_file):
-            with open(self.log_file, 'r') as f:
-                try:
-                    logs = json.load(f)
-                except json.JSONDecodeError:
-                    logs = []
-        
-        logs.append(data)
-        
-        with open(self.log_file, 'w') as f:
-            json.dump(logs, f, indent=4)
+@metrics.timed('scan.analyze_ticker')
+def analyze_ticker(brain: StrategyEngine, df: pd.DataFrame, broker_data: dict) -> dict:
+    """
+    Indicator + strategy stage for one ticker. Runs as soon as the ticker's data arrives.
+    """
+    if df.empty:
+        return {'has_data': False, 'broker_data': broker_data}
+
+    # Indicators are computed on demand: tickers failing the cheap checks
+    # (history length, Bandarmology) never pay for the rolling math
+    frame = brain.indicator_frame(df)
+
+    # Run Strategies
+    s1_signal, s1_ratio, s1_buyer = brain.analyze_stage2_breakout(frame, broker_data)
+    s2_signal, s2_ratio, s2_buyer = brain.analyze_stage1_accumulation(frame, broker_data)
+
+    triggered_strategy = None
+    if s1_signal:
+        triggered_strategy = "Stage 2 Breakout"
+    elif s2_signal:
+        triggered_strategy = "Silent Accumulation"
 
-def run_system():
+    return {
+        'has_data': True,
+        'df': df,
+        'broker_data': broker_data,
+        'current_atr': frame.latest('ATR') if triggered_strategy else None,
+        'current_price': df.iloc[-1]['close'],
+        'triggered_strategy': triggered_strategy,
+    }
+
+def roll_stops(book: PositionBook, ticker: str, df: pd.DataFrame, session: Optional[pd.Timestamp] = None) -> float:
+    """
+    Feeds the completed bars after the position's last seen date into its trailing stop and
+    returns the stop to check the latest close against. A bar of the current session (default:
+    today) is still forming: like IntradayEngine, it is checked without being committed, so
+    the next scan still sees it as a new bar once it has closed.
+    """
+    session = pd.Timestamp.now().normalize() if session is None else session
+    position = book.get(ticker)
+    new_bars = df[(df['date'] > position.last_date) & (df['date'] < session)]
+    for date, high, low, close in zip(new_bars['date'], new_bars['high'], new_bars['low'], new_bars['close']):
+        book.update(ticker, date, high, low, close)
+
+    forming = df.iloc[-1]
+    if forming['date'] >= session:
+        return book.peek(ticker, forming['high'], forming['low'], forming['close'])
+    return position.stop
+
+def run_system(
+    max_workers: int = config.FETCH_CONCURRENCY,
+    loader: Optional[GoAPILoader] = None,
+    watchlist: Optional[List[str]] = None,
+    auditor: Optional[TradeAudit] = None,
+    position_file: str = config.POSITION_BOOK_FILE
+):
+    """
+    Daily scan over the watchlist (config.WATCHLIST by default).
+    loader/auditor/position_file can be swapped for offline runs (e.g. synthetic.SyntheticLoader in benchmarks.py).
+    """
+    scan_started = time.perf_counter()
     print(f"{Fore.CYAN}{Style.BRIGHT}🏛️  INDO-QUANT FUND SYSTEM INITIALIZING...{Style.RESET_ALL}")
-    print(f"Capital: {config.INITIAL_CAPITAL:,.0f} IDR\n")
+    print(f"Capital: {config.INITIAL_CAPITAL:,.0f} IDR")
     
     # Initialize Core Systems
-    data_loader = GoAPILoader()
+    data_loader = loader or GoAPILoader()
     brain = StrategyEngine()
     risk_guard = RiskGatekeeper(initial_capital=config.INITIAL_CAPITAL)
-    auditor = TradeAudit()
+    auditor = auditor or TradeAudit()
+    fetcher = ConcurrentFetcher(data_loader, max_workers=max_workers)
     
-    # Simulation State
-    current_cash = config.INITIAL_CAPITAL
-    current_equity = config.INITIAL_CAPITAL
+    # Portfolio State (persisted between scans)
+    book = PositionBook.load(position_file, cash=config.INITIAL_CAPITAL)
+    print(f"Cash: {book.cash:,.0f} IDR | Open Positions: {len(book)}\n")
     
-    # 1. Broad Market Context
-    print(f"{Fore.YELLOW}[MARKET REGIME CHECK]{Style.RESET_ALL}")
-    ihsg_df = data_loader.get_composite_index()
-    market_regime = risk_guard.check_market_regime(ihsg_df)
+    # Whatever happens below, exits and adds already written to the audit log reach the book
+    try:
+        # 1. Broad Market Context
+        print(f"{Fore.YELLOW}[MARKET REGIME CHECK]{Style.RESET_ALL}")
+        ihsg_df = data_loader.get_composite_index()
+        market_regime = risk_guard.check_market_regime(ihsg_df)
     
-    regime_color = Fore.GREEN if market_regime == "BULLISH" else Fore.RED
-    print(f"IHSG Regime: {regime_color}{market_regime}{Style.RESET_ALL}\n")
+        regime_color = Fore.GREEN if market_regime == "BULLISH" else Fore.RED
+        print(f"IHSG Regime: {regime_color}{market_regime}{Style.RESET_ALL}\n")
     
-    # 2. Watchlist Iteration
-    print(f"{Fore.YELLOW}[SCANNING WATCHLIST]{Style.RESET_ALL}")
+        # 2. Watchlist Iteration
+        print(f"{Fore.YELLOW}[SCANNING WATCHLIST]{Style.RESET_ALL}")
     
-    for ticker in config.WATCHLIST:
-        print(f"\nAnalyzing {ticker}...")
-        
-        # Fetch Data
-        df = data_loader.get_ohlcv(ticker)
-        broker_data = data_loader.get_broker_summary(ticker)
-        
-        # Pre-calculate indicators
-        df = brain.prepare_indicators(df)
-        atr_series = calculate_atr(df)
-        current_atr = atr_series.iloc[-1]
-        current_price = df.iloc[-1]['close']
+        # Fetch Data concurrently; strategies run as each ticker completes,
+        # the report follows watchlist order; new entry signals are sized together afterwards
+        watchlist = list(watchlist or config.WATCHLIST)
+        candidates = []
+        analyses = (
+            (ticker, analyze_ticker(brain, df, broker_data))
+            for ticker, (df, broker_data) in fetcher.iter_completed(watchlist)
+        )
+    
+        for ticker, analysis in iter_in_order(analyses, watchlist):
+            print(f"\nAnalyzing {ticker}...")
         
-        print(f"  > Price: {current_price:,.0f} | Top Buyer: {broker_data['top_buyer']} | Acc Ratio: {broker_data['acc_ratio']}")
+            broker_data = analysis['broker_data']
+            if not analysis['has_data']:
+                print(f"  {Fore.RED}⚠️  No price data for {ticker}. Skipping.{Style.RESET_ALL}")
+                continue
         
-        # --- PYRAMIDING LOGIC (SIMULATED) ---
-        # Simulating we already own some and checking if we should add
-        # This is a mock check for demonstration logic as requested
-        simulated_entry = current_price * 0.85 # Pretend we bought lower
-        if current_price > (simulated_entry * 1.10) and broker_data['acc_ratio'] > 1.5:
-            print(f"  {Fore.BLUE}[PYRAMIDING SIGNAL] Existing Position Profitable (+{(current_price/simulated_entry - 1)*100:.1f}%) & Accumulation continues. ADDING SIZE.{Style.RESET_ALL}")
-        # ------------------------------------
-
-        # --- NEW ENTRY LOGIC ---
+            current_price = analysis['current_price']
         
-        # Run Strategies
-        s1_signal, s1_ratio, s1_buyer = brain.analyze_stage2_breakout(df, broker_data)
-        s2_signal, s2_ratio, s2_buyer = brain.analyze_stage1_accumulation(df, broker_data)
+            print(f"  > Price: {current_price:,.0f} | Top Buyer: {broker_data['top_buyer']} | Acc Ratio: {broker_data['acc_ratio']}")
         
-        triggered_strategy = None
-        if s1_signal:
-            triggered_strategy = "Stage 2 Breakout"
-        elif s2_signal:
-            triggered_strategy = "Silent Accumulation"
-            
-        if triggered_strategy:
-            print(f"  {Fore.MAGENTA}>> SIGNAL DETECTED: {triggered_strategy}{Style.RESET_ALL}")
+            # --- OPEN POSITION: TRAILING STOP & PYRAMIDING ---
+            if ticker in book:
+                position = book.get(ticker)
+                stop_price = roll_stops(book, ticker, analysis['df'])
+                print(f"  > Holding {position.shares // 100} Lots @ {position.avg_price:,.0f} | Trailing Stop: {stop_price:,.0f}")
+
+                if current_price < stop_price:
+                    trade = book.close(ticker, analysis['df']['date'].iloc[-1], current_price)
+                    print(f"  {Fore.RED}>> EXIT: Close {current_price:,.0f} below trailing stop {stop_price:,.0f} | PnL: {trade['pnl']:.2f}%{Style.RESET_ALL}")
+                    auditor.log({
+                        "timestamp": datetime.now().isoformat(),
+                        "ticker": ticker,
+                        "strategy": position.strategy,
+                        "price": current_price,
+                        "market_regime": market_regime,
+                        "status": "EXIT",
+                        "reason": f"Chandelier Exit (Stop {stop_price:,.0f})",
+                        "lots": trade['shares'] // 100,
+                        "pnl": trade['pnl']
+                    })
+                elif book.pyramid_ready(ticker, current_price):
+                    is_approved, reason, lots = risk_guard.validate_pyramid(
+                        position, current_price, book.cash, broker_data['acc_ratio'], broker_data['top_buyer']
+                    )
+                    if is_approved:
+                        book.add(ticker, analysis['df']['date'].iloc[-1], current_price, lots * 100)
+                        print(f"  {Fore.BLUE}[PYRAMIDING] {reason} ADDING {lots} Lots.{Style.RESET_ALL}")
+                    else:
+                        print(f"  [PYRAMIDING] {reason}")
+                    auditor.log({
+                        "timestamp": datetime.now().isoformat(),
+                        "ticker": ticker,
+                        "strategy": position.strategy,
+                        "price": current_price,
+                        "acc_ratio": broker_data['acc_ratio'],
+                        "top_buyer": broker_data['top_buyer'],
+                        "market_regime": market_regime,
+                        "status": "PYRAMID" if is_approved else "REJECTED",
+                        "reason": reason,
+                        "lots": lots,
+                        "stop_loss": position.stop
+                    })
+                continue
+
+            # --- NEW ENTRY LOGIC ---
+            triggered_strategy = analysis['triggered_strategy']
             
-            # Risk Gatekeeper Validation
-            is_approved, reason, lots, stop_loss = risk_guard.validate_entry(
-                ticker=ticker,
-                entry_price=current_price,
-                cash_balance=current_cash,
-                current_equity=current_equity,
-                ihsg_data=ihsg_df,
-                bandar_ratio=broker_data['acc_ratio'],
-                top_buyer=broker_data['top_buyer'],
-                atr_value=current_atr
+            if triggered_strategy:
+                print(f"  {Fore.MAGENTA}>> SIGNAL DETECTED: {triggered_strategy}{Style.RESET_ALL}")
+                candidates.append((ticker, analysis))
+            else:
+                print(f"  No Entry Signal.")
+
+        # 3. Risk Gatekeeper: every signal sized in one call, cash allocated by conviction
+        if candidates:
+            print(f"\n{Fore.YELLOW}[RISK SIZING: {len(candidates)} SIGNALS]{Style.RESET_ALL}")
+            sizing = risk_guard.validate_entries(
+                tickers=[t for t, _ in candidates],
+                entry_prices=[a['current_price'] for _, a in candidates],
+                atr_values=[a['current_atr'] for _, a in candidates],
+                bandar_ratios=[a['broker_data']['acc_ratio'] for _, a in candidates],
+                top_buyers=[a['broker_data']['top_buyer'] for _, a in candidates],
+                cash_balance=book.cash,
+                current_equity=book.equity(),
+                ihsg_data=ihsg_df
             )
+
+            for (ticker, analysis), decision in zip(candidates, sizing.itertuples()):
+                is_approved, reason = bool(decision.approved), decision.reason
+                lots, stop_loss = int(decision.lots), int(decision.stop_loss)
+                current_price = analysis['current_price']
+                triggered_strategy = analysis['triggered_strategy']
+                broker_data = analysis['broker_data']
+
+                log_entry = {
+                    "timestamp": datetime.now().isoformat(),
+                    "ticker": ticker,
+                    "strategy": triggered_strategy,
+                    "price": current_price,
+                    "acc_ratio": broker_data['acc_ratio'],
+                    "top_buyer": broker_data['top_buyer'],
+                    "market_regime": market_regime,
+                    "status": "APPROVED" if is_approved else "REJECTED",
+                    "reason": reason,
+                    "lots": lots,
+                    "stop_loss": stop_loss
+                }
+        
+                if is_approved:
+                    print(f"  {Fore.GREEN}>> EXECUTING BUY {ticker}: {lots} Lots @ {current_price} | SL: {stop_loss}{Style.RESET_ALL}")
+                    print(f"  Reason: {reason}")
             
-            log_entry = {
-                "timestamp": datetime.now().isoformat(),
-                "ticker": ticker,
-                "strategy": triggered_strategy,
-                "price": current_price,
-                "acc_ratio": broker_data['acc_ratio'],
-                "top_buyer": broker_data['top_buyer'],
-                "market_regime": market_regime,
-                "status": "APPROVED" if is_approved else "REJECTED",
-                "reason": reason,
-                "lots": lots,
-                "stop_loss": stop_loss
-            }
-            
-            if is_approved:
-                print(f"  {Fore.GREEN}>> EXECUTING BUY: {lots} Lots @ {current_price} | SL: {stop_loss}{Style.RESET_ALL}")
-                print(f"  Reason: {reason}")
-                
-                # Update Mock Portfolio
-                trade_cost = lots * 100 * current_price
-                current_cash -= trade_cost
-            else:
-                print(f"  {Fore.RED}>> REJECTED: {reason}{Style.RESET_ALL}")
-                
-            auditor.log(log_entry)
+                    # Book the position; its ATR state lets later scans trail the stop from new bars only
+                    df = analysis['df']
+                    book.open(
+                        ticker, df['date'].iloc[-1], current_price, lots * 100, stop_loss,
+                        strategy=triggered_strategy, atr_state=StreamingATR.from_history(df), high=df['high'].iloc[-1]
+                    )
+                else:
+                    print(f"  {Fore.RED}>> REJECTED {ticker}: {reason}{Style.RESET_ALL}")
             
-        else:
-            print(f"  No Entry Signal.")
+                auditor.log(log_entry)
+
+        # 4. Open positions outside the watchlist: only the bars since their last check
+        others = [t for t in book.positions if t not in watchlist]
+        if others:
+            print(f"\n{Fore.YELLOW}[TRAILING STOPS: {len(others)} OTHER POSITIONS]{Style.RESET_ALL}")
+            today = pd.Timestamp.now().normalize()
+            window = lambda t: data_loader.get_ohlcv(t, days=(today - book.get(t).last_date).days + 7)
+            for ticker, df in iter_in_order(fetcher.iter_completed(others, fetch=window), others):
+                if df.empty:
+                    continue
+                stop_price = roll_stops(book, ticker, df)
+                close = df['close'].iloc[-1]
+                if close < stop_price:
+                    trade = book.close(ticker, df['date'].iloc[-1], close)
+                    print(f"  {Fore.RED}>> EXIT {ticker}: Close {close:,.0f} below trailing stop {stop_price:,.0f} | PnL: {trade['pnl']:.2f}%{Style.RESET_ALL}")
+                    auditor.log({
+                        "timestamp": datetime.now().isoformat(),
+                        "ticker": ticker,
+                        "price": close,
+                        "market_regime": market_regime,
+                        "status": "EXIT",
+                        "reason": f"Chandelier Exit (Stop {stop_price:,.0f})",
+                        "lots": trade['shares'] // 100,
+                        "pnl": trade['pnl']
+                    })
+                else:
+                    print(f"  {ticker}: Close {close:,.0f} | Trailing Stop: {stop_price:,.0f}")
+    finally:
+        book.save(position_file)
+        auditor.close()
+    print(f"\n{Fore.CYAN} स्कैन COMPLETE. Audit saved to {auditor.log_file}{Style.RESET_ALL}")
+    print(f"Cash: {book.cash:,.0f} IDR | Equity: {book.equity():,.0f} IDR | Open Positions: {len(book)} (saved to {position_file})")
 
-    print(f"\n{Fore.CYAN} स्कैन COMPLETE. Audit saved to trade_logs.json{Style.RESET_ALL}")
+    metrics.observe_stage('scan.run_system', time.perf_counter() - scan_started)
+    metrics.report(loader=data_loader)
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,190 @@
+"""
+Local Stand-in for the GoAPI IDX endpoints.
+Serves deterministic synthetic OHLCV and broker summaries over HTTP so the loader,
+the on-disk cache and benchmarks can run offline and count every request that
+reaches the "API".
+
+Usage:
+    with MockGoAPIServer() as server:
+        loader = GoAPILoader(base_url=server.base_url, cache=MarketDataCache(path))
+        ...
+        print(server.request_count, loader.cache.hit_rate())
+"""
+
+import json
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from . import config
+from .synthetic import synthetic_broker_payload, synthetic_ohlcv
+
+CALENDAR_START = datetime(2010, 1, 1)
+
+class SyntheticMarket:
+    """
+    Deterministic market served by the stand-in: synthetic.py's random walk per ticker over
+    business days from CALENDAR_START, so any date range always returns the same bars.
+    holidays: dates (YYYY-MM-DD) without trading: no bar, and no broker summary.
+    """
+    def __init__(self, seed: int = 0, holidays: Iterable[str] = ()):
+        self.seed = seed
+        self.holidays = set(holidays)
+        self._paths: Dict[str, Dict[str, Dict]] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, ticker: str) -> Dict[str, Dict]:
+        with self._lock:
+            if ticker not in self._paths:
+                df = synthetic_ohlcv(ticker, pd.bdate_range(CALENDAR_START, datetime.now() + timedelta(days=7)), self.seed)
+                df['date'] = df['date'].dt.strftime("%Y-%m-%d")
+                df['volume'] = df['volume'].astype(int)
+                self._paths[ticker] = {bar['date']: bar for bar in df.to_dict('records') if bar['date'] not in self.holidays}
+            return self._paths[ticker]
+
+    def historical(self, ticker: str, from_date: str, to_date: str) -> List[Dict]:
+        return [bar for date, bar in self._path(ticker).items() if from_date <= date <= to_date]
+
+    def broker_summary(self, ticker: str, date: str) -> Optional[Dict]:
+        if date in self.holidays:
+            return None
+        return synthetic_broker_payload(ticker, date, self.seed)
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections alive, so pooled clients reuse them
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.stats['connections'] += 1
+
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        parsed = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        parts = [p for p in parsed.path.split('/') if p]
+
+        with server.stats_lock:
+            server.stats['requests'] += 1
+            server.stats[parsed.path.rsplit('/', 1)[-1]] += 1
+
+        # Expected: /v1/stock/idx/{ticker}/{endpoint}
+        if len(parts) == 5 and parts[:3] == ['v1', 'stock', 'idx']:
+            ticker, endpoint = parts[3], parts[4]
+            if endpoint == 'historical':
+                results = server.market.historical(ticker, query.get('from', ''), query.get('to', '9999'))
+                return self._send({'status': 'success', 'data': {'results': results}})
+            if endpoint == 'broker_summary':
+                date = query.get('date') or datetime.now().strftime("%Y-%m-%d")
+                summary = server.market.broker_summary(ticker, date)
+                if summary is None:
+                    return self._send({'status': 'error', 'message': f'No broker summary for {ticker} on {date}'})
+                return self._send({'status': 'success', 'data': summary})
+
+        self._send({'status': 'error', 'message': f'Unknown endpoint {parsed.path}'}, status=404)
+
+    def _send(self, body: Dict, status: int = 200):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # Keep console output clean
+
+class MockGoAPIServer:
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0, holidays: Iterable[str] = ()):
+        """
+        latency: artificial seconds added to every response to emulate a remote API.
+        holidays: see SyntheticMarket.
+        """
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.latency = latency
+        self._server.market = SyntheticMarket(holidays=holidays)
+        self._server.stats = Counter()
+        self._server.stats_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def request_count(self) -> int:
+        return self._server.stats['requests']
+
+    @property
+    def connection_count(self) -> int:
+        return self._server.stats['connections']
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return dict(self._server.stats)
+
+    def reset_stats(self):
+        with self._server.stats_lock:
+            self._server.stats.clear()
+
+    def start(self) -> 'MockGoAPIServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'MockGoAPIServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    from .cache import MarketDataCache
+    from .data_engine import GoAPILoader
+
+    # Two identical runs against the stand-in: the second should be served from disk
+    with MockGoAPIServer() as server, tempfile.TemporaryDirectory() as tmp:
+        cache = MarketDataCache(os.path.join(tmp, 'cache.sqlite'))
+        loader = GoAPILoader(base_url=server.base_url, cache=cache)
+        dates = [(datetime.now() - timedelta(days=d)).strftime("%Y-%m-%d") for d in range(1, 31)]
+
+        for run in (1, 2):
+            server.reset_stats()
+            cache.reset_stats()
+            for ticker in config.WATCHLIST:
+                loader.get_ohlcv(ticker, days=500)
+                for date in dates:
+                    loader.get_broker_summary(ticker, date=date)
+            print(
+                f"Run {run}: {server.request_count} API requests over {server.connection_count} connections "
+                f"| Cache hit rate: {cache.hit_rate():.1%}"
+            )
+        cache.close()
+
+        # Batched range fetch over the pooled session vs one call per date
+        server.reset_stats()
+        started = time.perf_counter()
+        GoAPILoader(base_url=server.base_url, use_cache=False).get_broker_summary_range(
+            'BBCA', from_date=dates[-1], to_date=dates[0]
+        )
+        print(
+            f"Range fetch: {server.request_count} requests over {server.connection_count} connections "
+            f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
@@ -0,0 +1,233 @@
+"""
+Monte Carlo Robustness Simulator for IndoQuantFund.
+Resamples the round trips of a backtest trade log into many alternative equity paths to
+estimate tail risk under the sizing rules of RiskGatekeeper.validate_entry:
+
+- Each closed round trip becomes an R-multiple: realized PnL / initial risk, where the
+  initial risk is (entry - initial stop) x initial shares. Pyramid adds count towards the PnL.
+- A path compounds fixed-fractional sizing trade by trade:
+      equity *= 1 + risk_pct * regime_multiplier * R
+  (risk_pct: BASE_RISK_PER_TRADE or AGGRESSIVE_RISK by conviction; regime_multiplier from
+  config.REGIME_MULTIPLIERS). Cash caps and overlapping positions are not modelled.
+- "bootstrap" draws trades with replacement; "shuffle" permutes the realized sequence
+  (same final equity, different drawdowns).
+- Sizing scenarios (SIZING_SCENARIOS) replay the same random draws with different rules,
+  so differences between them are not sampling noise.
+
+Paths are generated in NumPy blocks and sharded across a process pool. Each shard has a
+fixed size and its own seed, so results do not depend on the number of workers.
+"""
+
+import os
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from . import config
+from .risk_guard import MarketRegime
+
+SHARD_PATHS = 25_000   # Paths per pool task (and per seed)
+BLOCK_PATHS = 5_000    # Paths per vectorized block inside a shard
+DRAWDOWN_LEVELS = (0.10, 0.20, 0.30)
+
+def _as_traded(trades: pd.DataFrame) -> np.ndarray:
+    return (trades['risk_pct'] * trades['regime_multiplier']).to_numpy()
+
+SIZING_SCENARIOS: Dict[str, Callable[[pd.DataFrame], np.ndarray]] = {
+    'as_traded': _as_traded,
+    'no_regime_cut': lambda trades: trades['risk_pct'].to_numpy(),
+    'base_risk_only': lambda trades: (config.BASE_RISK_PER_TRADE * trades['regime_multiplier']).to_numpy(),
+    'aggressive_only': lambda trades: (config.AGGRESSIVE_RISK * trades['regime_multiplier']).to_numpy(),
+}
+
+def round_trips(trade_log: List[Dict], ihsg_data: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Closed round trips from a backtest / portfolio trade log (BUY, ADD..., SELL per ticker),
+    with their R-multiple and the sizing inputs at entry. Positions still open are skipped.
+    Without ihsg_data every entry counts as BULLISH.
+    """
+    regime = MarketRegime(ihsg_data) if ihsg_data is not None and not ihsg_data.empty else None
+    open_trades: Dict[str, Dict] = {}
+    rows = []
+
+    for trade in trade_log:
+        ticker = trade.get('ticker', '')
+        if trade['action'] == 'BUY':
+            entry, stop = trade['price'], trade.get('stop') or 0
+            if not 0 < stop < entry:
+                stop = entry * 0.95  # validate_entry's fallback risk width
+            open_trades[ticker] = {
+                'entry_date': trade['date'], 'entry': entry, 'shares': trade['shares'],
+                'cost': entry * trade['shares'], 'risk': (entry - stop) * trade['shares'],
+                'acc_ratio': trade.get('acc_ratio', 0),
+            }
+        elif trade['action'] == 'ADD' and ticker in open_trades:
+            position = open_trades[ticker]
+            position['shares'] += trade['shares']
+            position['cost'] += trade['price'] * trade['shares']
+        elif trade['action'] == 'SELL' and ticker in open_trades:
+            position = open_trades.pop(ticker)
+            pnl = trade['price'] * position['shares'] - position['cost']
+            entry_regime = regime.regime_at(position['entry_date']) if regime else "BULLISH"
+            rows.append({
+                'ticker': ticker,
+                'entry_date': position['entry_date'],
+                'exit_date': trade['date'],
+                'pnl_pct': pnl / position['cost'] * 100,
+                'r_multiple': pnl / position['risk'],
+                'risk_pct': config.AGGRESSIVE_RISK if position['acc_ratio'] > config.HIGH_CONVICTION_ACC_RATIO else config.BASE_RISK_PER_TRADE,
+                'regime': entry_regime,
+                'regime_multiplier': config.REGIME_MULTIPLIERS.get(entry_regime, 1.0),
+            })
+
+    return pd.DataFrame(rows, columns=['ticker', 'entry_date', 'exit_date', 'pnl_pct', 'r_multiple',
+                                       'risk_pct', 'regime', 'regime_multiplier'])
+
+def _simulate_shard(task) -> Dict[str, np.ndarray]:
+    """
+    Process-pool worker: `n_paths` paths for every scenario from one seed.
+    Returns per scenario a (3, n_paths) float32 array: final equity multiple, max drawdown, ruined flag.
+    """
+    r_multiples, fractions, n_paths, horizon, method, ruin_level, seed = task
+    rng = np.random.default_rng(seed)
+    n_trades = len(r_multiples)
+    log_ruin = np.log(ruin_level)
+    out = {name: np.empty((3, n_paths), dtype=np.float32) for name in fractions}
+
+    for start in range(0, n_paths, BLOCK_PATHS):
+        size = min(BLOCK_PATHS, n_paths - start)
+        if method == 'shuffle':
+            draws = rng.permuted(np.broadcast_to(np.arange(n_trades), (size, n_trades)), axis=1)
+        else:
+            draws = rng.integers(0, n_trades, size=(size, horizon))
+        r = r_multiples[draws]
+
+        for name, fraction in fractions.items():
+            # A trade losing more than the whole account floors equity near zero instead of going negative
+            log_equity = np.cumsum(np.log(np.maximum(1.0 + fraction[draws] * r, 1e-12)), axis=1)
+            peak = np.maximum(np.maximum.accumulate(log_equity, axis=1), 0.0)
+            block = out[name][:, start:start + size]
+            block[0] = np.exp(log_equity[:, -1])
+            block[1] = 1.0 - np.exp((log_equity - peak).min(axis=1))
+            block[2] = log_equity.min(axis=1) <= log_ruin
+
+    return out
+
+class MonteCarloResult:
+    def __init__(self, trades: pd.DataFrame, paths: Dict[str, np.ndarray], method: str, horizon: int,
+                 ruin_level: float, elapsed: float):
+        self.trades = trades
+        self.paths = paths        # scenario -> (3, n_paths): final multiple, max drawdown, ruined
+        self.method = method
+        self.horizon = horizon
+        self.ruin_level = ruin_level
+        self.elapsed = elapsed
+
+    @property
+    def n_paths(self) -> int:
+        return next(iter(self.paths.values())).shape[1]
+
+    def final_returns(self, scenario: str = 'as_traded') -> np.ndarray:
+        return self.paths[scenario][0] - 1.0
+
+    def max_drawdowns(self, scenario: str = 'as_traded') -> np.ndarray:
+        return self.paths[scenario][1]
+
+    def summary(self) -> pd.DataFrame:
+        """
+        One row per sizing scenario: return and max-drawdown percentiles, risk of ruin and
+        the probability of drawdowns beyond DRAWDOWN_LEVELS.
+        """
+        rows = {}
+        for name, (final, drawdown, ruined) in self.paths.items():
+            returns = final - 1.0
+            row = {
+                'return_p5': np.percentile(returns, 5),
+                'return_median': np.median(returns),
+                'return_p95': np.percentile(returns, 95),
+                'prob_loss': (returns < 0).mean(),
+                'max_dd_median': np.median(drawdown),
+                'max_dd_p95': np.percentile(drawdown, 95),
+                'max_dd_p99': np.percentile(drawdown, 99),
+                'risk_of_ruin': ruined.mean(),
+            }
+            row.update({f"prob_dd_over_{int(level * 100)}": (drawdown > level).mean() for level in DRAWDOWN_LEVELS})
+            rows[name] = row
+        return pd.DataFrame.from_dict(rows, orient='index').rename_axis('scenario')
+
+    def drawdown_distribution(self, bins: int = 20) -> pd.DataFrame:
+        """
+        Histogram of max drawdowns per scenario on shared bins (fraction of paths per bin).
+        """
+        top = max(float(p[1].max()) for p in self.paths.values()) or 1.0
+        edges = np.linspace(0.0, top, bins + 1)
+        table = {name: np.histogram(p[1], bins=edges)[0] / p.shape[1] for name, p in self.paths.items()}
+        index = pd.IntervalIndex.from_breaks(edges.round(4), name='max_drawdown')
+        return pd.DataFrame(table, index=index)
+
+    def print_report(self):
+        print(f"\n{'='*30} MONTE CARLO {'='*30}")
+        print(f"{len(self.trades)} round trips | {self.n_paths:,} {self.method} paths x {self.horizon} trades | {self.elapsed:.2f}s")
+        regimes = self.trades['regime'].value_counts().to_dict()
+        print(f"Mean R: {self.trades['r_multiple'].mean():.2f} | Win rate: {(self.trades['r_multiple'] > 0).mean() * 100:.1f}% | Entries by regime: {regimes}")
+        print(f"Ruin = equity touching {self.ruin_level:.0%} of the start\n")
+        print(self.summary().to_string(float_format=lambda x: f"{x:.4f}"))
+
+def run_monte_carlo(
+    trades: pd.DataFrame,
+    n_paths: int = config.MONTE_CARLO_PATHS,
+    method: str = 'bootstrap',
+    horizon: Optional[int] = None,
+    scenarios: Optional[List[str]] = None,
+    ruin_level: float = config.MONTE_CARLO_RUIN_LEVEL,
+    seed: int = config.MONTE_CARLO_SEED,
+    max_workers: Optional[int] = None
+) -> MonteCarloResult:
+    """
+    Simulates `n_paths` equity paths from the round trips in `trades` (see round_trips).
+    method: "bootstrap" (draw `horizon` trades with replacement, default = number of trades)
+            or "shuffle" (permute the realized trades).
+    """
+    if method not in ('bootstrap', 'shuffle'):
+        raise ValueError(f"Unknown method '{method}'. Use 'bootstrap' or 'shuffle'.")
+    if trades.empty:
+        raise ValueError("No closed round trips to resample.")
+
+    started = time.perf_counter()
+    horizon = len(trades) if method == 'shuffle' else (horizon or len(trades))
+    scenarios = scenarios or list(SIZING_SCENARIOS)
+    r_multiples = trades['r_multiple'].to_numpy(dtype=float)
+    fractions = {name: SIZING_SCENARIOS[name](trades).astype(float) for name in scenarios}
+
+    shard_sizes = [min(SHARD_PATHS, n_paths - start) for start in range(0, n_paths, SHARD_PATHS)]
+    seeds = np.random.SeedSequence(seed).spawn(len(shard_sizes))
+    tasks = [(r_multiples, fractions, size, horizon, method, ruin_level, s) for size, s in zip(shard_sizes, seeds)]
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(tasks) == 1:
+        shards = list(map(_simulate_shard, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(tasks))) as pool:
+            shards = list(pool.map(_simulate_shard, tasks))
+
+    paths = {name: np.concatenate([shard[name] for shard in shards], axis=1) for name in scenarios}
+    return MonteCarloResult(trades, paths, method, horizon, ruin_level, time.perf_counter() - started)
+
+def simulate_backtest(result: Dict, **kwargs) -> MonteCarloResult:
+    """
+    run_monte_carlo over a run_backtest / run_portfolio_backtest result.
+    """
+    return run_monte_carlo(round_trips(result['trade_log'], result.get('ihsg_data')), **kwargs)
+
+if __name__ == "__main__":
+    from .portfolio_backtest import run_portfolio_backtest
+
+    # Monte Carlo over the watchlist portfolio backtest
+    result = run_portfolio_backtest(config.WATCHLIST)
+    if result:
+        mc = simulate_backtest(result)
+        mc.print_report()
+        print("\nMax drawdown distribution (as traded):")
+        print(mc.drawdown_distribution(bins=10)['as_traded'].to_string(float_format=lambda x: f"{x:.3f}"))
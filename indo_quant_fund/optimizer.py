@@ -0,0 +1,272 @@
+"""
+Parameter Sweep & Walk-Forward Optimizer for IndoQuantFund.
+Evaluates StrategyEngine thresholds (config.STRATEGY_PARAMS) plus the Chandelier ATR
+multiplier over a grid or random sample, fanned out over a process pool.
+
+Each worker holds an IndicatorCache per ticker, so a distinct indicator (e.g. one EMA span)
+is computed once and reused by every combination that needs it.
+"""
+
+import itertools
+import os
+import random
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import config
+from .backtest import START_INDEX, composite_index_for, walk_positions
+from .brain import StrategyEngine
+from .data_engine import GoAPILoader
+from .risk_guard import RiskGatekeeper
+from .utils import calculate_atr, calculate_bollinger_bands, calculate_ema
+
+DEFAULT_SEARCH_SPACE = {
+    'ema_fast': [20, 50, 100],
+    'ema_slow': [100, 150, 200],
+    'stage2_acc_ratio': [1.2, 1.5, 2.0],
+    'stage1_acc_ratio': [1.5, 2.0, 2.5],
+    'bb_squeeze': [0.10, 0.15, 0.20],
+    'near_low_mult': [1.10, 1.15, 1.25],
+    'atr_mult': [2.0, 3.0, 4.0],
+}
+
+METRIC_COLUMNS = ['total_return', 'sharpe', 'max_drawdown', 'win_rate', 'trades']
+
+class IndicatorCache:
+    """
+    Memoizes every indicator computed for one ticker, keyed by (name, *parameters).
+    """
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._store: Dict[Tuple, Any] = {}
+
+    def _get(self, key: Tuple, compute):
+        if key not in self._store:
+            self._store[key] = compute()
+        return self._store[key]
+
+    def ema(self, span: int) -> pd.Series:
+        return self._get(('ema', span), lambda: calculate_ema(self.df, span))
+
+    def bb_width(self, period: int = 20, std_dev: float = 2.0) -> pd.Series:
+        return self._get(('bb_width', period, std_dev), lambda: calculate_bollinger_bands(self.df, period, std_dev)[2])
+
+    def rolling_low(self, window: int = 252, min_periods: int = 50) -> pd.Series:
+        return self._get(('low', window, min_periods), lambda: self.df['low'].rolling(window=window, min_periods=min_periods).min())
+
+    def atr(self, period: int = 14) -> pd.Series:
+        return self._get(('atr', period), lambda: calculate_atr(self.df, period))
+
+    def signals(self, brain: StrategyEngine) -> Dict[str, Any]:
+        """
+        Columns `walk_positions` needs for one parameter set. Technical legs are memoized
+        on just the parameters they depend on.
+        """
+        p = brain.params
+
+        def frame() -> pd.DataFrame:
+            return pd.DataFrame({
+                'close': self.df['close'],
+                brain.ema_fast_col: self.ema(p['ema_fast']),
+                brain.ema_slow_col: self.ema(p['ema_slow']),
+                'BB_Width': self.bb_width(),
+                '52_Week_Low': self.rolling_low(),
+            })
+
+        stage2 = self._get(('stage2', p['ema_fast'], p['ema_slow']), lambda: brain.stage2_technical_signal(frame()).to_numpy())
+        stage1 = self._get(('stage1', p['bb_squeeze'], p['near_low_mult']), lambda: brain.stage1_technical_signal(frame()).to_numpy())
+
+        return {
+            'date': self._get(('date',), lambda: list(self.df['date'])),
+            'close': self._get(('close',), lambda: self.df['close'].to_numpy()),
+            'high': self._get(('high',), lambda: self.df['high'].to_numpy()),
+            'low': self._get(('low',), lambda: self.df['low'].to_numpy()),
+            'ATR': self.atr().to_numpy(),
+            'Stage2_Tech': stage2,
+            'Stage1_Tech': stage1,
+        }
+
+def param_grid(space: Dict[str, List]) -> List[Dict]:
+    """
+    Every combination of the search space, skipping EMA pairs where fast >= slow.
+    """
+    keys = list(space)
+    combos = [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+    return [c for c in combos if c.get('ema_fast', 0) < c.get('ema_slow', float('inf'))]
+
+def random_search(space: Dict[str, List], n_samples: int, seed: int = 42) -> List[Dict]:
+    """
+    Unique random sample of the grid (reproducible for a given seed).
+    """
+    combos = param_grid(space)
+    return random.Random(seed).sample(combos, min(n_samples, len(combos)))
+
+def _score(trade_log: List[Dict], portfolio_value: np.ndarray, start: int, end: int, initial_capital: float) -> Dict[str, float]:
+    equity = portfolio_value[start:end]
+    if len(equity) < 2:
+        return {'total_return': 0.0, 'sharpe': 0.0, 'max_drawdown': 0.0, 'win_rate': 0.0, 'trades': 0}
+
+    daily = np.diff(equity) / equity[:-1]
+    std = daily.std()
+    running_max = np.maximum.accumulate(equity)
+
+    buys = [t for t in trade_log if t['action'] == 'BUY']
+    sells = [t for t in trade_log if t['action'] == 'SELL']
+    wins = sum(1 for t in sells if t['pnl'] > 0)
+
+    return {
+        'total_return': equity[-1] / initial_capital - 1,
+        'sharpe': float(daily.mean() / std * np.sqrt(252)) if std > 0 else 0.0,
+        'max_drawdown': float(((equity - running_max) / running_max).min()),
+        'win_rate': wins / len(sells) if sells else 0.0,
+        'trades': len(buys),
+    }
+
+def _evaluate_task(task: Tuple) -> List[Dict]:
+    """
+    Process-pool worker: every (combo, window) pair for one ticker chunk.
+    """
+    ticker, df, broker_by_date, ihsg_data, combos, windows, initial_capital = task
+    cache = IndicatorCache(df)
+    dates = df['date'].to_numpy()
+    neutral = {'acc_ratio': 0, 'top_buyer': 'Unknown'}
+    rows = []
+
+    for combo_id, combo in combos:
+        params = {k: v for k, v in combo.items() if k != 'atr_mult'}
+        brain = StrategyEngine(params)
+        risk = RiskGatekeeper(initial_capital, atr_multiplier=combo.get('atr_mult', config.CHANDELIER_ATR_MULT))
+        signals = cache.signals(brain)
+
+        for window_id, (start_date, end_date) in windows:
+            start = max(START_INDEX, int(np.searchsorted(dates, np.datetime64(start_date))))
+            end = int(np.searchsorted(dates, np.datetime64(end_date), side='right'))
+            if end - start < 2:
+                continue
+
+            trade_log, portfolio_value = walk_positions(
+                ticker, signals,
+                broker_lookup=lambda d: broker_by_date.get(d, neutral),
+                ihsg_data=ihsg_data,
+                brain=brain, risk=risk, initial_capital=initial_capital,
+                start=start, end=end, verbose=False
+            )
+            rows.append({
+                'ticker': ticker, 'combo_id': combo_id, 'window_id': window_id,
+                **_score(trade_log, portfolio_value, start, end, initial_capital)
+            })
+
+    return rows
+
+class ParameterSweep:
+    """
+    Loads data once (OHLCV + every historical broker summary, served from the cache after
+    the first run) and evaluates parameter combinations across a process pool.
+    """
+    def __init__(
+        self,
+        tickers: Optional[List[str]] = None,
+        days: int = 750,
+        initial_capital: float = 100_000_000,
+        max_workers: Optional[int] = None,
+        loader: Optional[GoAPILoader] = None
+    ):
+        self.tickers = list(tickers or config.WATCHLIST)
+        self.initial_capital = initial_capital
+        self.max_workers = max_workers or os.cpu_count() or 1
+        loader = loader or GoAPILoader(config.API_KEY)
+
+        data = loader.get_ohlcv_many(self.tickers, days=days)
+        self.data = {t: df for t, df in data.items() if not df.empty and len(df) >= START_INDEX}
+        self.tickers = [t for t in self.tickers if t in self.data]
+        self.broker = {
+            t: loader.get_broker_summary_range(t, dates=[d.strftime("%Y-%m-%d") for d in df['date'].iloc[START_INDEX:]])
+            for t, df in self.data.items()
+        }
+        self.calendar = pd.DatetimeIndex(sorted(set().union(*(set(df['date']) for df in self.data.values()))))
+        self.ihsg_data = composite_index_for(loader, pd.DataFrame({'date': self.calendar}))
+
+    def _evaluate(self, combos: List[Dict], windows: List[Tuple[int, Tuple]]) -> pd.DataFrame:
+        indexed = list(enumerate(combos))
+        chunks_per_ticker = max(1, -(-self.max_workers * 2 // max(1, len(self.tickers))))
+        chunk_size = max(1, -(-len(indexed) // chunks_per_ticker))
+
+        tasks = [
+            (t, self.data[t], self.broker[t], self.ihsg_data, indexed[i:i + chunk_size], windows, self.initial_capital)
+            for t in self.tickers
+            for i in range(0, len(indexed), chunk_size)
+        ]
+
+        if self.max_workers == 1:
+            results = map(_evaluate_task, tasks)
+            return pd.DataFrame([row for rows in results for row in rows])
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            return pd.DataFrame([row for rows in pool.map(_evaluate_task, tasks) for row in rows])
+
+    def _rank(self, results: pd.DataFrame, combos: List[Dict], rank_by: str) -> pd.DataFrame:
+        table = results.groupby('combo_id')[METRIC_COLUMNS].mean()
+        table['trades'] = results.groupby('combo_id')['trades'].sum()
+        params = pd.DataFrame(combos).rename_axis('combo_id')
+        table = params.join(table, how='inner').sort_values(rank_by, ascending=False)
+        table.insert(0, 'rank', range(1, len(table) + 1))
+        return table.reset_index()
+
+    def run(self, combos: List[Dict], rank_by: str = 'sharpe') -> pd.DataFrame:
+        """
+        Evaluates every combination over the full history and returns a ranked table
+        (metrics averaged across tickers, trades summed).
+        """
+        full = [(0, (self.calendar[0], self.calendar[-1]))]
+        return self._rank(self._evaluate(combos, full), combos, rank_by)
+
+    def walk_forward(self, combos: List[Dict], train_bars: int = 250, test_bars: int = 60, rank_by: str = 'sharpe') -> pd.DataFrame:
+        """
+        Rolling walk-forward: pick the best combination on each training window,
+        then score it out-of-sample on the following test window.
+        """
+        first = min(START_INDEX, len(self.calendar) - 1)
+        train_windows, test_windows = [], []
+        start = first
+        while start + train_bars + test_bars <= len(self.calendar):
+            window_id = len(train_windows)
+            train_windows.append((window_id, (self.calendar[start], self.calendar[start + train_bars - 1])))
+            test_windows.append((window_id, (self.calendar[start + train_bars], self.calendar[start + train_bars + test_bars - 1])))
+            start += test_bars
+
+        if not train_windows:
+            raise ValueError("History too short for the requested train/test window sizes.")
+
+        train = self._evaluate(combos, train_windows)
+        train_score = train.groupby(['window_id', 'combo_id'])[rank_by].mean()
+        best = train_score.groupby(level='window_id').idxmax()
+
+        # Score every chosen combination on every test window in one pass, keep the matching pairs
+        chosen_ids = sorted({combo_id for _, combo_id in best})
+        test = self._evaluate([combos[c] for c in chosen_ids], test_windows)
+        test['combo_id'] = test['combo_id'].map(dict(enumerate(chosen_ids)))
+        test_score = test.groupby(['window_id', 'combo_id'])[METRIC_COLUMNS].mean()
+
+        rows = []
+        for window_id, key in best.items():
+            combo_id = key[1]
+            _, (test_start, test_end) = test_windows[window_id]
+            metrics = test_score.loc[(window_id, combo_id)] if (window_id, combo_id) in test_score.index else {}
+            rows.append({
+                'window_id': window_id,
+                'train_start': train_windows[window_id][1][0],
+                'test_start': test_start,
+                'test_end': test_end,
+                **combos[combo_id],
+                f'train_{rank_by}': train_score.loc[key],
+                **{f'test_{m}': metrics[m] for m in METRIC_COLUMNS if m in metrics},
+            })
+
+        return pd.DataFrame(rows)
+
+if __name__ == "__main__":
+    sweep = ParameterSweep(config.WATCHLIST)
+    table = sweep.run(param_grid(DEFAULT_SEARCH_SPACE))
+    print(table.head(20).to_string(index=False))
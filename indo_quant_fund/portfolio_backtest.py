@@ -0,0 +1,284 @@
+"""
+Portfolio Backtesting Engine for IndoQuantFund.
+Simulates every ticker on one shared trading calendar with a single cash balance,
+sizing entries with RiskGatekeeper against real portfolio equity.
+
+Indicator precomputation is spread across a process pool (one ticker per task);
+the simulation itself walks precomputed (date x ticker) arrays. With a BarStore, workers
+receive only (store path, ticker) and read bars from the shared memory-mapped files.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from . import config
+from .backtest import START_INDEX, composite_index_for, precompute_signals
+from .bar_store import open_store
+from .brain import StrategyEngine
+from .checkpoint import BacktestCheckpoint
+from .data_engine import GoAPILoader
+from .fetcher import ConcurrentFetcher
+from .positions import PositionBook
+from .risk_guard import RiskGatekeeper
+from .run_store import RunStore, run_parameters
+
+SIGNAL_COLUMNS = ['close', 'high', 'low', 'ATR', 'Stage2_Tech', 'Stage1_Tech']
+
+def _precompute_ticker(item: Tuple[str, pd.DataFrame]) -> Tuple[str, pd.DataFrame]:
+    """
+    Process-pool worker: full-history indicators and technical signals for one ticker.
+    """
+    ticker, df = item
+    df = precompute_signals(df.copy(), StrategyEngine())
+    df['bar_index'] = np.arange(len(df))
+    return ticker, df[['date', 'bar_index'] + SIGNAL_COLUMNS]
+
+def _precompute_stored(item: Tuple[str, str]) -> Tuple[str, pd.DataFrame]:
+    """
+    Process-pool worker reading its ticker from the memory-mapped BarStore (no pickled frames).
+    """
+    store_path, ticker = item
+    return _precompute_ticker((ticker, open_store(store_path).frame(ticker)))
+
+def _map_tickers(worker, items: List, max_workers: Optional[int]) -> Dict[str, pd.DataFrame]:
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(items) < 2:
+        return dict(map(worker, items))
+
+    chunksize = max(1, len(items) // (max_workers * 4))
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return dict(pool.map(worker, items, chunksize=chunksize))
+
+def precompute_universe(data: Dict[str, pd.DataFrame], max_workers: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Runs `_precompute_ticker` for every ticker across a process pool.
+    """
+    return _map_tickers(_precompute_ticker, list(data.items()), max_workers)
+
+def precompute_stored(store_path: str, tickers: List[str], max_workers: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Same as precompute_universe, but every worker maps the BarStore at `store_path` itself.
+    """
+    return _map_tickers(_precompute_stored, [(store_path, t) for t in tickers], max_workers)
+
+def _build_panel(signals: Dict[str, pd.DataFrame], tickers: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Aligns per-ticker signal frames onto the union calendar as (date x ticker) arrays.
+    """
+    calendar = pd.DatetimeIndex(sorted(set().union(*(set(signals[t]['date']) for t in tickers))))
+    panel = {'dates': calendar}
+
+    for column in SIGNAL_COLUMNS + ['bar_index']:
+        wide = pd.concat(
+            {t: signals[t].set_index('date')[column] for t in tickers}, axis=1
+        ).reindex(index=calendar, columns=tickers)
+        panel[column] = wide
+
+    has_bar = panel['close'].notna().to_numpy()
+    eligible = has_bar & (panel['bar_index'].fillna(-1).to_numpy() >= START_INDEX)
+
+    return {
+        'dates': calendar,
+        'has_bar': has_bar,
+        'close': panel['close'].to_numpy(dtype=float),
+        'last_close': panel['close'].ffill().fillna(0.0).to_numpy(dtype=float),
+        'atr': panel['ATR'].to_numpy(dtype=float),
+        'high': panel['high'].to_numpy(dtype=float),
+        'low': panel['low'].to_numpy(dtype=float),
+        'stage2': panel['Stage2_Tech'].fillna(False).to_numpy(dtype=bool) & eligible,
+        'stage1': panel['Stage1_Tech'].fillna(False).to_numpy(dtype=bool) & eligible,
+    }
+
+def run_portfolio_backtest(
+    tickers: Optional[List[str]] = None,
+    initial_capital: float = config.INITIAL_CAPITAL,
+    days: int = 500,
+    max_workers: Optional[int] = None,
+    loader: Optional[GoAPILoader] = None,
+    store_path: Optional[str] = None,
+    save_run: bool = config.RUN_STORE_ENABLED,
+    resume: bool = config.CHECKPOINT_ENABLED
+):
+    """
+    Shared-capital backtest over many tickers.
+    Each day: trailing Chandelier exits on held tickers first, then entries for flat tickers whose
+    technical signal fires (validated and sized by RiskGatekeeper against current equity),
+    then pyramid adds to winners. Positions live in a shared PositionBook.
+    store_path: read bars from a BarStore (bar_store.py) instead of the loader; `days` is ignored.
+    save_run: persist the run to the RunStore (config.RUN_STORE_PATH); its ID is returned as 'run_id'.
+    resume: checkpoint the simulation (checkpoint.py) and continue an interrupted run on the same data.
+    Returns a result dict with the trade log and equity curve, or None if no ticker has enough data.
+    """
+    tickers = list(tickers or config.WATCHLIST)
+    print(f"\n🚀 STARTING PORTFOLIO BACKTEST: {len(tickers)} tickers, shared capital {initial_capital:,.0f}")
+
+    # 1. Setup
+    loader = loader or GoAPILoader(config.API_KEY)
+    brain = StrategyEngine()
+    risk = RiskGatekeeper(initial_capital)
+    fetcher = ConcurrentFetcher(loader)
+
+    checkpoint = None
+    window_end = None if store_path else pd.Timestamp.now().strftime("%Y-%m-%d")
+    if resume:
+        checkpoint = BacktestCheckpoint('portfolio', run_parameters(
+            brain.params, risk.atr_multiplier,
+            tickers=tickers, initial_capital=initial_capital,
+            days=None if store_path else days, store_path=store_path,
+        ))
+        # An interrupted run reloads the window it started on, so it resumes on later days too
+        window_end = checkpoint.window_end(window_end)
+
+    # 2. Data (I/O bound -> threads) + Indicators (CPU bound -> processes)
+    if store_path:
+        store = open_store(store_path)
+        bar_counts = {t: int(np.count_nonzero(store.row('close', t))) for t in tickers if t in store}
+        tickers = [t for t in tickers if bar_counts.get(t, 0) >= START_INDEX]
+    else:
+        data = loader.get_ohlcv_many(tickers, days=days, raise_on_rate_limit=True, end=window_end)
+        data = {t: df for t, df in data.items() if not df.empty and len(df) >= START_INDEX}
+        tickers = [t for t in tickers if t in data]
+
+    if not tickers:
+        print("⚠️  Not enough data for any ticker. Skipping.")
+        return
+
+    print(f"⏳ Precomputing indicators for {len(tickers)} tickers...")
+    if store_path:
+        signals = precompute_stored(store_path, tickers, max_workers)
+    else:
+        signals = precompute_universe(data, max_workers)
+    panel = _build_panel(signals, tickers)
+    ihsg_data = composite_index_for(loader, pd.DataFrame({'date': panel['dates']}))
+
+    # 3. Simulation over the shared calendar
+    dates = panel['dates']
+    book = PositionBook(initial_capital, atr_multiplier=risk.atr_multiplier)
+    shares_held = np.zeros(len(tickers), dtype=np.int64)  # mirror of the book for mark-to-market
+    portfolio_value = np.full(len(dates), float(initial_capital))
+    trade_log = []
+    resume_from = 0
+
+    if checkpoint is not None:
+        checkpoint.bind(window_end, panel['close'], panel['high'], panel['low'])
+        state = checkpoint.resume()
+        if state:
+            book, trade_log, resume_from = state['book'], state['trade_log'], state['next_index']
+            portfolio_value, shares_held = state['portfolio_value'].copy(), state['shares_held'].copy()
+            print(f"♻️  Resuming portfolio from checkpoint at day {resume_from}/{len(dates)}")
+
+    try:
+        for d in range(resume_from, len(dates)):
+            current_date = dates[d]
+            close = panel['close'][d]
+            held_at_open = shares_held > 0
+
+            # CABANG 1: SELL SIGNAL (Trailing Chandelier Exit) on held tickers trading today
+            pyramid = []
+            for j in np.flatnonzero(held_at_open & panel['has_bar'][d]):
+                ticker = tickers[j]
+                stop_price = book.update(ticker, current_date, panel['high'][d, j], panel['low'][d, j], close[j], atr=panel['atr'][d, j])
+                if close[j] < stop_price:
+                    trade = book.close(ticker, current_date, close[j])
+                    color_code = "🟢" if trade['pnl'] > 0 else "🔴"
+                    print(f"[{current_date.date()}] {color_code} SELL {ticker} @ {close[j]:,.0f} | Stop: {stop_price:,.0f} | PnL: {trade['pnl']:.2f}%")
+                    trade_log.append(trade)
+                    shares_held[j] = 0
+                elif book.pyramid_ready(ticker, close[j]):
+                    pyramid.append(j)
+
+            # CABANG 2: BUY SIGNAL on tickers flat at the open, then pyramid adds
+            candidates = np.flatnonzero(~held_at_open & (panel['stage2'][d] | panel['stage1'][d]))
+            if len(candidates) or pyramid:
+                date_str = current_date.strftime("%Y-%m-%d")
+                broker_by_ticker = dict(fetcher.iter_completed(
+                    [tickers[j] for j in candidates] + [tickers[j] for j in pyramid],
+                    fetch=lambda t: loader.get_broker_summary(t, date=date_str, raise_on_rate_limit=True)
+                ))
+
+                for j in candidates:
+                    ticker = tickers[j]
+                    broker_data = broker_by_ticker[ticker]
+                    signal = (
+                        (panel['stage2'][d, j] and brain.stage2_bandar_check(broker_data))
+                        or (panel['stage1'][d, j] and brain.stage1_bandar_check(broker_data))
+                    )
+                    if not signal:
+                        continue
+
+                    current_equity = book.cash + float(shares_held @ panel['last_close'][d])
+                    approved, reason, lots, sl = risk.validate_entry(
+                        ticker, close[j], book.cash, current_equity, ihsg_data,
+                        broker_data['acc_ratio'], broker_data['top_buyer'], panel['atr'][d, j],
+                        as_of=current_date
+                    )
+
+                    if approved and lots > 0:
+                        shares_bought = lots * 100
+                        if shares_bought * close[j] <= book.cash:
+                            book.open(ticker, current_date, close[j], shares_bought, sl, high=panel['high'][d, j])
+                            shares_held[j] = shares_bought
+                            trade_log.append({
+                                'date': current_date, 'ticker': ticker, 'action': 'BUY', 'price': close[j], 'shares': shares_bought,
+                                'stop': sl, 'acc_ratio': broker_data['acc_ratio']
+                            })
+                            print(f"[{current_date.date()}] 🟢 BUY  {ticker} @ {close[j]:,.0f} | {reason}")
+
+                for j in pyramid:
+                    ticker = tickers[j]
+                    broker_data = broker_by_ticker[ticker]
+                    approved, reason, lots = risk.validate_pyramid(
+                        book.get(ticker), close[j], book.cash, broker_data['acc_ratio'], broker_data['top_buyer']
+                    )
+                    if approved:
+                        book.add(ticker, current_date, close[j], lots * 100)
+                        shares_held[j] = book.shares(ticker)
+                        trade_log.append({
+                            'date': current_date, 'ticker': ticker, 'action': 'ADD', 'price': close[j], 'shares': lots * 100
+                        })
+                        print(f"[{current_date.date()}] 🔵 ADD  {ticker} @ {close[j]:,.0f} | {reason}")
+
+            # Track Value (mark-to-market at the last known close)
+            portfolio_value[d] = book.cash + float(shares_held @ panel['last_close'][d])
+            if checkpoint is not None:
+                checkpoint.tick(d + 1, book, trade_log, portfolio_value, shares_held=shares_held)
+    except BaseException:
+        # Rate limit, crash or Ctrl-C: save the last completed day so a rerun resumes from it
+        if checkpoint is not None:
+            checkpoint.flush()
+        raise
+
+    if checkpoint is not None:
+        checkpoint.clear()
+
+    # Summary Result
+    final_value = portfolio_value[-1]
+    profit = final_value - initial_capital
+    print(f"\n{'='*30}")
+    print(f"PORTFOLIO REPORT ({len(tickers)} tickers)")
+    print(f"Initial: {initial_capital:,.0f}")
+    print(f"Final  : {final_value:,.0f}")
+    print(f"Profit : {profit:,.0f} ({(profit/initial_capital)*100:.2f}%)")
+    print(f"Total Trades: {len([t for t in trade_log if t['action']=='BUY'])} (+{len([t for t in trade_log if t['action']=='ADD'])} pyramid adds)")
+    print(f"Open Positions: {len(book)}")
+    print(f"{'='*30}\n")
+
+    result = {
+        'tickers': tickers,
+        'initial_capital': initial_capital,
+        'final_value': final_value,
+        'trade_log': trade_log,
+        'equity': pd.DataFrame({'date': dates, 'portfolio_value': portfolio_value}),
+        'ihsg_data': ihsg_data,
+    }
+    if save_run:
+        params = run_parameters(brain.params, risk.atr_multiplier, days=None if store_path else days, store_path=store_path)
+        result['run_id'] = RunStore().save(result, params)
+        print(f"💾 Run saved: {result['run_id']}")
+    return result
+
+if __name__ == "__main__":
+    run_portfolio_backtest(config.WATCHLIST)
@@ -0,0 +1,233 @@
+"""
+Position Book for IndoQuantFund.
+Open positions (entries, shares, trailing stop, highest high since entry) plus cash,
+shared by the live scanner (main.py) and the backtesters.
+
+- Stops trail in O(1) per bar: highest high since entry minus ATR * CHANDELIER_ATR_MULT,
+  ratcheting up only (never loosened). ATR comes from the caller (precomputed in backtests)
+  or from the position's own StreamingATR (live), so a scan re-checks stops from the
+  new bars alone instead of refetching full histories. A bar still forming (today's, in a
+  live scan) is only peeked, never committed.
+- Pyramiding: a position becomes eligible for an add once price is PYRAMID_TRIGGER_GAIN
+  above its last entry (RiskGatekeeper.validate_pyramid sizes and approves it).
+- The book persists as JSON (atomic replace) between live runs.
+"""
+
+import json
+import os
+import pandas as pd
+from typing import Any, Dict, List, Optional
+
+from . import config
+from .utils import StreamingATR
+
+class Position:
+    def __init__(
+        self,
+        ticker: str,
+        entry_date: Any,
+        entry_price: float,
+        shares: int,
+        stop: float,
+        strategy: Optional[str] = None,
+        atr_state: Optional[StreamingATR] = None,
+        high: Optional[float] = None
+    ):
+        self.ticker = ticker
+        self.entries: List[Dict[str, Any]] = [{'date': entry_date, 'price': float(entry_price), 'shares': int(shares)}]
+        self.shares = int(shares)
+        self.cost = float(entry_price) * shares
+        self.stop = float(stop)
+        # Chandelier anchor: the entry bar's high (the close when the bar is unknown)
+        self.highest_high = float(entry_price if high is None else high)
+        self.last_date = entry_date
+        self.last_close = float(entry_price)
+        self.strategy = strategy
+        self.atr = atr_state
+
+    @property
+    def avg_price(self) -> float:
+        return self.cost / self.shares if self.shares else 0.0
+
+    @property
+    def initial_shares(self) -> int:
+        return self.entries[0]['shares']
+
+    @property
+    def last_entry_price(self) -> float:
+        return self.entries[-1]['price']
+
+    @property
+    def adds(self) -> int:
+        return len(self.entries) - 1
+
+    def update(self, date: Any, high: float, low: float, close: float, atr: Optional[float], atr_multiplier: float) -> float:
+        """
+        One completed bar. Bars on or before the last seen date are ignored, so re-feeding
+        an overlapping window is safe. Returns the current stop.
+        """
+        if date <= self.last_date:
+            return self.stop
+
+        if self.atr is not None:
+            streamed = self.atr.update(high, low, close)
+            atr = streamed if atr is None else atr
+
+        self.highest_high = max(self.highest_high, float(high))
+        if atr is not None and atr == atr:
+            self.stop = max(self.stop, self.highest_high - atr * atr_multiplier)
+        self.last_date = date
+        self.last_close = float(close)
+        return self.stop
+
+    def peek(self, high: float, low: float, close: float, atr: Optional[float], atr_multiplier: float) -> float:
+        """
+        The stop update() would return for a bar that is still forming, without committing it.
+        """
+        if self.atr is not None:
+            streamed = self.atr.peek(high, low, close)
+            atr = streamed if atr is None else atr
+
+        if atr is None or atr != atr:
+            return self.stop
+        return max(self.stop, max(self.highest_high, float(high)) - atr * atr_multiplier)
+
+    def add(self, date: Any, price: float, shares: int):
+        self.entries.append({'date': date, 'price': float(price), 'shares': int(shares)})
+        self.shares += int(shares)
+        self.cost += float(price) * shares
+        self.last_close = float(price)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'ticker': self.ticker,
+            'entries': [{**e, 'date': pd.Timestamp(e['date']).isoformat()} for e in self.entries],
+            'stop': self.stop,
+            'highest_high': self.highest_high,
+            'last_date': pd.Timestamp(self.last_date).isoformat(),
+            'last_close': self.last_close,
+            'strategy': self.strategy,
+            'atr': self.atr.to_dict() if self.atr is not None else None,
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'Position':
+        first, *rest = state['entries']
+        atr = StreamingATR.from_dict(state['atr']) if state.get('atr') else None
+        obj = cls(state['ticker'], pd.Timestamp(first['date']), first['price'], first['shares'], state['stop'], state.get('strategy'), atr)
+        for entry in rest:
+            obj.add(pd.Timestamp(entry['date']), entry['price'], entry['shares'])
+        obj.highest_high = state['highest_high']
+        obj.last_date = pd.Timestamp(state['last_date'])
+        obj.last_close = state['last_close']
+        return obj
+
+class PositionBook:
+    def __init__(self, cash: float = config.INITIAL_CAPITAL, atr_multiplier: float = config.CHANDELIER_ATR_MULT):
+        self.cash = float(cash)
+        self.atr_multiplier = atr_multiplier
+        self.positions: Dict[str, Position] = {}
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.positions
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def get(self, ticker: str) -> Optional[Position]:
+        return self.positions.get(ticker)
+
+    def shares(self, ticker: str) -> int:
+        position = self.positions.get(ticker)
+        return position.shares if position else 0
+
+    def market_value(self, prices: Optional[Dict[str, float]] = None) -> float:
+        """
+        Marked at `prices` where given, else at each position's last seen close.
+        """
+        prices = prices or {}
+        return sum(p.shares * prices.get(t, p.last_close) for t, p in self.positions.items())
+
+    def equity(self, prices: Optional[Dict[str, float]] = None) -> float:
+        return self.cash + self.market_value(prices)
+
+    # --- Trading -----------------------------------------------------------
+
+    def open(self, ticker: str, date: Any, price: float, shares: int, stop: float,
+             strategy: Optional[str] = None, atr_state: Optional[StreamingATR] = None,
+             high: Optional[float] = None) -> Position:
+        """
+        high: the entry bar's high, where the trailing stop starts from.
+        """
+        position = Position(ticker, date, price, shares, stop, strategy, atr_state, high)
+        self.positions[ticker] = position
+        self.cash -= price * shares
+        return position
+
+    def add(self, ticker: str, date: Any, price: float, shares: int) -> Position:
+        position = self.positions[ticker]
+        position.add(date, price, shares)
+        self.cash -= price * shares
+        return position
+
+    def close(self, ticker: str, date: Any, price: float) -> Dict[str, Any]:
+        """
+        Sells the whole position. Returns the trade record (PnL against the average cost).
+        """
+        position = self.positions.pop(ticker)
+        self.cash += position.shares * price
+        return {
+            'date': date, 'ticker': ticker, 'action': 'SELL', 'price': price, 'shares': position.shares,
+            'pnl': (price - position.avg_price) / position.avg_price * 100, 'stop': position.stop,
+        }
+
+    def update(self, ticker: str, date: Any, high: float, low: float, close: float, atr: Optional[float] = None) -> float:
+        return self.positions[ticker].update(date, high, low, close, atr, self.atr_multiplier)
+
+    def peek(self, ticker: str, high: float, low: float, close: float, atr: Optional[float] = None) -> float:
+        return self.positions[ticker].peek(high, low, close, atr, self.atr_multiplier)
+
+    def pyramid_ready(self, ticker: str, price: float) -> bool:
+        """
+        Profitable enough for another add: price >= last entry * (1 + PYRAMID_TRIGGER_GAIN)
+        and fewer than PYRAMID_MAX_ADDS adds so far.
+        """
+        position = self.positions.get(ticker)
+        return (
+            config.PYRAMID_ENABLED and position is not None
+            and position.adds < config.PYRAMID_MAX_ADDS
+            and price >= position.last_entry_price * (1 + config.PYRAMID_TRIGGER_GAIN)
+        )
+
+    # --- Persistence -------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'cash': self.cash,
+            'atr_multiplier': self.atr_multiplier,
+            'positions': [p.to_dict() for p in self.positions.values()],
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'PositionBook':
+        book = cls(state['cash'], state.get('atr_multiplier', config.CHANDELIER_ATR_MULT))
+        for item in state['positions']:
+            position = Position.from_dict(item)
+            book.positions[position.ticker] = position
+        return book
+
+    def save(self, path: str = config.POSITION_BOOK_FILE):
+        tmp_file = f"{path}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_file, path)
+
+    @classmethod
+    def load(cls, path: str = config.POSITION_BOOK_FILE, cash: float = config.INITIAL_CAPITAL) -> 'PositionBook':
+        """
+        The saved book, or a fresh one holding only `cash` if none exists yet.
+        """
+        if not os.path.exists(path):
+            return cls(cash)
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
@@ -4,40 +4,116 @@ The Risk Guard (Gatekeeper)
 "200 IQ" Logic involving Market Regime filtering and Dynamic Position Sizing.
 """
 
+import numpy as np
 import pandas as pd
-from typing import Tuple, Optional
-from utils import calculate_ema, calculate_atr, round_to_tick
-import config
+from typing import Any, Sequence, Tuple, Optional
+from .utils import calculate_ema, calculate_atr, round_to_tick, round_to_tick_array
+from . import config
+from .brokers import RETAIL, broker_registry
+from .instrumentation import metrics
+
+def regime_series(ihsg_data: pd.DataFrame, period: int = config.IHSG_REGIME_EMA) -> pd.DataFrame:
+    """
+    IHSG bars sorted by date with EMA_<period> and 'regime' per bar: fewer than `period`
+    bars so far, or Close < EMA -> DEFENSIVE, else BULLISH.
+    """
+    df = ihsg_data.sort_values('date').reset_index(drop=True)
+    ema = calculate_ema(df, period, column='close')
+    has_history = np.arange(1, len(df) + 1) >= period
+    bullish = has_history & (df['close'] >= ema).to_numpy()
+    df[f'EMA_{period}'] = ema
+    df['regime'] = np.where(bullish, "BULLISH", "DEFENSIVE")
+    return df
+
+class MarketRegime:
+    """
+    IHSG regime series computed once per index frame (see regime_series); frames from
+    GoAPILoader.get_composite_index already carry it and are used as-is.
+    regime_at(date) is an O(1) lookup; non-trading dates resolve to the previous index bar.
+    The series is rebuilt only when update() sees different index bars.
+    """
+    def __init__(self, ihsg_data: pd.DataFrame, period: int = config.IHSG_REGIME_EMA):
+        self.period = period
+        self._signature = None
+        self.update(ihsg_data)
+
+    @staticmethod
+    def _signature_of(ihsg_data: pd.DataFrame) -> Tuple:
+        if ihsg_data.empty:
+            return (0,)
+        last = ihsg_data.iloc[-1]
+        return (len(ihsg_data), ihsg_data.iloc[0]['date'], last['date'], last['close'])
+
+    def update(self, ihsg_data: pd.DataFrame) -> bool:
+        """
+        Invalidates and recomputes the series if the index bars changed. Returns True if rebuilt.
+        """
+        signature = self._signature_of(ihsg_data)
+        if signature == self._signature:
+            return False
+
+        if 'regime' in ihsg_data.columns and f'EMA_{self.period}' in ihsg_data.columns:
+            df = ihsg_data
+        else:
+            df = regime_series(ihsg_data[['date', 'close']], self.period)
+
+        self.dates = pd.to_datetime(df['date']).dt.normalize().to_numpy(dtype='datetime64[ns]')
+        self.regimes = df['regime'].to_numpy(dtype=str) if len(df) else np.array([], dtype=str)
+        self._by_date = dict(zip(self.dates.astype(np.int64).tolist(), self.regimes.tolist()))
+        self._signature = signature
+        return True
+
+    @property
+    def latest(self) -> str:
+        return str(self.regimes[-1]) if len(self.regimes) else "DEFENSIVE"
+
+    def regime_at(self, date: Any) -> str:
+        key = np.datetime64(pd.Timestamp(date).normalize(), 'ns')
+        regime = self._by_date.get(int(key.astype(np.int64)))
+        if regime is not None:
+            return regime
+
+        # Between index bars (holiday / weekend): use the last bar on or before the date
+        i = int(np.searchsorted(self.dates, key, side='right')) - 1
+        return str(self.regimes[i]) if i >= 0 else "DEFENSIVE"
 
 class RiskGatekeeper:
-    def __init__(self, initial_capital: float = config.INITIAL_CAPITAL):
+    def __init__(self, initial_capital: float = config.INITIAL_CAPITAL, atr_multiplier: float = config.CHANDELIER_ATR_MULT):
         self.max_capital = initial_capital
-        
-    def check_market_regime(self, ihsg_data: pd.DataFrame) -> str:
+        self.atr_multiplier = atr_multiplier
+        self.brokers = broker_registry()
+        self._regime: Optional[MarketRegime] = None
+
+    def market_regime(self, ihsg_data: pd.DataFrame) -> MarketRegime:
+        """
+        Session-level regime service; recomputed only when new index bars arrive.
+        """
+        if self._regime is None:
+            self._regime = MarketRegime(ihsg_data)
+        else:
+            self._regime.update(ihsg_data)
+        return self._regime
+
+    @metrics.timed('risk.check_market_regime')
+    def check_market_regime(self, ihsg_data: pd.DataFrame, as_of: Any = None) -> str:
         """
         Determines the broad market health using the Composite Index (IHSG).
         Logic: If IHSG Close < EMA(200) -> DEFENSIVE (Bearish/Correction).
+        as_of: point-in-time date (backtests); defaults to the latest index bar.
+        Does not modify ihsg_data.
         """
-        if len(ihsg_data) < 200:
-            # Default to slightly cautious if not enough data
-            return "DEFENSIVE"
-            
-        ihsg_data['EMA_200'] = calculate_ema(ihsg_data, 200, column='close')
-        current = ihsg_data.iloc[-1]
-        
-        if current['close'] < current['EMA_200']:
-            return "DEFENSIVE"
-        else:
-            return "BULLISH"
+        regime = self.market_regime(ihsg_data)
+        return regime.regime_at(as_of) if as_of is not None else regime.latest
 
     def calculate_chandelier_stop(self, entry_price: float, atr_value: float) -> int:
         """
         Calculates the initial Stop Loss using Chandelier Exit logic.
-        Formula: Entry - (ATR * 3.0)
+        Formula: Entry - (ATR * 3.0)   (multiplier from config.CHANDELIER_ATR_MULT)
         """
-        raw_stop = entry_price - (atr_value * 3.0)
+        raw_stop = entry_price - (atr_value * self.atr_multiplier)
         return round_to_tick(raw_stop)
 
+    @metrics.timed('risk.validate_entry')
     def validate_entry(
         self, 
         ticker: str,
@@ -47,7 +123,8 @@ class RiskGatekeeper:
         ihsg_data: pd.DataFrame, 
         bandar_ratio: float,
         top_buyer: str,
-        atr_value: float
+        atr_value: float,
+        as_of: Any = None
     ) -> Tuple[bool, str, int, int]:
         """
         Completes a rigorous multi-factor check before approving a trade.
@@ -58,23 +135,23 @@ class RiskGatekeeper:
         3. Dynamic Sizing based on Conviction (Bandar Ratio).
         4. Cash Sufficiency Check.
         
+        as_of: point-in-time date for the regime lookup (backtests); defaults to the latest IHSG bar.
+        
         Returns:
             (Approved_Bool, Reason, Lot_Size, Stop_Loss_Price)
         """
         
         # 1. Bad Actor Filter
-        if top_buyer in config.RETAIL_CROWD:
+        if top_buyer in self.brokers.retail_crowd:
             return False, f"REJECTED: Top Buyer {top_buyer} is Retail Crowd.", 0, 0
             
         # 2. Market Regime Check
-        regime = self.check_market_regime(ihsg_data)
-        regime_multiplier = 1.0
-        if regime == "DEFENSIVE":
-            regime_multiplier = 0.5  # Cut size by 50% in bad markets
+        regime = self.check_market_regime(ihsg_data, as_of=as_of)
+        regime_multiplier = config.REGIME_MULTIPLIERS.get(regime, 1.0)  # DEFENSIVE cuts size by 50%
             
         # 3. Dynamic Position Sizing (Kelly-ish)
         # Determine Risk Percentage
-        if bandar_ratio > 2.5:
+        if bandar_ratio > config.HIGH_CONVICTION_ACC_RATIO:
             # High Conviction Setup
             risk_pct = config.AGGRESSIVE_RISK # 3.0%
         else:
@@ -114,8 +191,138 @@ class RiskGatekeeper:
 
         approval_msg = (
             f"APPROVED: {regime} Market. "
-            f"Conviction: {'HIGH' if bandar_ratio > 2.5 else 'NORMAL'}. "
+            f"Conviction: {'HIGH' if bandar_ratio > config.HIGH_CONVICTION_ACC_RATIO else 'NORMAL'}. "
             f"Risk: {risk_pct*100}%. Size: {num_lots} Lots."
         )
         
         return True, approval_msg, num_lots, stop_loss_price
+
+    @metrics.timed('risk.validate_entries')
+    def validate_entries(
+        self,
+        tickers: Sequence[str],
+        entry_prices: Sequence[float],
+        atr_values: Sequence[float],
+        bandar_ratios: Sequence[float],
+        top_buyers: Sequence[str],
+        cash_balance: float,
+        current_equity: float,
+        ihsg_data: pd.DataFrame,
+        as_of: Any = None
+    ) -> pd.DataFrame:
+        """
+        Batch validate_entry for many candidates that compete for the same cash.
+        
+        Steps:
+        1. Market Regime Filter (one lookup for the whole batch).
+        2. Bad Actor Filter, stops and lots for every candidate in one vectorized pass
+           (same rules as validate_entry; a missing ATR falls back to the 5% risk width).
+        3. Cash Allocation by conviction ranking (highest Acc Ratio first, ties in input order):
+           candidates are funded in full while cash lasts, the rest are capped to what is left.
+        
+        Returns:
+            DataFrame indexed by ticker, in input order: approved, reason, lots, stop_loss,
+            risk_pct and rank (0 = funded first).
+        """
+        tickers = list(tickers)
+        prices = np.asarray(entry_prices, dtype=np.float64)
+        atrs = np.asarray(atr_values, dtype=np.float64)
+        ratios = np.asarray(bandar_ratios, dtype=np.float64)
+        buyers = np.asarray(top_buyers, dtype=str)
+        n = len(tickers)
+
+        # 1. Market Regime Check
+        regime = self.check_market_regime(ihsg_data, as_of=as_of)
+        regime_multiplier = config.REGIME_MULTIPLIERS.get(regime, 1.0)
+
+        # 2. Bad Actor Filter + Sizing
+        retail = self.brokers.classify(self.brokers.encode(buyers)) == RETAIL if n else np.zeros(0, dtype=bool)
+        high_conviction = ratios > config.HIGH_CONVICTION_ACC_RATIO
+        risk_pct = np.where(high_conviction, config.AGGRESSIVE_RISK, config.BASE_RISK_PER_TRADE)
+        risk_amount = current_equity * risk_pct * regime_multiplier
+
+        raw_stop = prices - atrs * self.atr_multiplier
+        stop_loss = round_to_tick_array(np.where(np.isfinite(raw_stop), raw_stop, prices))
+        risk_per_share = prices - stop_loss
+        fallback = risk_per_share <= 0
+        risk_per_share = np.where(fallback, prices * 0.05, risk_per_share)
+        stop_loss = np.where(fallback, round_to_tick_array(prices - risk_per_share), stop_loss)
+
+        lots = (risk_amount / risk_per_share).astype(np.int64) // 100
+        sized = ~retail & (lots > 0)
+
+        # 3. Cash Allocation: the fully funded prefix in one cumsum, then cap the remainder greedily
+        order = np.argsort(-ratios, kind='stable')
+        rank = np.empty(n, dtype=np.int64)
+        rank[order] = np.arange(n)
+        queue = order[sized[order]]
+        lot_cost = 100 * prices
+        spend = np.cumsum(lots[queue] * lot_cost[queue])
+        funded = int(np.searchsorted(spend, cash_balance, side='right'))
+
+        granted = np.zeros(n, dtype=np.int64)
+        granted[queue[:funded]] = lots[queue[:funded]]
+        cash = cash_balance - (spend[funded - 1] if funded else 0.0)
+        for i in queue[funded:]:
+            affordable = min(int(lots[i]), int(cash // lot_cost[i]))
+            if affordable >= 1:
+                granted[i] = affordable
+                cash -= affordable * lot_cost[i]
+
+        approved = granted > 0
+        reasons = []
+        for i in range(n):
+            if retail[i]:
+                reasons.append(f"REJECTED: Top Buyer {buyers[i]} is Retail Crowd.")
+            elif not sized[i]:
+                reasons.append("REJECTED: Calculated position size is 0.")
+            elif not approved[i]:
+                reasons.append("REJECTED: Insufficient Cash.")
+            else:
+                reasons.append(
+                    f"APPROVED: {regime} Market. "
+                    f"Conviction: {'HIGH' if high_conviction[i] else 'NORMAL'}. "
+                    f"Risk: {float(risk_pct[i])*100}%. Size: {granted[i]} Lots."
+                )
+
+        return pd.DataFrame({
+            'approved': approved,
+            'reason': reasons,
+            'lots': granted,
+            'stop_loss': np.where(approved, stop_loss, 0),
+            'risk_pct': risk_pct,
+            'rank': rank,
+        }, index=pd.Index(tickers, name='ticker'))
+
+    def validate_pyramid(
+        self,
+        position,
+        price: float,
+        cash_balance: float,
+        bandar_ratio: float,
+        top_buyer: str
+    ) -> Tuple[bool, str, int]:
+        """
+        Approves an add to a winning position (PositionBook.pyramid_ready already holds).
+        
+        Steps:
+        1. Bad Actor Filter (Retail Top Buyer).
+        2. Accumulation continues: Acc_Ratio > PYRAMID_MIN_ACC_RATIO.
+        3. Size: PYRAMID_ADD_FRACTION of the initial lots, capped by cash.
+        
+        Returns:
+            (Approved_Bool, Reason, Lot_Size)
+        """
+        if top_buyer in self.brokers.retail_crowd:
+            return False, f"REJECTED: Top Buyer {top_buyer} is Retail Crowd.", 0
+
+        if bandar_ratio <= config.PYRAMID_MIN_ACC_RATIO:
+            return False, f"REJECTED: Accumulation faded (Acc Ratio {bandar_ratio}).", 0
+
+        num_lots = int(position.initial_shares // 100 * config.PYRAMID_ADD_FRACTION)
+        num_lots = min(num_lots, int(cash_balance // (100 * price)))
+        if num_lots < 1:
+            return False, "REJECTED: Insufficient Cash.", 0
+
+        gain = (price / position.avg_price - 1) * 100
+        return True, f"APPROVED: PYRAMID +{gain:.1f}% vs avg cost, Acc Ratio {bandar_ratio}. Size: {num_lots} Lots.", num_lots
@@ -0,0 +1,206 @@
+"""
+Backtest Run Store for IndoQuantFund.
+Every backtest run persisted under its run ID as plain NumPy files:
+
+    <root>/<run_id>/dates.npy     datetime64[D]  (n_days,)   equity curve dates
+    <root>/<run_id>/equity.npy    float64        (n_days,)   portfolio value per day
+    <root>/<run_id>/trades.npz    compressed columns: date, ticker, action, price, shares, pnl, stop, acc_ratio
+    <root>/<run_id>/meta.json     parameters, headline numbers and trade counts
+
+Equity curves are uncompressed .npy so RunStore maps them (mmap_mode='r'): comparing
+hundreds of runs reads only their pages. metrics() scores many runs at once on one
+NaN-padded (run x day) matrix, with the same definitions as optimizer._score, using
+meta.json for trade counts so trades.npz is only opened when a run's trades are asked for.
+"""
+
+import json
+import os
+import shutil
+import uuid
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from . import config
+
+TRADE_COLUMNS = ('date', 'ticker', 'action', 'price', 'shares', 'pnl', 'stop', 'acc_ratio')
+
+def new_run_id(label: str = 'run') -> str:
+    return f"{label}-{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+def run_parameters(strategy_params: Dict[str, Any], atr_multiplier: float, **extra) -> Dict[str, Any]:
+    """
+    The settings a backtest result depends on, recorded next to it.
+    """
+    return {
+        **extra,
+        'strategy': strategy_params,
+        'risk': {
+            'atr_multiplier': atr_multiplier,
+            'base_risk_per_trade': config.BASE_RISK_PER_TRADE,
+            'aggressive_risk': config.AGGRESSIVE_RISK,
+            'high_conviction_acc_ratio': config.HIGH_CONVICTION_ACC_RATIO,
+            'regime_multipliers': config.REGIME_MULTIPLIERS,
+        },
+        'pyramid': {
+            'enabled': config.PYRAMID_ENABLED,
+            'trigger_gain': config.PYRAMID_TRIGGER_GAIN,
+            'min_acc_ratio': config.PYRAMID_MIN_ACC_RATIO,
+            'add_fraction': config.PYRAMID_ADD_FRACTION,
+            'max_adds': config.PYRAMID_MAX_ADDS,
+        },
+    }
+
+def _trade_columns(trade_log: List[Dict], ticker: str = '') -> Dict[str, np.ndarray]:
+    def column(key, default=np.nan):
+        return [t.get(key, default) for t in trade_log]
+
+    return {
+        'date': pd.to_datetime(column('date', None)).to_numpy(dtype='datetime64[D]') if trade_log else np.array([], dtype='datetime64[D]'),
+        'ticker': np.array(column('ticker', ticker), dtype=str),
+        'action': np.array(column('action'), dtype=str),
+        'price': np.array(column('price'), dtype=float),
+        'shares': np.array(column('shares', 0), dtype=np.int64),
+        'pnl': np.array(column('pnl'), dtype=float),
+        'stop': np.array(column('stop'), dtype=float),
+        'acc_ratio': np.array(column('acc_ratio'), dtype=float),
+    }
+
+class RunStore:
+    def __init__(self, root: str = config.RUN_STORE_PATH):
+        self.root = root
+
+    def _path(self, run_id: str, name: str = '') -> str:
+        return os.path.join(self.root, run_id, name)
+
+    def save(self, result: Dict, params: Optional[Dict[str, Any]] = None, run_id: Optional[str] = None) -> str:
+        """
+        Persists a run_backtest / run_portfolio_backtest result. Written to a temporary
+        directory and renamed into place, so readers never see a partial run.
+        """
+        ticker = result.get('ticker', '')
+        run_id = run_id or new_run_id(ticker or 'portfolio')
+        equity = result['equity']
+        trades = _trade_columns(result['trade_log'], ticker)
+        actions = trades['action']
+
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self._path(f".{run_id}.tmp")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        dates = pd.to_datetime(equity['date']).to_numpy(dtype='datetime64[D]')
+        np.save(os.path.join(tmp_path, 'dates.npy'), dates)
+        np.save(os.path.join(tmp_path, 'equity.npy'), equity['portfolio_value'].to_numpy(dtype=np.float64))
+        np.savez_compressed(os.path.join(tmp_path, 'trades.npz'), **trades)
+
+        meta = {
+            'run_id': run_id,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'ticker': ticker,
+            'tickers': result.get('tickers', [ticker] if ticker else []),
+            'mode': result.get('mode', 'portfolio'),
+            'initial_capital': float(result['initial_capital']),
+            'final_value': float(result['final_value']),
+            'start_date': str(dates[0]) if len(dates) else None,
+            'end_date': str(dates[-1]) if len(dates) else None,
+            'n_days': int(len(dates)),
+            'buys': int((actions == 'BUY').sum()),
+            'adds': int((actions == 'ADD').sum()),
+            'sells': int((actions == 'SELL').sum()),
+            'wins': int(((actions == 'SELL') & (trades['pnl'] > 0)).sum()),
+            'params': params or {},
+        }
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2, default=str)
+
+        shutil.rmtree(self._path(run_id), ignore_errors=True)
+        os.replace(tmp_path, self._path(run_id))
+        return run_id
+
+    # --- Reading -----------------------------------------------------------
+
+    def list_runs(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d for d in os.listdir(self.root)
+                      if not d.startswith('.') and os.path.exists(self._path(d, 'meta.json')))
+
+    def meta(self, run_id: str) -> Dict[str, Any]:
+        with open(self._path(run_id, 'meta.json')) as f:
+            return json.load(f)
+
+    def runs(self, run_ids: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        One row per run: meta.json without the nested parameters.
+        """
+        rows = [{k: v for k, v in self.meta(r).items() if k != 'params'} for r in (run_ids or self.list_runs())]
+        return pd.DataFrame(rows).set_index('run_id') if rows else pd.DataFrame()
+
+    def equity(self, run_id: str) -> pd.DataFrame:
+        return pd.DataFrame({
+            'date': pd.DatetimeIndex(np.load(self._path(run_id, 'dates.npy'))).as_unit('ns'),
+            'portfolio_value': np.load(self._path(run_id, 'equity.npy'), mmap_mode='r'),
+        })
+
+    def trades(self, run_id: str) -> pd.DataFrame:
+        with np.load(self._path(run_id, 'trades.npz')) as data:
+            frame = pd.DataFrame({c: data[c] for c in TRADE_COLUMNS})
+        frame['date'] = pd.DatetimeIndex(frame['date']).as_unit('ns')
+        return frame
+
+    def equity_matrix(self, run_ids: List[str]) -> np.ndarray:
+        """
+        (run x day) equity curves, left-aligned and NaN-padded to the longest run.
+        """
+        curves = [np.load(self._path(r, 'equity.npy'), mmap_mode='r') for r in run_ids]
+        matrix = np.full((len(curves), max((len(c) for c in curves), default=0)), np.nan)
+        for i, curve in enumerate(curves):
+            matrix[i, :len(curve)] = curve
+        return matrix
+
+    def metrics(self, run_ids: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        total_return, CAGR, Sharpe, max drawdown, win rate and trade count for many runs
+        at once (vectorized over the equity matrix; no simulation is re-run).
+        """
+        run_ids = run_ids or self.list_runs()
+        if not run_ids:
+            return pd.DataFrame()
+        meta = self.runs(run_ids)
+        equity = self.equity_matrix(run_ids)
+        initial = meta['initial_capital'].to_numpy(dtype=float)
+        lengths = meta['n_days'].to_numpy()
+        final = equity[np.arange(len(run_ids)), np.maximum(lengths - 1, 0)]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            daily = equity[:, 1:] / equity[:, :-1] - 1
+            mean, std = np.nanmean(daily, axis=1), np.nanstd(daily, axis=1)
+            running_max = np.fmax.accumulate(equity, axis=1)
+            drawdown = np.nanmin(equity / running_max - 1, axis=1)
+
+            span_days = (pd.to_datetime(meta['end_date']) - pd.to_datetime(meta['start_date'])).dt.days.to_numpy(dtype=float)
+            years = span_days / 365.25
+            total_return = final / initial - 1
+
+            return pd.DataFrame({
+                'ticker': meta['ticker'].to_numpy(),
+                'mode': meta['mode'].to_numpy(),
+                'total_return': total_return,
+                'cagr': np.where(years > 0, (final / initial) ** (1 / years) - 1, np.nan),
+                'sharpe': np.where(std > 0, mean / std * np.sqrt(252), 0.0),
+                'max_drawdown': drawdown,
+                'win_rate': np.where(meta['sells'] > 0, meta['wins'] / meta['sells'].where(meta['sells'] > 0), 0.0),
+                'trades': meta['buys'].to_numpy(),
+            }, index=meta.index)
+
+    def delete(self, run_id: str):
+        shutil.rmtree(self._path(run_id), ignore_errors=True)
+
+if __name__ == "__main__":
+    store = RunStore()
+    table = store.metrics()
+    print(f"📦 {len(table)} runs in {store.root}")
+    if len(table):
+        print(table.sort_values('sharpe', ascending=False).to_string(float_format=lambda x: f"{x:.4f}"))
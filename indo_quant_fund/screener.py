@@ -0,0 +1,88 @@
+"""
+Cross-Sectional Screener for IndoQuantFund.
+Screens the whole universe on one (bar x ticker) panel: indicators are computed
+column-wise in a single vectorized pass (StrategyEngine.panel_indicators) instead of
+one DataFrame per ticker, and broker summaries are fetched only for tickers whose
+technical leg fires.
+"""
+
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+from . import config
+from .brain import StrategyEngine
+from .broker_flow import BrokerFlow
+from .data_engine import GoAPILoader
+from .fetcher import ConcurrentFetcher
+
+class PricePanel:
+    """
+    Right-aligned (bar x ticker) close/high/low frames: row -1 holds each ticker's most
+    recent bar and shorter histories are NaN-padded at the top. `last_date` keeps each
+    ticker's own latest date, so stale (suspended) tickers can be spotted.
+    """
+    def __init__(self, close: pd.DataFrame, high: pd.DataFrame, low: pd.DataFrame, last_date: pd.Series):
+        self.close = close
+        self.high = high
+        self.low = low
+        self.last_date = last_date
+
+    @property
+    def tickers(self) -> List[str]:
+        return list(self.close.columns)
+
+    @classmethod
+    def from_frames(cls, data: Dict[str, pd.DataFrame]) -> 'PricePanel':
+        data = {t: df for t, df in data.items() if not df.empty}
+        tickers = list(data)
+        n_bars = max((len(df) for df in data.values()), default=0)
+
+        arrays = {col: np.full((n_bars, len(tickers)), np.nan) for col in ('close', 'high', 'low')}
+        for j, ticker in enumerate(tickers):
+            df = data[ticker]
+            for col, array in arrays.items():
+                array[n_bars - len(df):, j] = df[col].to_numpy(dtype=float)
+
+        frames = {col: pd.DataFrame(array, columns=tickers) for col, array in arrays.items()}
+        last_date = pd.Series([data[t]['date'].iloc[-1] for t in tickers], index=tickers, dtype='datetime64[ns]')
+        return cls(frames['close'], frames['high'], frames['low'], last_date)
+
+def screen_universe(
+    tickers: Optional[List[str]] = None,
+    loader: Optional[GoAPILoader] = None,
+    brain: Optional[StrategyEngine] = None,
+    days: int = 500,
+    max_workers: int = config.FETCH_CONCURRENCY,
+    flow: Optional[BrokerFlow] = None
+) -> pd.DataFrame:
+    """
+    Stage 2 Breakout and Silent Accumulation for every ticker at once.
+    Returns the hit list (one row per triggered ticker, indexed by ticker).
+    With a BrokerFlow, the hits also carry its multi-day signals (flow_* columns).
+    """
+    tickers = list(tickers or config.WATCHLIST)
+    loader = loader or GoAPILoader(config.API_KEY)
+    brain = brain or StrategyEngine()
+
+    panel = PricePanel.from_frames(loader.get_ohlcv_many(tickers, days=days))
+    screen = brain.screen_panel(panel.close, panel.high, panel.low)
+    screen.insert(0, 'date', panel.last_date)
+
+    # Bandarmology only where the technical leg already passed
+    candidates = list(screen.index[screen['Stage2_Tech'] | screen['Stage1_Tech']])
+    fetcher = ConcurrentFetcher(loader, max_workers=max_workers)
+    broker_data = dict(fetcher.iter_completed(candidates, fetch=loader.get_broker_summary))
+
+    screen = brain.apply_bandar_checks(screen, broker_data)
+    hits = screen[screen['triggered_strategy'].notna()]
+    if flow is not None:
+        hits = hits.join(flow.latest().add_prefix('flow_'))
+    return hits
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    hits = screen_universe(config.WATCHLIST)
+    print(f"🔎 {len(hits)} hits in {time.perf_counter() - started:.2f}s")
+    print(hits[['date', 'close', 'acc_ratio', 'top_buyer', 'triggered_strategy']].to_string())
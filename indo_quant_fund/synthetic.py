@@ -0,0 +1,109 @@
+"""
+Seeded Synthetic Market Data for IndoQuantFund.
+Reproducible OHLCV, IHSG and broker-summary generators (same seed -> same data),
+plus SyntheticLoader: a GoAPILoader whose network calls are replaced by the generators,
+so scans and backtests run offline at any size (e.g. benchmarks.py). mock_goapi.py serves
+the same generators over HTTP.
+"""
+
+import zlib
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .data_engine import GoAPILoader
+from .fetcher import HostRateLimiter
+from .utils import ceil_to_tick_array, floor_to_tick_array, round_to_tick_array
+
+BROKER_CODES = config.SMART_MONEY + config.RETAIL_CROWD + ['MG', 'OD', 'BQ', 'NI2', 'EP']
+INDEX_START = pd.Timestamp(2010, 1, 1)
+
+def _seed(*parts) -> int:
+    return zlib.crc32("|".join(str(p) for p in parts).encode())
+
+def business_days(bars: int, end=None) -> pd.DatetimeIndex:
+    """
+    The last `bars` business days up to `end` (default: today).
+    """
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp.now().normalize()
+    return pd.bdate_range(end=end, periods=bars)
+
+def synthetic_ohlcv(ticker: str, dates: pd.DatetimeIndex, seed: int = 0) -> pd.DataFrame:
+    """
+    Log-normal random walk per ticker, snapped to the IDX tick grid.
+    Same columns and dtypes as GoAPILoader.get_ohlcv.
+    """
+    rng = np.random.default_rng(_seed(ticker, seed))
+    n = len(dates)
+    start = rng.uniform(100, 10_000)
+
+    close = np.maximum(50.0, start * np.exp(np.cumsum(rng.normal(0.0003, 0.02, n))))
+    open_price = np.concatenate([[start], close[:-1]])
+    high = np.maximum(open_price, close) * (1 + rng.uniform(0, 0.015, n))
+    low = np.minimum(open_price, close) * (1 - rng.uniform(0, 0.015, n))
+
+    return pd.DataFrame({
+        'date': pd.DatetimeIndex(dates),
+        'open': round_to_tick_array(open_price).astype(float),
+        'high': ceil_to_tick_array(high).astype(float),
+        'low': floor_to_tick_array(low).astype(float),
+        'close': round_to_tick_array(close).astype(float),
+        'volume': rng.integers(100_000, 50_000_000, n).astype(float),
+    })
+
+def synthetic_ihsg(dates: pd.DatetimeIndex, seed: int = 0) -> pd.DataFrame:
+    """
+    IHSG-like random walk (7200 base, +/-1% a day), seeded.
+    """
+    rng = np.random.default_rng(_seed('IHSG', seed))
+    prices = 7200 * np.cumprod(1 + rng.uniform(-0.01, 0.01, len(dates)))
+    return pd.DataFrame({'date': pd.DatetimeIndex(dates), 'close': prices})
+
+def synthetic_broker_payload(ticker: str, date: Optional[str] = None, seed: int = 0) -> Dict:
+    """
+    Raw broker summary payload (top 5 buyers / sellers) in the GoAPI 'data' shape.
+    """
+    date = date or datetime.now().strftime("%Y-%m-%d")
+    rng = np.random.default_rng(_seed(ticker, date, seed))
+    brokers = rng.choice(BROKER_CODES, size=10, replace=False)
+    volumes = rng.integers(10_000, 5_000_000, size=10)
+
+    def side(codes, vols):
+        rows = [{'broker_code': str(b), 'volume': int(v)} for b, v in zip(codes, vols)]
+        return sorted(rows, key=lambda x: x['volume'], reverse=True)
+
+    return {'date': date, 'top_buyers': side(brokers[:5], volumes[:5]), 'top_sellers': side(brokers[5:], volumes[5:])}
+
+class SyntheticLoader(GoAPILoader):
+    """
+    GoAPILoader backed by the generators above instead of HTTP. Everything above the
+    fetch layer (summaries, range fetches, concurrency) runs the real code.
+
+    bars: if set, every OHLCV request returns exactly this many bars ending at the
+    requested date, regardless of `days` (used to size backtests).
+    """
+    def __init__(self, bars: Optional[int] = None, seed: int = 0, **kwargs):
+        kwargs.setdefault('use_cache', False)
+        kwargs.setdefault('rate_limiter', HostRateLimiter(rate=0))
+        super().__init__(**kwargs)
+        self.bars = bars
+        self.seed = seed
+
+    def _fetch_ohlcv(self, ticker: str, from_date: str, to_date: str) -> Optional[pd.DataFrame]:
+        if self.bars:
+            dates = business_days(self.bars, end=to_date)
+        else:
+            dates = pd.bdate_range(from_date, to_date)
+        return synthetic_ohlcv(ticker, dates, self.seed)
+
+    def _fetch_broker_payload(self, ticker: str, date: str = None) -> Optional[Dict]:
+        return synthetic_broker_payload(ticker, date, self.seed)
+
+    def _load_composite_index(self, days: int) -> pd.DataFrame:
+        # One fixed path from INDEX_START, sliced: a longer load extends the series without changing it
+        end = pd.Timestamp.now().normalize()
+        df = synthetic_ihsg(pd.bdate_range(INDEX_START, end), self.seed)
+        return df[df['date'] >= end - pd.Timedelta(days=days)].reset_index(drop=True)
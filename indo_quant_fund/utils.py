@@ -4,14 +4,17 @@ Utility functions for IndoQuantFund.
 Handles IDX specific tick sizes and Technical Analysis indicators.
 """
 
+import math
 import pandas as pd
 import numpy as np
+from collections import deque
+from typing import Optional, Tuple
 
 def round_to_tick(price: float) -> int:
     """
     Rounds price to the nearest valid IDX tick size.
     
-    IDX Tick Rules:
+    IDX Tick Rules (TICK_BAND_LOWER / TICK_SIZES):
     < 200       : Tick 1
     200 - 500   : Tick 2
     500 - 2000  : Tick 5
@@ -19,56 +22,368 @@ def round_to_tick(price: float) -> int:
     >= 5000     : Tick 25
     """
     price = float(price)
-    
-    if price < 200:
-        tick = 1
-    elif price < 500:
-        tick = 2
-    elif price < 2000:
-        tick = 5
-    elif price < 5000:
-        tick = 10
-    else:
-        # Note: The prompt says "= 5000: Tick 25", implying >= 5000
-        tick = 25
-        
+    tick = int(tick_size_array(price))
     return int(round(price / tick) * tick)
 
+# IDX tick-band table: band lower bounds (IDR) and the tick size inside each band.
+TICK_BAND_LOWER = np.array([0, 200, 500, 2000, 5000], dtype=np.float64)
+TICK_SIZES = np.array([1, 2, 5, 10, 25], dtype=np.int64)
+
+def tick_size_array(prices) -> np.ndarray:
+    """
+    Tick size for every price (searchsorted over the tick-band table).
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    band = np.searchsorted(TICK_BAND_LOWER, prices, side='right') - 1
+    return TICK_SIZES[np.clip(band, 0, len(TICK_SIZES) - 1)]
+
+def _snap_to_tick(prices, snap) -> np.ndarray:
+    prices = np.asarray(prices, dtype=np.float64)
+    ticks = tick_size_array(prices)
+    return (snap(prices / ticks) * ticks).astype(np.int64)
+
+def round_to_tick_array(prices) -> np.ndarray:
+    """
+    Vectorized round_to_tick: nearest valid IDX price (ties to even, same as the scalar version).
+    """
+    return _snap_to_tick(prices, np.round)
+
+def floor_to_tick_array(prices) -> np.ndarray:
+    """
+    Highest valid IDX price <= each price (e.g. stop-loss levels that must not be loosened).
+    """
+    return _snap_to_tick(prices, np.floor)
+
+def ceil_to_tick_array(prices) -> np.ndarray:
+    """
+    Lowest valid IDX price >= each price.
+    """
+    return _snap_to_tick(prices, np.ceil)
+
+def tick_ladder(low: float, high: float) -> np.ndarray:
+    """
+    Every valid IDX price in [low, high], crossing tick bands as needed
+    (e.g. limit-order ladders or stop grids).
+    """
+    start = int(ceil_to_tick_array(low))
+    end = int(floor_to_tick_array(high))
+    upper_bounds = list(TICK_BAND_LOWER[1:]) + [np.inf]
+
+    pieces = []
+    for lower, upper, tick in zip(TICK_BAND_LOWER, upper_bounds, TICK_SIZES):
+        first = max(start, int(lower))
+        first = -(-first // tick) * tick  # align up to this band's tick
+        last = min(end, upper - 1)
+        if first <= last:
+            pieces.append(np.arange(first, last + 1, tick, dtype=np.int64))
+
+    return np.concatenate(pieces) if pieces else np.array([], dtype=np.int64)
+
+def ema(values, period: int):
+    """
+    EMA of a Series, or column-wise of a (bar x ticker) DataFrame.
+    """
+    return values.ewm(span=period, adjust=False).mean()
+
+def true_range(high, low, close):
+    """
+    True range per bar: max(high - low, |high - prev close|, |low - prev close|).
+    Series or (bar x ticker) DataFrames alike; the first bar is high - low.
+    """
+    prev_close = close.shift()
+    return np.fmax(high - low, np.fmax((high - prev_close).abs(), (low - prev_close).abs()))
+
+def wilder_atr(high, low, close, period: int = 14):
+    """
+    ATR with Wilder's smoothing (RMA) over true_range; Series or (bar x ticker) DataFrames.
+    """
+    return true_range(high, low, close).ewm(alpha=1/period, min_periods=period, adjust=False).mean()
+
+def bollinger_bands(close, period: int = 20, std_dev: float = 2.0):
+    """
+    Bollinger upper / lower band and Band Width ((Upper - Lower) / Middle)
+    for a Series or column-wise for a (bar x ticker) DataFrame.
+    """
+    sma = close.rolling(window=period).mean()
+    std = close.rolling(window=period).std()
+
+    upper = sma + (std * std_dev)
+    lower = sma - (std * std_dev)
+    return upper, lower, (upper - lower) / sma
+
 def calculate_ema(df: pd.DataFrame, period: int, column: str = 'close') -> pd.Series:
     """
     Calculates Exponential Moving Average (EMA).
     """
-    return df[column].ewm(span=period, adjust=False).mean()
+    return ema(df[column], period)
 
 def calculate_atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
     """
-    Calculates Average True Range (ATR).
+    Calculates Average True Range (ATR), Wilder's smoothing.
     """
-    high_low = df['high'] - df['low']
-    high_close = np.abs(df['high'] - df['close'].shift())
-    low_close = np.abs(df['low'] - df['close'].shift())
-    
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = np.max(ranges, axis=1)
-    
-    # Calculate ATR using Wilder's Smoothing (RMA) or standard EMA. 
-    # Standard practice is typically RMA (Rolling Mean) or EMA. 
-    # Here we use proper Wilder's Smoothing method logic via EWM for accuracy.
-    atr = true_range.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
-    
-    return atr
+    return wilder_atr(df['high'], df['low'], df['close'], period)
 
 def calculate_bollinger_bands(df: pd.DataFrame, period: int = 20, std_dev: float = 2.0):
     """
     Calculates Bollinger Bands and Band Width.
     """
-    sma = df['close'].rolling(window=period).mean()
-    std = df['close'].rolling(window=period).std()
-    
-    upper = sma + (std * std_dev)
-    lower = sma - (std * std_dev)
-    
-    # Band Width = (Upper - Lower) / Middle
-    bandwidth = (upper - lower) / sma
-    
-    return upper, lower, bandwidth
+    return bollinger_bands(df['close'], period, std_dev)
+
+# ==========================================
+# STREAMING (INCREMENTAL) INDICATORS
+# ==========================================
+# O(1) per-bar counterparts of the batch functions above. Each one matches its batch
+# version to floating-point tolerance and round-trips through to_dict()/from_dict()
+# (plain JSON types), so a run can resume without reloading the full history.
+# peek(...) returns what update(...) would, without changing the state (used to evaluate
+# a still-forming intraday bar).
+
+class StreamingEMA:
+    """
+    Running EMA, equivalent to calculate_ema (ewm(span=period, adjust=False)).
+    """
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.value = float('nan')
+
+    def update(self, x: float) -> float:
+        x = float(x)
+        if self.value != self.value:  # NaN -> first observation seeds the average
+            self.value = x
+        else:
+            self.value = self.value + self.alpha * (x - self.value)
+        return self.value
+
+    def peek(self, x: float) -> float:
+        x = float(x)
+        return x if self.value != self.value else self.value + self.alpha * (x - self.value)
+
+    def to_dict(self) -> dict:
+        return {'period': self.period, 'value': self.value}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> 'StreamingEMA':
+        obj = cls(state['period'])
+        obj.value = state['value']
+        return obj
+
+class StreamingATR:
+    """
+    Wilder ATR, equivalent to calculate_atr (ewm(alpha=1/period, min_periods=period, adjust=False)).
+    """
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.alpha = 1 / period
+        self.prev_close = float('nan')
+        self.average = float('nan')
+        self.count = 0
+
+    @property
+    def value(self) -> float:
+        return self.average if self.count >= self.period else float('nan')
+
+    def update(self, high: float, low: float, close: float) -> float:
+        true_range = high - low
+        if self.count > 0:
+            true_range = max(true_range, abs(high - self.prev_close), abs(low - self.prev_close))
+
+        if self.count == 0:
+            self.average = float(true_range)
+        else:
+            self.average = self.average + self.alpha * (true_range - self.average)
+
+        self.prev_close = float(close)
+        self.count += 1
+        return self.value
+
+    def peek(self, high: float, low: float, close: float) -> float:
+        if self.count + 1 < self.period:
+            return float('nan')
+        if self.count == 0:
+            return float(high - low)
+        true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        return self.average + self.alpha * (true_range - self.average)
+
+    @classmethod
+    def from_history(cls, df: pd.DataFrame, period: int = 14) -> 'StreamingATR':
+        """
+        State after every bar of df, computed in one vectorized pass (same values as update()).
+        """
+        obj = cls(period)
+        if df.empty:
+            return obj
+        prev_close = df['close'].shift()
+        true_range = np.fmax(df['high'] - df['low'], np.fmax((df['high'] - prev_close).abs(), (df['low'] - prev_close).abs()))
+        obj.average = float(true_range.ewm(alpha=obj.alpha, adjust=False).mean().iloc[-1])
+        obj.prev_close = float(df['close'].iloc[-1])
+        obj.count = len(df)
+        return obj
+
+    def to_dict(self) -> dict:
+        return {'period': self.period, 'prev_close': self.prev_close, 'average': self.average, 'count': self.count}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> 'StreamingATR':
+        obj = cls(state['period'])
+        obj.prev_close, obj.average, obj.count = state['prev_close'], state['average'], state['count']
+        return obj
+
+class RollingMeanStd:
+    """
+    Windowed Welford mean / sample std (ddof=1), equivalent to rolling(window).mean()/.std().
+    NaN until the window is full.
+    """
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque()
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self._mean if len(self.values) == self.window else float('nan')
+
+    @property
+    def std(self) -> float:
+        if len(self.values) < self.window or self.window < 2:
+            return float('nan')
+        return math.sqrt(max(self._m2, 0.0) / (self.window - 1))
+
+    def update(self, x: float) -> Tuple[float, float]:
+        x = float(x)
+        if len(self.values) == self.window:
+            # Remove the oldest observation (reverse Welford step)
+            old = self.values.popleft()
+            n = len(self.values)
+            old_mean = self._mean
+            self._mean = (old_mean * (n + 1) - old) / n if n else 0.0
+            self._m2 -= (old - old_mean) * (old - self._mean)
+
+        self.values.append(x)
+        n = len(self.values)
+        delta = x - self._mean
+        self._mean += delta / n
+        self._m2 += delta * (x - self._mean)
+        return self.mean, self.std
+
+    def peek(self, x: float) -> Tuple[float, float]:
+        x = float(x)
+        mean, m2, n = self._mean, self._m2, len(self.values)
+        if n == self.window:
+            old = self.values[0]
+            n -= 1
+            old_mean = mean
+            mean = (old_mean * (n + 1) - old) / n if n else 0.0
+            m2 -= (old - old_mean) * (old - mean)
+
+        n += 1
+        delta = x - mean
+        mean += delta / n
+        m2 += delta * (x - mean)
+        if n < self.window:
+            return float('nan'), float('nan')
+        return mean, (math.sqrt(max(m2, 0.0) / (self.window - 1)) if self.window >= 2 else float('nan'))
+
+    def to_dict(self) -> dict:
+        return {'window': self.window, 'values': list(self.values), 'mean': self._mean, 'm2': self._m2}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> 'RollingMeanStd':
+        obj = cls(state['window'])
+        obj.values = deque(state['values'])
+        obj._mean, obj._m2 = state['mean'], state['m2']
+        return obj
+
+class StreamingBollinger:
+    """
+    Bollinger Bands on a RollingMeanStd, equivalent to calculate_bollinger_bands.
+    """
+    def __init__(self, period: int = 20, std_dev: float = 2.0):
+        self.std_dev = std_dev
+        self.stats = RollingMeanStd(period)
+
+    def update(self, close: float) -> Tuple[float, float, float]:
+        self.stats.update(close)
+        return self.value
+
+    def peek(self, close: float) -> Tuple[float, float, float]:
+        return self._bands(*self.stats.peek(close))
+
+    @property
+    def value(self) -> Tuple[float, float, float]:
+        return self._bands(self.stats.mean, self.stats.std)
+
+    def _bands(self, sma: float, std: float) -> Tuple[float, float, float]:
+        upper = sma + (std * self.std_dev)
+        lower = sma - (std * self.std_dev)
+        return upper, lower, (upper - lower) / sma
+
+    def to_dict(self) -> dict:
+        return {'std_dev': self.std_dev, 'stats': self.stats.to_dict()}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> 'StreamingBollinger':
+        obj = cls(state['stats']['window'], state['std_dev'])
+        obj.stats = RollingMeanStd.from_dict(state['stats'])
+        return obj
+
+class RollingMin:
+    """
+    Monotonic-deque rolling minimum, equivalent to rolling(window, min_periods).min().
+    Amortized O(1) per update.
+    """
+    def __init__(self, window: int, min_periods: Optional[int] = None):
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.count = 0
+        self.deque = deque()  # (bar_number, value), values increasing front -> back
+
+    def _dominates(self, kept: float, new: float) -> bool:
+        return kept >= new
+
+    @property
+    def value(self) -> float:
+        if not self.deque or min(self.count, self.window) < self.min_periods:
+            return float('nan')
+        return self.deque[0][1]
+
+    def update(self, x: float) -> float:
+        x = float(x)
+        while self.deque and self._dominates(self.deque[-1][1], x):
+            self.deque.pop()
+        self.deque.append((self.count, x))
+        while self.deque[0][0] <= self.count - self.window:
+            self.deque.popleft()
+        self.count += 1
+        return self.value
+
+    def peek(self, x: float) -> float:
+        x = float(x)
+        if min(self.count + 1, self.window) < self.min_periods:
+            return float('nan')
+        # Only the front entry can expire on the next bar
+        for bar_number, kept in self.deque:
+            if bar_number > self.count - self.window:
+                return x if self._dominates(kept, x) else kept
+        return x
+
+    def to_dict(self) -> dict:
+        return {
+            'window': self.window, 'min_periods': self.min_periods,
+            'count': self.count, 'deque': [list(item) for item in self.deque]
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> 'RollingMin':
+        obj = cls(state['window'], state['min_periods'])
+        obj.count = state['count']
+        obj.deque = deque(tuple(item) for item in state['deque'])
+        return obj
+
+class RollingMax(RollingMin):
+    """
+    Monotonic-deque rolling maximum, equivalent to rolling(window, min_periods).max().
+    """
+    def _dominates(self, kept: float, new: float) -> bool:
+        return kept <= new
@@ -0,0 +1,67 @@
+import json
+
+from indo_quant_fund.audit import TradeAudit, audit_files, iter_audit, migrate_json_log
+
+def _entry(i, ticker='BBCA', day=1):
+    return {'timestamp': f"2024-03-{day:02d}T09:{i:02d}:00", 'ticker': ticker, 'status': 'APPROVED', 'lots': i}
+
+def test_migrate_json_log(tmp_path):
+    legacy, log_file = tmp_path / 'trade_logs.json', tmp_path / 'trade_logs.jsonl'
+    entries = [_entry(i) for i in range(3)]
+    legacy.write_text(json.dumps(entries))
+
+    assert migrate_json_log(str(legacy), str(log_file)) == 3
+    assert list(iter_audit(str(log_file))) == entries
+    assert not (tmp_path / 'trade_logs.jsonl.tmp').exists()
+
+    # The JSON Lines log exists: never migrated twice, even if the legacy file changed
+    legacy.write_text(json.dumps(entries + [_entry(9)]))
+    assert migrate_json_log(str(legacy), str(log_file)) == 0
+    assert list(iter_audit(str(log_file))) == entries
+
+def test_migrate_skips_a_missing_or_corrupt_legacy_log(tmp_path):
+    log_file = tmp_path / 'trade_logs.jsonl'
+    assert migrate_json_log(str(tmp_path / 'missing.json'), str(log_file)) == 0
+    assert not log_file.exists()
+
+    corrupt = tmp_path / 'corrupt.json'
+    corrupt.write_text('[{"ticker": ')
+    assert migrate_json_log(str(corrupt), str(log_file)) == 0
+    assert log_file.exists() and list(iter_audit(str(log_file))) == []
+
+def test_size_rotation_keeps_every_entry_in_order(tmp_path):
+    log_file = str(tmp_path / 'trade_logs.jsonl')
+    line_bytes = len(json.dumps(_entry(0)) + "\n")
+    entries = [_entry(i) for i in range(10)]
+
+    with TradeAudit(log_file, max_bytes=3 * line_bytes, legacy_file=None) as audit:
+        for entry in entries:
+            audit.log(entry)
+
+    files = audit_files(log_file)
+    assert files[-1] == log_file and len(files) == 4
+    assert [sum(1 for _ in open(path)) for path in files] == [3, 3, 3, 1]
+    assert all(len(open(path).read()) <= 3 * line_bytes for path in files)
+    assert list(iter_audit(log_file)) == entries
+
+def test_iter_audit_filters_across_rotated_files(tmp_path):
+    log_file = str(tmp_path / 'trade_logs.jsonl')
+    entries = [_entry(i, ticker, day) for day in (1, 2, 3) for i, ticker in enumerate(['BBCA', 'TLKM', 'BBCA'])]
+    line_bytes = max(len(json.dumps(e) + "\n") for e in entries)
+
+    with TradeAudit(log_file, max_bytes=2 * line_bytes, legacy_file=None) as audit:
+        for entry in entries:
+            audit.log(entry)
+    assert len(audit_files(log_file)) > 3
+
+    assert list(iter_audit(log_file, ticker='TLKM')) == [e for e in entries if e['ticker'] == 'TLKM']
+    # until is an inclusive date: the whole of 2 March
+    assert list(iter_audit(log_file, since='2024-03-02', until='2024-03-02')) == entries[3:6]
+    assert list(iter_audit(log_file, ticker='BBCA', since='2024-03-02')) == [
+        e for e in entries[3:] if e['ticker'] == 'BBCA'
+    ]
+
+def test_iter_audit_skips_a_torn_last_line(tmp_path):
+    log_file = tmp_path / 'trade_logs.jsonl'
+    log_file.write_text(json.dumps(_entry(0)) + "\n" + '{"timestamp": "2024-03-01T09:')
+    assert list(iter_audit(str(log_file))) == [_entry(0)]
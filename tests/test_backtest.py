@@ -0,0 +1,86 @@
+import pickle
+
+import pandas as pd
+import pytest
+
+from indo_quant_fund import config
+from indo_quant_fund.backtest import run_backtest
+from indo_quant_fund.data_engine import RateLimitError
+from indo_quant_fund.portfolio_backtest import run_portfolio_backtest
+from indo_quant_fund.synthetic import SyntheticLoader
+
+class FlakyLoader(SyntheticLoader):
+    """
+    SyntheticLoader whose broker endpoint answers HTTP 429 (after retries) on one request.
+    """
+    def __init__(self, fail_at=None, **kwargs):
+        super().__init__(**kwargs)
+        self.fail_at = fail_at
+        self.broker_calls = 0
+
+    def _fetch_broker_payload(self, ticker, date=None):
+        self.broker_calls += 1
+        if self.broker_calls == self.fail_at:
+            raise RateLimitError("HTTP 429 Too Many Requests")
+        return super()._fetch_broker_payload(ticker, date)
+
+def _equity(result):
+    return result['equity']['portfolio_value'].tolist()
+
+def test_rate_limited_backtest_resumes_to_the_uninterrupted_result(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'CHECKPOINT_PATH', str(tmp_path))
+    reference_loader = FlakyLoader(bars=400, seed=2)
+    reference = run_backtest('ANTM', loader=reference_loader, save_run=False, resume=False)
+    assert len(reference['trade_log']) >= 4
+
+    # The default 30 s interval never fires here: only the save on failure can resume the run
+    fail_at = reference_loader.broker_calls // 2
+    with pytest.raises(RateLimitError):
+        run_backtest('ANTM', loader=FlakyLoader(fail_at=fail_at, bars=400, seed=2), save_run=False)
+    (saved,) = tmp_path.glob('*.ckpt')
+    with open(saved, 'rb') as f:
+        state = pickle.load(f)['state']
+    assert state['window_end'] == pd.Timestamp.now().strftime("%Y-%m-%d")
+    assert 0 < state['next_index'] < len(reference['equity'])
+
+    resumed_loader = FlakyLoader(bars=400, seed=2)
+    resumed = run_backtest('ANTM', loader=resumed_loader, save_run=False)
+    assert resumed['trade_log'] == reference['trade_log']
+    assert _equity(resumed) == _equity(reference)
+    assert resumed_loader.broker_calls == reference_loader.broker_calls - fail_at + 1
+    assert not list(tmp_path.glob('*.ckpt'))
+
+def test_rate_limited_portfolio_backtest_resumes_to_the_uninterrupted_result(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'CHECKPOINT_PATH', str(tmp_path))
+    tickers = ['BBCA', 'TLKM', 'ASII', 'ANTM']
+    run = lambda loader, resume=True: run_portfolio_backtest(
+        tickers, loader=loader, max_workers=1, save_run=False, resume=resume
+    )
+    reference_loader = FlakyLoader(bars=400, seed=0)
+    reference = run(reference_loader, resume=False)
+    assert len(reference['trade_log']) >= 4
+
+    with pytest.raises(RateLimitError):
+        run(FlakyLoader(fail_at=reference_loader.broker_calls // 2, bars=400, seed=0))
+    assert len(list(tmp_path.glob('*.ckpt'))) == 1
+
+    resumed = run(FlakyLoader(bars=400, seed=0))
+    assert resumed['trade_log'] == reference['trade_log']
+    assert _equity(resumed) == _equity(reference)
+    assert not list(tmp_path.glob('*.ckpt'))
+
+def test_checkpoint_on_changed_bars_is_discarded(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'CHECKPOINT_PATH', str(tmp_path))
+    reference_loader = FlakyLoader(bars=400, seed=2)
+    reference = run_backtest('ANTM', loader=reference_loader, save_run=False, resume=False)
+
+    with pytest.raises(RateLimitError):
+        run_backtest('ANTM', loader=FlakyLoader(fail_at=reference_loader.broker_calls // 2, bars=400, seed=2), save_run=False)
+
+    # Same run configuration, different bars (e.g. revised data): starts again from bar 0
+    other_data = FlakyLoader(bars=400, seed=3)
+    resumed = run_backtest('ANTM', loader=other_data, save_run=False)
+    fresh = run_backtest('ANTM', loader=FlakyLoader(bars=400, seed=3), save_run=False, resume=False)
+    assert resumed['trade_log'] == fresh['trade_log']
+    assert _equity(resumed) == _equity(fresh)
+    assert resumed['trade_log'] != reference['trade_log']
@@ -0,0 +1,76 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from indo_quant_fund.bar_store import BarStore, open_store
+
+def _bars(dates, close, spread=10, **overrides):
+    df = pd.DataFrame({
+        'date': pd.to_datetime(dates),
+        'open': close, 'high': [c + spread for c in close], 'low': [c - spread for c in close], 'close': close,
+        'volume': [1_000_000.0 + i for i in range(len(dates))],
+    })
+    for column, values in overrides.items():
+        df[column] = values
+    return df
+
+def _data():
+    return {
+        'BBCA': _bars(['2024-01-02', '2024-01-03', '2024-01-04'], [9000.0, 9025.0, 9050.0], spread=25,
+                      open=[9000.0, np.nan, 9025.0], high=[9050.0, 9075.0, np.nan]),
+        'GOTO': _bars(['2024-01-03', '2024-01-05'], [84.0, 85.0], low=[np.nan, 83.0]),
+    }
+
+def test_round_trip_reads_gaps_back_as_nan(tmp_path):
+    data = _data()
+    store = BarStore.write(str(tmp_path / 'bars'), data)
+    assert store.tickers == ['BBCA', 'GOTO']
+    assert list(store.dates) == list(np.array(['2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05'], dtype='datetime64[D]'))
+
+    for ticker, df in data.items():
+        pd.testing.assert_frame_equal(store.frame(ticker), df, check_dtype=False)
+    assert store.frame('BBCA')['open'].isna().tolist() == [False, True, False]
+    assert store.frame('GOTO')['low'].isna().tolist() == [True, False]
+    # Dates without a bar are left out, and windows only cover [start, end]
+    assert store.row('close', 'GOTO').tolist() == [0, 84, 0, 85]
+    pd.testing.assert_frame_equal(
+        store.frame('BBCA', start='2024-01-03', end='2024-01-03'),
+        data['BBCA'].iloc[1:2].reset_index(drop=True), check_dtype=False,
+    )
+    assert store.arrays['close'].dtype == np.int32
+
+@pytest.mark.parametrize('price', [9001.0, 84.5, 0.0, -5.0])
+def test_off_grid_prices_are_rejected(tmp_path, price):
+    path = str(tmp_path / 'bars')
+    BarStore.write(path, _data())
+    data = _data()
+    data['BBCA'].loc[1, 'close'] = price
+
+    with pytest.raises(ValueError, match='BBCA'):
+        BarStore.write(path, data)
+    # The existing store is untouched
+    assert BarStore(path).frame('BBCA')['close'].tolist() == [9000.0, 9025.0, 9050.0]
+
+def test_write_swaps_the_store_atomically(tmp_path):
+    path = str(tmp_path / 'bars')
+    old = BarStore.write(path, _data())
+    new = BarStore.write(path, {'TLKM': _bars(['2024-02-01'], [3500.0])})
+
+    # A reader that mapped the old store keeps reading it; no temporary directories remain
+    assert old.frame('BBCA')['close'].tolist() == [9000.0, 9025.0, 9050.0]
+    assert new.tickers == ['TLKM'] and BarStore(path).tickers == ['TLKM']
+    assert sorted(os.listdir(tmp_path)) == ['bars']
+
+def test_open_store_is_memoized_per_path(tmp_path, monkeypatch):
+    path = str(tmp_path / 'bars')
+    BarStore.write(path, _data())
+    monkeypatch.chdir(tmp_path)
+
+    store = open_store(path)
+    assert open_store('bars') is store
+    # Rewriting the store drops the memoized mapping
+    BarStore.write(path, {'TLKM': _bars(['2024-02-01'], [3500.0])})
+    assert open_store(path) is not store
+    assert open_store(path).tickers == ['TLKM']
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indo_quant_fund.broker_flow import BrokerFlow, _streak
+
+D1, D2, D3 = '2024-01-02', '2024-01-03', '2024-01-04'
+
+def _side(*rows):
+    return [{'broker_code': code, 'volume': volume} for code, volume in rows]
+
+# AK/BK are smart money, YP retail, ZZ an unknown (other) broker; BBB has no summary on D2
+PAYLOADS = [
+    ('AAA', D1, {'top_buyers': _side(('AK', 500), ('YP', 300), ('ZZ', 100), ('BK', 100)),
+                 'top_sellers': _side(('BK', 400), ('ZZ', 400), ('YP', 200))}),
+    ('AAA', D2, {'top_buyers': _side(('AK', 200)), 'top_sellers': _side(('AK', 100), ('YP', 100))}),
+    ('AAA', D3, {'top_buyers': _side(('YP', 500)), 'top_sellers': _side(('AK', 500))}),
+    ('BBB', D1, {'top_buyers': _side(('BK', 100)), 'top_sellers': _side(('ZZ', 100))}),
+    ('BBB', D3, {'top_buyers': _side(('BK', 50)), 'top_sellers': _side(('YP', 50))}),
+]
+
+def test_streak_counts_the_run_ending_on_each_row():
+    flags = pd.DataFrame({'a': [True, True, False, True, True, True], 'b': [False, True, True, True, False, True]})
+    expected = pd.DataFrame({'a': [1, 2, 0, 1, 2, 3], 'b': [0, 1, 2, 3, 0, 1]})
+    pd.testing.assert_frame_equal(_streak(flags).astype(int), expected)
+
+def test_from_payloads_merges_both_sides_per_broker():
+    table = BrokerFlow.from_payloads(PAYLOADS).table
+    day = table[(table['date'] == np.datetime64(D1)) & (table['ticker'] == 'AAA')].set_index('broker')
+    assert day.loc['BK', ['buy', 'sell']].tolist() == [100, 400]
+    assert day.loc['YP', ['buy', 'sell']].tolist() == [300, 200]
+    assert len(day) == 4
+
+def test_daily_by_hand():
+    daily = BrokerFlow.from_payloads(PAYLOADS).daily()
+    aaa1 = daily.loc[(pd.Timestamp(D1), 'AAA')]
+    assert (aaa1['smart_buy'], aaa1['smart_sell'], aaa1['smart_net']) == (600, 400, 200)
+    assert (aaa1['retail_buy'], aaa1['retail_sell'], aaa1['retail_net']) == (300, 200, 100)
+    assert (aaa1['other_buy'], aaa1['other_sell'], aaa1['other_net']) == (100, 400, -300)
+    assert (aaa1['total_buy'], aaa1['total_sell'], aaa1['brokers']) == (1000, 1000, 4)
+    # Top 3 buyers take 500 + 300 + 100 of 1000
+    assert aaa1['top3_buy_share'] == pytest.approx(0.9)
+    # Net buyers AK (+500) and YP (+100): HHI = (5/6)^2 + (1/6)^2
+    assert aaa1['net_hhi'] == pytest.approx(26 / 36)
+
+    aaa2 = daily.loc[(pd.Timestamp(D2), 'AAA')]
+    assert (aaa2['smart_net'], aaa2['retail_net'], aaa2['other_net']) == (100, -100, 0)
+    assert aaa2['net_hhi'] == 1.0 and aaa2['top3_buy_share'] == 1.0
+    assert (pd.Timestamp(D2), 'BBB') not in daily.index
+
+def test_signals_by_hand():
+    signals = BrokerFlow.from_payloads(PAYLOADS).signals(window=2)
+    dates = pd.DatetimeIndex([D1, D2, D3])
+
+    def column(name, ticker):
+        return signals[name][ticker].reindex(dates).tolist()
+
+    assert column('smart_net', 'AAA') == [200, 300, -400]
+    # BBB's missing day counts as no flow in the sums and breaks its streak
+    assert column('smart_net', 'BBB') == [100, 100, 50]
+    assert column('smart_acc_ratio', 'AAA') == pytest.approx([600 / 400, 800 / 500, 200 / 600])
+    assert column('smart_streak', 'AAA') == [1, 2, 0]
+    assert column('smart_streak', 'BBB') == [1, 0, 1]
+    assert column('retail_streak', 'AAA') == [1, 0, 1]
+    assert column('top3_buy_share', 'AAA') == pytest.approx([0.9, 0.95, 1.0])
+    assert column('net_hhi', 'AAA') == pytest.approx([26 / 36, (26 / 36 + 1) / 2, 1.0])
+
+def test_save_load_round_trip(tmp_path):
+    flow = BrokerFlow.from_payloads(PAYLOADS)
+    flow.save(str(tmp_path / 'flow.npz'))
+    loaded = BrokerFlow.load(str(tmp_path / 'flow.npz'))
+    pd.testing.assert_frame_equal(loaded.daily(), flow.daily())
@@ -0,0 +1,84 @@
+"""
+GoAPILoader against local stand-ins: the IHSG index file, the mock GoAPI server and the cache.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from indo_quant_fund import config
+from indo_quant_fund.cache import MarketDataCache
+from indo_quant_fund.data_engine import GoAPILoader
+from indo_quant_fund.fetcher import HostRateLimiter
+from indo_quant_fund.mock_goapi import MockGoAPIServer
+from indo_quant_fund.synthetic import INDEX_START, SyntheticLoader, synthetic_ihsg
+
+def _index_file(tmp_path, seed):
+    path = tmp_path / f"ihsg_{seed}.csv"
+    synthetic_ihsg(pd.bdate_range(INDEX_START, pd.Timestamp.now().normalize()), seed).to_csv(path, index=False)
+    return str(path)
+
+def test_composite_index_does_not_depend_on_earlier_loads(tmp_path):
+    for seed in range(5):
+        path = _index_file(tmp_path, seed)
+        fresh = GoAPILoader(use_cache=False, index_file=path).get_composite_index(300)
+
+        warmed = GoAPILoader(use_cache=False, index_file=path)
+        warmed.get_composite_index(2000)
+        pd.testing.assert_frame_equal(warmed.get_composite_index(300), fresh)
+        assert len(fresh) > 150 and fresh['EMA_200'].notna().all()
+
+def test_synthetic_composite_index_is_one_fixed_path():
+    long = SyntheticLoader(seed=3).get_composite_index(2000)
+    short = SyntheticLoader(seed=3).get_composite_index(300)
+    pd.testing.assert_frame_equal(long[long['date'].isin(short['date'])].reset_index(drop=True)[['date', 'close']],
+                                  short[['date', 'close']])
+
+def test_second_run_is_served_from_the_cache(tmp_path):
+    tickers = ['BBCA', 'TLKM']
+    dates = [(datetime.now() - timedelta(days=d)).strftime("%Y-%m-%d") for d in range(1, 4)]
+
+    with MockGoAPIServer() as server:
+        cache = MarketDataCache(str(tmp_path / 'cache.sqlite'))
+        loader = GoAPILoader(base_url=server.base_url, cache=cache, rate_limiter=HostRateLimiter(rate=0))
+        runs = []
+        for _ in range(2):
+            server.reset_stats()
+            cache.reset_stats()
+            for ticker in tickers:
+                assert not loader.get_ohlcv(ticker, days=120).empty
+                for date in dates:
+                    assert loader.get_broker_summary(ticker, date=date)['top_buyer'] != 'Unknown'
+            runs.append((dict(cache.stats), server.stats))
+        cache.close()
+
+    (first_cache, first_server), (second_cache, second_server) = runs
+    assert first_cache == {'ohlcv_hits': 0, 'ohlcv_misses': 2, 'broker_hits': 0, 'broker_misses': 6}
+    assert first_server['historical'] == 2 and first_server['broker_summary'] == 6
+    assert second_cache == {'ohlcv_hits': 2, 'ohlcv_misses': 0, 'broker_hits': 6, 'broker_misses': 0}
+    assert second_server.get('requests', 0) == 0
+
+def test_default_cache_path_does_not_follow_the_working_directory():
+    assert os.path.isabs(config.CACHE_PATH)
+    assert os.path.dirname(config.CACHE_PATH) == config.DATA_DIR
+
+def test_broker_flows_never_refetch_past_days_without_data(tmp_path):
+    tickers = ['BBCA', 'TLKM']
+    dates = pd.bdate_range(end=pd.Timestamp.now().normalize() - pd.Timedelta(days=7), periods=5).strftime("%Y-%m-%d")
+    holiday = dates[2]
+
+    with MockGoAPIServer(holidays=[holiday]) as server:
+        cache = MarketDataCache(str(tmp_path / 'cache.sqlite'))
+        loader = GoAPILoader(base_url=server.base_url, cache=cache, rate_limiter=HostRateLimiter(rate=0))
+        flow = loader.get_broker_flows(tickers, dates[0], dates[-1])
+        assert server.stats['broker_summary'] == len(tickers) * len(dates)
+        assert pd.Timestamp(holiday) not in flow.dates and len(flow.dates) == len(dates) - 1
+
+        server.reset_stats()
+        again = loader.get_broker_flows(tickers, dates[0], dates[-1])
+        assert server.request_count == 0
+        pd.testing.assert_frame_equal(again.table, flow.table)
+        assert loader.get_broker_summary('BBCA', date=holiday) == {'acc_ratio': 0, 'top_buyer': 'Unknown'}
+        assert server.request_count == 0
+        cache.close()
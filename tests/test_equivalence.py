@@ -0,0 +1,128 @@
+"""
+Equivalence checks on synthetic data: each fast path against the reference it replaced.
+"""
+
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from indo_quant_fund.backtest import check_parity
+from indo_quant_fund import config
+from indo_quant_fund.brain import IndicatorState, StrategyEngine
+from indo_quant_fund.brokers import OTHER, RETAIL, SMART, BrokerRegistry, default_broker_metadata, load_broker_metadata
+from indo_quant_fund.risk_guard import RiskGatekeeper
+from indo_quant_fund.screener import PricePanel
+from indo_quant_fund.synthetic import SyntheticLoader, business_days, synthetic_ihsg, synthetic_ohlcv
+from indo_quant_fund.utils import calculate_atr, round_to_tick_array
+
+STREAMED = ('EMA_50', 'EMA_150', 'BB_Upper', 'BB_Lower', 'BB_Width', '52_Week_Low', 'ATR')
+
+def _bars(df):
+    return [{'date': r.date, 'high': r.high, 'low': r.low, 'close': r.close} for r in df.itertuples(index=False)]
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('ticker', ['AAA', 'BBB', 'CCC'])
+def test_vectorized_backtest_matches_loop(ticker, seed):
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert check_parity(ticker, loader=SyntheticLoader(bars=400, seed=seed), days=600)
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_streaming_indicators_match_batch(seed):
+    df = synthetic_ohlcv('AAA', business_days(400), seed)
+    batch = StrategyEngine().prepare_indicators(df.copy())
+    batch['ATR'] = calculate_atr(batch)
+
+    state = IndicatorState()
+    snapshots = [state.update(bar) for bar in _bars(df)]
+    for column in STREAMED:
+        streamed = np.array([s[column] for s in snapshots], dtype=float)
+        np.testing.assert_allclose(streamed, batch[column].to_numpy(dtype=float), rtol=1e-9, err_msg=column)
+
+def test_indicator_state_resumes_from_dict():
+    bars = _bars(synthetic_ohlcv('BBB', business_days(300), 0))
+    continuous = IndicatorState()
+    for bar in bars:
+        expected = continuous.update(bar)
+
+    resumed = IndicatorState()
+    for bar in bars[:200]:
+        resumed.update(bar)
+    resumed = IndicatorState.from_dict(resumed.to_dict())
+    for bar in bars[200:]:
+        snapshot = resumed.update(bar)
+    assert snapshot == expected
+
+def test_broker_registry_classifies_like_config_lists():
+    registry = BrokerRegistry(default_broker_metadata())
+    rng = np.random.default_rng(0)
+    pool = config.SMART_MONEY + config.RETAIL_CROWD + config.FOREIGN_BROKERS + ['MG', 'OD', 'ZZ9']
+    codes = list(rng.choice(pool, 2_000))
+
+    ids = registry.encode(codes)
+    expected = [SMART if c in config.SMART_MONEY else RETAIL if c in config.RETAIL_CROWD else OTHER for c in codes]
+    assert list(registry.classify(ids)) == expected
+    assert list(registry.foreign[ids]) == [c in config.FOREIGN_BROKERS for c in codes]
+    assert list(registry.decode(ids)) == codes
+    assert registry.smart_money == frozenset(config.SMART_MONEY)
+    assert registry.retail_crowd == frozenset(config.RETAIL_CROWD)
+
+def test_broker_metadata_file_overrides_config(tmp_path):
+    path = tmp_path / 'brokers.csv'
+    path.write_text(f"broker_code,category,origin\n{config.RETAIL_CROWD[0].lower()},smart,foreign\nNEW,retail,\n")
+    registry = BrokerRegistry(load_broker_metadata(str(path)))
+
+    ids = registry.encode([config.RETAIL_CROWD[0], 'NEW'])
+    assert list(registry.classify(ids)) == [SMART, RETAIL]
+    assert list(registry.foreign[ids]) == [True, False]
+
+    path.write_text("broker_code,category\nXX,whale\n")
+    with pytest.raises(ValueError):
+        load_broker_metadata(str(path))
+
+@pytest.mark.parametrize('seed', range(20))
+def test_validate_entries_matches_sequential_validate_entry(seed):
+    rng = np.random.default_rng(seed)
+    ihsg = synthetic_ihsg(business_days(400), seed)
+    n = int(rng.integers(1, 40))
+    tickers = [f"T{i:02d}" for i in range(n)]
+    prices = round_to_tick_array(rng.uniform(100, 10_000, n)).astype(float)
+    atrs = prices * rng.uniform(0.0, 0.06, n)
+    atrs[rng.random(n) < 0.1] = 0.0  # 5% risk-width fallback
+    ratios = np.round(rng.uniform(0.5, 3.0, n), 1)
+    buyers = list(rng.choice(config.SMART_MONEY + config.RETAIL_CROWD + ['MG'], n))
+    cash = float(rng.choice([5e6, 5e7, 2e8]))
+    as_of = ihsg['date'].iloc[int(rng.integers(0, len(ihsg)))]
+
+    risk = RiskGatekeeper(config.INITIAL_CAPITAL)
+    batch = risk.validate_entries(tickers, prices, atrs, ratios, buyers, cash, 2e8, ihsg, as_of=as_of)
+
+    # Reference: one validate_entry per candidate in conviction order, spending cash as it goes
+    for i in np.argsort(-ratios, kind='stable'):
+        approved, reason, lots, stop = risk.validate_entry(
+            tickers[i], prices[i], cash, 2e8, ihsg, ratios[i], buyers[i], atrs[i], as_of=as_of
+        )
+        row = batch.loc[tickers[i]]
+        assert (bool(row.approved), row.reason, int(row.lots), int(row.stop_loss)) == (approved, reason, lots, stop)
+        if approved:
+            cash -= lots * 100 * prices[i]
+
+def test_screen_panel_matches_per_ticker_analysis():
+    brain = StrategyEngine()
+    frames = {f"T{i:02d}": synthetic_ohlcv(f"T{i:02d}", business_days(100 + 25 * i), i) for i in range(16)}
+    buyers = [config.SMART_MONEY[0], config.RETAIL_CROWD[0], 'MG']
+    broker_data = {t: {'acc_ratio': 1.0 + 0.5 * (i % 4), 'top_buyer': buyers[i % 3]} for i, t in enumerate(frames)}
+
+    panel = PricePanel.from_frames(frames)
+    screen = brain.apply_bandar_checks(brain.screen_panel(panel.close, panel.high, panel.low), broker_data)
+    assert screen['Stage2'].any()
+
+    for ticker, df in frames.items():
+        prepared = brain.prepare_indicators(df.copy())
+        prepared['ATR'] = calculate_atr(prepared)
+        for column in ('EMA_50', 'EMA_150', 'BB_Width', '52_Week_Low', 'ATR'):
+            np.testing.assert_allclose(screen.at[ticker, column], prepared[column].iloc[-1], rtol=1e-12, err_msg=f"{ticker} {column}")
+
+        assert screen.at[ticker, 'Stage2'] == brain.analyze_stage2_breakout(df, broker_data[ticker])[0]
+        assert screen.at[ticker, 'Stage1'] == brain.analyze_stage1_accumulation(df, broker_data[ticker])[0]
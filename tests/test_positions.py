@@ -0,0 +1,125 @@
+import pandas as pd
+
+from indo_quant_fund import config
+from indo_quant_fund.main import roll_stops
+from indo_quant_fund.positions import PositionBook
+from indo_quant_fund.risk_guard import RiskGatekeeper
+from indo_quant_fund.utils import StreamingATR
+
+DAY = pd.Timedelta(days=1)
+ENTRY = pd.Timestamp(2024, 3, 1)
+
+def _book(stop=900.0, high=1050.0, atr_state=None):
+    book = PositionBook(10_000_000, atr_multiplier=2.0)
+    book.open('BBCA', ENTRY, 1000.0, 1000, stop, strategy='Stage 2 Breakout', atr_state=atr_state, high=high)
+    return book
+
+def _history(bars=30, start=ENTRY - 30 * DAY):
+    closes = [1000.0 + 5 * (i % 7) for i in range(bars)]
+    return pd.DataFrame({
+        'date': [start + i * DAY for i in range(bars)],
+        'high': [c + 20 for c in closes],
+        'low': [c - 20 for c in closes],
+        'close': closes,
+    })
+
+def test_stop_anchors_on_the_entry_high_and_never_loosens():
+    book = _book()
+    # Entry bar high 1050 anchors the stop even though this bar's high is lower
+    assert book.update('BBCA', ENTRY + DAY, 1020, 990, 1000, atr=50) == 1050 - 2 * 50
+    assert book.update('BBCA', ENTRY + 2 * DAY, 1100, 1060, 1090, atr=50) == 1100 - 2 * 50
+    # Wider ATR and a lower high would loosen it: the stop holds
+    assert book.update('BBCA', ENTRY + 3 * DAY, 1070, 1000, 1010, atr=80) == 1000
+    # Missing ATR (warm-up) leaves the stop where it was
+    assert book.update('BBCA', ENTRY + 4 * DAY, 1200, 1100, 1150, atr=float('nan')) == 1000
+    assert book.get('BBCA').highest_high == 1200
+
+def test_refeeding_overlapping_bars_is_idempotent():
+    bars = [(ENTRY + i * DAY, 1000 + 10 * i, 980 + 10 * i, 995 + 10 * i) for i in range(1, 8)]
+    once = _book(atr_state=StreamingATR.from_history(_history()))
+    for date, high, low, close in bars:
+        once.update('BBCA', date, high, low, close)
+
+    twice = _book(atr_state=StreamingATR.from_history(_history()))
+    for window in (bars[:5], bars[2:], bars):
+        for date, high, low, close in window:
+            twice.update('BBCA', date, high, low, close)
+
+    assert twice.to_dict() == once.to_dict()
+
+def test_save_load_round_trip_keeps_the_atr_state(tmp_path):
+    path = str(tmp_path / 'positions.json')
+    book = _book(atr_state=StreamingATR.from_history(_history()))
+    book.update('BBCA', ENTRY + DAY, 1120, 1080, 1110)
+    book.add('BBCA', ENTRY + DAY, 1110, 500)
+    book.save(path)
+
+    loaded = PositionBook.load(path)
+    assert loaded.to_dict() == book.to_dict()
+    position = loaded.get('BBCA')
+    assert position.shares == 1500 and position.adds == 1 and position.strategy == 'Stage 2 Breakout'
+    assert position.atr.to_dict() == book.get('BBCA').atr.to_dict()
+
+    # Both books trail the same way from here
+    for b in (book, loaded):
+        b.update('BBCA', ENTRY + 2 * DAY, 1180, 1100, 1170)
+    assert loaded.get('BBCA').stop == book.get('BBCA').stop
+
+def test_missing_book_file_loads_an_empty_book(tmp_path):
+    book = PositionBook.load(str(tmp_path / 'missing.json'), cash=5_000_000)
+    assert len(book) == 0 and book.cash == 5_000_000
+
+def test_pyramid_limits():
+    book = _book()
+    trigger = 1000 * (1 + config.PYRAMID_TRIGGER_GAIN)
+    assert not book.pyramid_ready('BBCA', trigger - 5)
+    assert book.pyramid_ready('BBCA', trigger)
+    assert not book.pyramid_ready('TLKM', trigger)
+
+    # Each add moves the trigger to the new last entry, up to PYRAMID_MAX_ADDS adds
+    price = trigger
+    for _ in range(config.PYRAMID_MAX_ADDS):
+        assert book.pyramid_ready('BBCA', price)
+        book.add('BBCA', ENTRY + DAY, price, 500)
+        assert not book.pyramid_ready('BBCA', price)
+        price *= 1 + config.PYRAMID_TRIGGER_GAIN
+    assert not book.pyramid_ready('BBCA', price * 2)
+
+def test_validate_pyramid_limits():
+    risk = RiskGatekeeper(10_000_000)
+    position = _book().get('BBCA')
+    smart, retail = config.SMART_MONEY[0], config.RETAIL_CROWD[0]
+    ratio = config.PYRAMID_MIN_ACC_RATIO + 0.5
+
+    approved, _, lots = risk.validate_pyramid(position, 1100, 10_000_000, ratio, smart)
+    assert approved and lots == int(10 * config.PYRAMID_ADD_FRACTION)
+    assert not risk.validate_pyramid(position, 1100, 10_000_000, ratio, retail)[0]
+    assert not risk.validate_pyramid(position, 1100, 10_000_000, config.PYRAMID_MIN_ACC_RATIO, smart)[0]
+    # Capped by cash: two lots affordable at 1100
+    assert risk.validate_pyramid(position, 1100, 2 * 110_000 + 1, ratio, smart)[2] == 2
+    assert risk.validate_pyramid(position, 1100, 100_000, ratio, smart) == (False, "REJECTED: Insufficient Cash.", 0)
+
+def test_roll_stops_never_commits_the_forming_bar():
+    session = ENTRY + 5 * DAY
+    book = _book(atr_state=StreamingATR.from_history(_history()))
+    completed = pd.DataFrame({
+        'date': [ENTRY + i * DAY for i in range(1, 5)],
+        'high': [1060.0, 1080.0, 1075.0, 1090.0],
+        'low': [1020.0, 1040.0, 1050.0, 1060.0],
+        'close': [1050.0, 1070.0, 1060.0, 1085.0],
+    })
+    forming = pd.DataFrame({'date': [session], 'high': [1300.0], 'low': [1080.0], 'close': [1290.0]})
+
+    roll_stops(book, 'BBCA', completed, session=session)
+    committed = book.to_dict()
+    peeked = roll_stops(book, 'BBCA', pd.concat([completed, forming], ignore_index=True), session=session)
+
+    # The forming bar's high tightens the stop checked now, but nothing is committed
+    assert peeked > book.get('BBCA').stop
+    assert book.to_dict() == committed
+    assert book.get('BBCA').last_date == ENTRY + 4 * DAY
+
+    # Next session the same bar, now complete, is committed and gives the peeked stop
+    closed = roll_stops(book, 'BBCA', pd.concat([completed, forming], ignore_index=True), session=session + DAY)
+    assert closed == peeked
+    assert book.get('BBCA').last_date == session
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indo_quant_fund.backtest import run_backtest
+from indo_quant_fund.optimizer import _score
+from indo_quant_fund.portfolio_backtest import run_portfolio_backtest
+from indo_quant_fund.run_store import RunStore
+from indo_quant_fund.synthetic import SyntheticLoader
+
+def _runs():
+    results = [
+        run_backtest(ticker, loader=SyntheticLoader(bars=bars, seed=seed), save_run=False, resume=False)
+        for ticker, bars, seed in (('ANTM', 260, 2), ('BBCA', 400, 1), ('ASII', 520, 3))
+    ]
+    results.append(run_portfolio_backtest(
+        ['BBCA', 'TLKM', 'ANTM'], loader=SyntheticLoader(bars=330, seed=0), max_workers=1, save_run=False, resume=False
+    ))
+    return results
+
+def test_metrics_match_the_optimizer_score_on_runs_of_different_lengths(tmp_path):
+    store = RunStore(str(tmp_path))
+    results = _runs()
+    run_ids = [store.save(result, run_id=f"run-{i}") for i, result in enumerate(results)]
+    assert len({len(r['equity']) for r in results}) == len(results)
+
+    table = store.metrics(run_ids)
+    for run_id, result in zip(run_ids, results):
+        equity = result['equity']['portfolio_value'].to_numpy(dtype=float)
+        expected = _score(result['trade_log'], equity, 0, len(equity), result['initial_capital'])
+        row = table.loc[run_id]
+        for name in ('total_return', 'sharpe', 'max_drawdown', 'win_rate'):
+            assert row[name] == pytest.approx(expected[name], rel=1e-12, abs=1e-12), (run_id, name)
+        assert row['trades'] == expected['trades']
+
+        dates = pd.to_datetime(result['equity']['date'])
+        years = (dates.iloc[-1].normalize() - dates.iloc[0].normalize()).days / 365.25
+        assert row['cagr'] == pytest.approx((1 + expected['total_return']) ** (1 / years) - 1, rel=1e-12)
+
+    # Scoring a subset gives the same rows as scoring them with every other run
+    pd.testing.assert_frame_equal(store.metrics(run_ids[:1]), table.iloc[:1])
+
+def test_saved_run_round_trip(tmp_path):
+    store = RunStore(str(tmp_path))
+    result = run_backtest('ANTM', loader=SyntheticLoader(bars=260, seed=2), save_run=False, resume=False)
+    run_id = store.save(result, {'days': 260})
+
+    assert store.list_runs() == [run_id]
+    assert store.meta(run_id)['params'] == {'days': 260}
+    np.testing.assert_array_equal(store.equity(run_id)['portfolio_value'], result['equity']['portfolio_value'])
+    trades = store.trades(run_id)
+    assert trades['action'].tolist() == [t['action'] for t in result['trade_log']]
+    assert trades['price'].tolist() == [t['price'] for t in result['trade_log']]
@@ -0,0 +1,35 @@
+"""
+IDX tick rounding: the scalar helper against the vectorized table.
+"""
+
+import numpy as np
+
+from indo_quant_fund.utils import (
+    TICK_BAND_LOWER, TICK_SIZES, ceil_to_tick_array, floor_to_tick_array, round_to_tick, round_to_tick_array,
+    tick_ladder, tick_size_array
+)
+
+def _around_boundaries():
+    edges = TICK_BAND_LOWER[1:]
+    offsets = np.array([-1.0, -0.5, -0.01, 0.0, 0.01, 0.5, 1.0])
+    return np.concatenate([(edges[:, None] + offsets).ravel(), edges[:, None].ravel() + TICK_SIZES[1:] / 2, [1, 150.5, 9_999.9]])
+
+def test_scalar_and_vector_rounding_agree_at_band_boundaries():
+    prices = _around_boundaries()
+    assert [round_to_tick(p) for p in prices] == list(round_to_tick_array(prices))
+
+def test_tick_sizes_at_band_boundaries():
+    for lower, tick, below in zip(TICK_BAND_LOWER[1:], TICK_SIZES[1:], TICK_SIZES[:-1]):
+        assert tick_size_array(lower) == tick
+        assert tick_size_array(lower - 1) == below
+
+def test_snapped_prices_are_on_the_grid():
+    prices = np.random.default_rng(0).uniform(50, 20_000, 5_000)
+    for snapped in (round_to_tick_array(prices), floor_to_tick_array(prices), ceil_to_tick_array(prices)):
+        assert np.all(snapped % tick_size_array(snapped) == 0)
+    assert np.all(floor_to_tick_array(prices) <= prices)
+    assert np.all(ceil_to_tick_array(prices) >= prices)
+
+def test_tick_ladder_crosses_bands():
+    ladder = tick_ladder(196, 206)
+    assert list(ladder) == [196, 197, 198, 199, 200, 202, 204, 206]